@@ -0,0 +1,291 @@
+"""
+Vectorized graph algorithms over a GraphStore's CSR adjacency: (personalized) PageRank, weakly connected components
+& degree distributions. Every algorithm operates on whole arrays with NumPy/SciPy sparse & returns its result along
+with a metrics dict reporting convergence & timing.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import sys
+import os
+import json
+import time
+
+from import_modules import import_modules
+
+# Import the required modules
+import_modules(sys.modules[__name__], 0,
+               numpy={'package_name': 'numpy'},
+               scipy={'package_name': 'scipy',
+                      'sparse': {
+                          'csgraph': {
+                              'connected_components': {}
+                          }
+                      }})
+
+## -------
+## Classes
+
+class GraphAlgorithms:
+    """
+    Collection of graph algorithms over scipy sparse adjacency matrices where entry (i, j) is the weight of the
+    edge i -> j.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log = None
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def report(name: str, metrics: dict) -> dict:
+        """
+        Reports the specified metrics & returns them.
+        :param name: The name of the algorithm
+        :param metrics: The metrics of the run
+        :return: The metrics
+        """
+
+        # Report to the user
+        if GraphAlgorithms.Log is not None: GraphAlgorithms.Log.Info(f'{name} - {str(metrics)}')
+
+        # Return the metrics
+        return metrics
+
+    @staticmethod
+    def out_weights(matrix):
+        """
+        Returns the total out-weight of every node
+        :param matrix: The adjacency matrix
+        :return: numpy float64 array of out-weights
+        """
+        return numpy.asarray(matrix.sum(axis=1), dtype=numpy.float64).ravel()
+
+    @staticmethod
+    def pagerank(matrix, damping: float = 0.85, personalization=None, seeds=None, initial=None,
+                 tolerance: float = 1e-6, max_iterations: int = 200) -> tuple:
+        """
+        Computes the (personalized) PageRank of every node with sparse matrix-vector power iteration:
+            x' = damping * A^T (x / out) + (damping * dangling(x) + 1 - damping) * v
+        where v is the uniform, personalization or seed distribution & dangling(x) is the rank held by nodes without
+        out-edges, which is redistributed according to v.
+        :param matrix: The adjacency matrix
+        :param damping: The probability of following an edge
+        :param personalization: Optional non-negative weight vector with one entry per node to teleport to
+        :param seeds: Optional list of seed node ids to teleport to uniformly; exclusive with personalization
+        :param initial: Optional rank vector to start the iteration from, e.g. a previous result
+        :param tolerance: The L1 residual at which the iteration is considered converged
+        :param max_iterations: The maximum amount of iterations; a run that exhausts them is reported as a warning
+        :return: tuple containing the rank vector & the metrics of the run
+        """
+
+        # Mark the start time
+        start_time = time.time()
+
+        # Initialize the node count, out-weights & dangling mask
+        node_count  = matrix.shape[0]
+        out         = GraphAlgorithms.out_weights(matrix)
+        dangling    = out == 0
+
+        # Initialize the inverse out-weights; zero for dangling nodes
+        inverse             = numpy.zeros(node_count, dtype=numpy.float64)
+        inverse[~dangling]  = 1.0 / out[~dangling]
+
+        # A weight vector & seed ids would be ambiguous together
+        if personalization is not None and seeds is not None:
+            raise ValueError('Specify either a personalization vector or seeds, not both')
+
+        # Initialize the teleport distribution
+        if personalization is not None:
+
+            # The weights must cover every node
+            teleport = numpy.array(personalization, dtype=numpy.float64)
+            if teleport.shape != (node_count,):
+                raise ValueError(f'The personalization vector has shape {teleport.shape}, expected ({node_count},)')
+
+        # Otherwise, if we have seeds, expand the seed node ids into an indicator vector
+        elif seeds is not None:
+
+            teleport = numpy.zeros(node_count, dtype=numpy.float64)
+            teleport[numpy.asarray(seeds, dtype=numpy.int64)] = 1.0
+
+        # Otherwise, teleport uniformly
+        else:
+
+            teleport = numpy.ones(node_count, dtype=numpy.float64)
+
+        # Normalize it
+        teleport /= teleport.sum()
+
+        # Initialize the ranks
+        ranks = teleport.copy() if initial is None else numpy.array(initial, dtype=numpy.float64)
+
+        # Pad a previous result that covers fewer nodes & normalize
+        if len(ranks) < node_count: ranks = numpy.pad(ranks, (0, node_count - len(ranks)))
+        ranks /= ranks.sum()
+
+        # Initialize the transpose once; CSC matvec with A^T is a single pass over the edges
+        transposed  = matrix.T.tocsr()
+        residual    = float('inf')
+        iterations  = 0
+
+        # Iterate until convergence
+        while iterations < max_iterations and residual > tolerance:
+
+            # Distribute the ranks over the out-edges
+            update = damping * (transposed @ (ranks * inverse))
+
+            # Redistribute the dangling & teleport mass
+            update += (damping * ranks[dangling].sum() + (1.0 - damping)) * teleport
+
+            # Compute the residual & advance
+            residual    = float(numpy.abs(update - ranks).sum())
+            ranks       = update
+            iterations  += 1
+
+        # Warn if the iteration didn't converge
+        if residual > tolerance and GraphAlgorithms.Log is not None:
+
+            GraphAlgorithms.Log.Warn('PageRank did not converge: residual %s after %s iterations', residual, iterations)
+
+        # Return the result
+        return ranks, GraphAlgorithms.report('PageRank', {
+            'nodes':        node_count,
+            'edges':        int(matrix.nnz),
+            'iterations':   iterations,
+            'residual':     residual,
+            'converged':    residual <= tolerance,
+            'time':         time.time() - start_time
+        })
+
+    @staticmethod
+    def weakly_connected_components(matrix) -> tuple:
+        """
+        Labels every node with its weakly connected component.
+        :param matrix: The adjacency matrix
+        :return: tuple containing the label vector & the metrics of the run
+        """
+
+        # Mark the start time
+        start_time = time.time()
+
+        # Label the components
+        count, labels = connected_components(matrix, directed=True, connection='weak')
+
+        # Compute the component sizes
+        sizes = numpy.bincount(labels, minlength=count)
+
+        # Return the result
+        return labels, GraphAlgorithms.report('Weakly Connected Components', {
+            'nodes':        matrix.shape[0],
+            'edges':        int(matrix.nnz),
+            'components':   int(count),
+            'largest':      int(sizes.max()) if count > 0 else 0,
+            'singletons':   int((sizes == 1).sum()),
+            'time':         time.time() - start_time
+        })
+
+    @staticmethod
+    def degree_distributions(matrix) -> tuple:
+        """
+        Computes the in & out-degree of every node & their distributions, where distribution[k] is the amount of
+        nodes with degree k.
+        :param matrix: The adjacency matrix in CSR format
+        :return: tuple containing a dict of the degree arrays & distributions, & the metrics of the run
+        """
+
+        # Mark the start time
+        start_time = time.time()
+
+        # Compute the degrees
+        out_degrees = numpy.diff(matrix.indptr)
+        in_degrees  = numpy.bincount(matrix.indices, minlength=matrix.shape[0])
+
+        # Initialize the result
+        result = {
+            'out_degrees':      out_degrees,
+            'in_degrees':       in_degrees,
+            'out_distribution': numpy.bincount(out_degrees),
+            'in_distribution':  numpy.bincount(in_degrees)
+        }
+
+        # Initialize the metrics
+        metrics = {'nodes': matrix.shape[0], 'edges': int(matrix.nnz)}
+
+        # Summarize each of the degrees
+        for name, degrees in (('out', out_degrees), ('in', in_degrees)):
+
+            # Compute the percentiles
+            p50, p99 = numpy.percentile(degrees, [50, 99]) if len(degrees) > 0 else (0, 0)
+
+            # Set the metrics
+            metrics[f'{name}_mean'] = float(degrees.mean()) if len(degrees) > 0 else 0.0
+            metrics[f'{name}_max']  = int(degrees.max()) if len(degrees) > 0 else 0
+            metrics[f'{name}_p50']  = float(p50)
+            metrics[f'{name}_p99']  = float(p99)
+
+        # Insert the time
+        metrics['time'] = time.time() - start_time
+
+        # Return the result
+        return result, GraphAlgorithms.report('Degree Distributions', metrics)
+
+## ------
+## Script
+
+if __name__ == "__main__":
+
+    from arguments import Arguments
+    from graph_store import GraphStore
+    from log import Log
+
+    # Initialize the log
+    GraphAlgorithms.Log = Arguments.Log = log = Log()
+
+    # Consume the arguments
+    arguments = Arguments(sys.argv, ['store', 'algorithm', 'output'])
+
+    # Open the store & create the output directory
+    matrix = GraphStore(arguments['store']).matrix()
+    output = arguments['output']
+    os.makedirs(output, exist_ok=True)
+
+    # If we're ranking
+    if arguments['algorithm'] == 'pagerank':
+
+        # Retrieve the seeds, if any
+        seeds = arguments['seeds'] if 'seeds' in arguments.dictionary else None
+        seeds = [int(seed) for seed in (seeds if isinstance(seeds, list) else [seeds])] if seeds is not None else None
+
+        # Rank the nodes
+        result, metrics = GraphAlgorithms.pagerank(matrix, seeds=seeds)
+        numpy.save(os.path.join(output, 'pagerank.npy'), result)
+
+    # Otherwise, if we're labeling the components
+    elif arguments['algorithm'] == 'components':
+
+        # Label the components
+        result, metrics = GraphAlgorithms.weakly_connected_components(matrix)
+        numpy.save(os.path.join(output, 'components.npy'), result)
+
+    # Otherwise, if we're computing the degrees
+    elif arguments['algorithm'] == 'degrees':
+
+        # Compute the degrees
+        result, metrics = GraphAlgorithms.degree_distributions(matrix)
+        for name, value in result.items(): numpy.save(os.path.join(output, f'{name}.npy'), value)
+
+    else:
+
+        log.Error(f'Error: Unknown algorithm \'{arguments["algorithm"]}\'')
+
+    # Write the metrics
+    with open(os.path.join(output, f'{arguments["algorithm"]}-metrics.json'), 'w') as output_file:
+
+        output_file.write(json.dumps(metrics, indent=4))
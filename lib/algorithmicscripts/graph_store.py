@@ -0,0 +1,468 @@
+"""
+Memory-mapped CSR graph store. Converts the edge chunks written by the ingestion graph extractor into a compressed
+sparse row adjacency persisted as .npy columns that graph jobs open with np.load(mmap_mode='r').
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+from import_modules import import_modules
+
+# Import the required modules
+import_modules(sys.modules[__name__], 0,
+               numpy={'package_name': 'numpy'},
+               scipy={'package_name': 'scipy',
+                      'sparse': {
+                          'csr_matrix': {}
+                      }})
+
+# Initialize the names
+open_memmap = numpy.lib.format.open_memmap
+
+## -------
+## Classes
+
+class GraphStore:
+    """
+    Read-only CSR adjacency opened from a store directory. Every column is memory-mapped, so opening a store costs
+    a few page faults regardless of its size & concurrent jobs share the page cache.
+        offsets     | index dtype, node_count + 1 | Row offsets into the edge columns
+        neighbors   | index dtype, edge_count     | Target node of each edge
+        types       | uint8, edge_count           | EdgeType of each edge
+        timestamps  | uint32, edge_count          | Creation time of each edge, in seconds since the epoch
+        weights     | float32, edge_count         | Optional weight of each edge
+    Edges are ordered by source & then by timestamp, so the adjacency isn't in scipy's canonical format.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log         = None
+    MetaFile    = 'meta.json'
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def index_dtype(node_count: int, edge_count: int):
+        """
+        Returns the narrowest index dtype able to address the specified amount of nodes & edges. Offsets & neighbors
+        share the dtype so scipy can wrap them without a copy.
+        :param node_count: The amount of nodes
+        :param edge_count: The amount of edges
+        :return: numpy.int32 or numpy.int64
+        """
+        return numpy.int32 if max(node_count, edge_count) < (1 << 31) - 1 else numpy.int64
+
+    @staticmethod
+    def column_path(path: str, column: str) -> str:
+        """
+        Returns the path of the specified column within the store directory
+        :param path: The store directory
+        :param column: The name of the column
+        :return: The path to the column's .npy file
+        """
+        return os.path.join(path, f'{column}.npy')
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """
+        Returns a flag indicating if the specified directory contains a complete store
+        :param path: The store directory
+        :return: boolean flag indicating if the store exists
+        """
+        return os.path.isfile(os.path.join(path, GraphStore.MetaFile))
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, path: str):
+        """
+        Opens the store contained in the specified directory.
+        :param path: The store directory
+        """
+
+        # Read the metadata
+        with open(os.path.join(path, GraphStore.MetaFile), 'r') as input_file:
+
+            self.meta = json.loads(input_file.read())
+
+        # Initialize the members
+        self.path       = path
+        self.offsets    = numpy.load(GraphStore.column_path(path, 'offsets'),       mmap_mode='r')
+        self.neighbors  = numpy.load(GraphStore.column_path(path, 'neighbors'),     mmap_mode='r')
+        self.types      = numpy.load(GraphStore.column_path(path, 'types'),         mmap_mode='r')
+        self.timestamps = numpy.load(GraphStore.column_path(path, 'timestamps'),    mmap_mode='r')
+        self.weights    = numpy.load(GraphStore.column_path(path, 'weights'),       mmap_mode='r') \
+            if self.meta['weighted'] else None
+
+    ## -------
+    ## Methods
+
+    def node_count(self) -> int:
+        """
+        Returns the amount of nodes in the store
+        :return: The amount of nodes
+        """
+        return len(self.offsets) - 1
+
+    def edge_count(self) -> int:
+        """
+        Returns the amount of edges in the store
+        :return: The amount of edges
+        """
+        return len(self.neighbors)
+
+    def neighbors_of(self, node: int):
+        """
+        Returns a zero-copy view of the specified node's out-neighbors
+        :param node: The node id
+        :return: numpy array of neighbor ids
+        """
+        return self.neighbors[self.offsets[node]:self.offsets[node + 1]]
+
+    def out_degrees(self):
+        """
+        Returns the out-degree of every node
+        :return: numpy array of out-degrees
+        """
+        return numpy.diff(self.offsets)
+
+    def sources(self):
+        """
+        Returns the source node of every edge. This expands the offsets & materializes an array the size of the
+        edge count.
+        :return: numpy array of source ids
+        """
+        return numpy.repeat(numpy.arange(self.node_count(), dtype=self.neighbors.dtype), self.out_degrees())
+
+    def matrix(self, weighted: bool = True, node_count: int = 0, canonical: bool = False):
+        """
+        Returns the adjacency as a scipy csr_matrix of shape (node_count, node_count) that wraps the mapped
+        offsets & neighbors. Entries are the edge weights if the store is weighted & weights are requested,
+        otherwise ones. The wrapped matrix is not in canonical format: each row is ordered by timestamp rather than
+        by column & repeated edges are separate entries. Products, transposes & conversions read it as is, but
+        scipy methods that canonicalize in place (e.g. sum(), sum_duplicates or sort_indices) fail on the read-only
+        map; a canonical matrix is an in-memory copy whose repeated edges are summed.
+        :param weighted: Flag indicating if the weights should be used as the entries
+        :param node_count: Optional node count larger than the store's, e.g. to align stores built at different times
+        :param canonical: Flag indicating if a canonical in-memory copy is returned instead of the mapped matrix
+        :return: scipy.sparse.csr_matrix
+        """
+
+        # Initialize the data & offsets
+        data    = self.weights if weighted and self.weights is not None \
+            else numpy.ones(self.edge_count(), dtype=numpy.float32)
+        offsets = self.offsets
+
+        # Pad the offsets if the matrix should cover more nodes; padded rows are empty
+        if node_count > self.node_count():
+            offsets = numpy.pad(offsets, (0, node_count - self.node_count()), mode='edge')
+
+        # Initialize the shape
+        shape = (len(offsets) - 1, len(offsets) - 1)
+
+        # Wrap the columns; rows are ordered by timestamp & may repeat a neighbor
+        result                      = csr_matrix((data, self.neighbors, offsets), shape=shape, copy=False)
+        result.has_sorted_indices   = False
+        result.has_canonical_format = False
+
+        # If a canonical matrix is requested, sort & sum a copy
+        if canonical:
+
+            result = result.copy()
+            result.sum_duplicates()
+
+        # Return the result
+        return result
+
+class GraphStoreBuilder:
+    """
+    Out-of-core CSR builder. Edge chunks are sorted by source with an external distribution sort:
+        1) Count the out-degree of every source over all chunks to derive the row offsets
+        2) Partition the source id range into buckets holding at most 'memory' edges & append each chunk's edges
+           to per-bucket run files
+        3) Sort each bucket in memory by (source, timestamp) & write it sequentially into the memory-mapped output
+    Only one chunk or one bucket is resident at a time, so the builder handles edge lists larger than RAM.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log     = None
+    Columns = [('source', 'uint32'), ('target', 'uint32'), ('type', 'uint8'), ('timestamp', 'uint32')]
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def node_count_of(graph_path: str) -> int:
+        """
+        Returns the amount of nodes interned by the extractor, i.e. the amount of lines in the nodes file.
+        :param graph_path: The dataset's graph directory
+        :return: The amount of nodes or 0 if the nodes file does not exist
+        """
+
+        # Initialize the path
+        path = os.path.join(graph_path, 'nodes.tsv')
+
+        # If there's no nodes file, there are no nodes
+        if not os.path.isfile(path): return 0
+
+        # Count the lines
+        with open(path, 'rb') as input_file:
+            return sum(block.count(b'\n') for block in iter(lambda: input_file.read(1 << 20), b''))
+
+    @staticmethod
+    def chunks_of(graph_path: str) -> list:
+        """
+        Returns the ordered edge chunk paths contained in the specified graph directory
+        :param graph_path: The dataset's graph directory
+        :return: list of chunk paths
+        """
+        return [os.path.join(graph_path, name) for name in sorted(os.listdir(graph_path))
+                if name.startswith('edges-') and name.endswith('.npz')]
+
+    @staticmethod
+    def load_chunk(chunk: str) -> dict:
+        """
+        Loads the columns of the specified edge chunk.
+        :param chunk: The path of the chunk
+        :return: dict of column name to numpy array
+        """
+        with numpy.load(chunk) as columns:
+            return {name: columns[name].astype(dtype, copy=False) for name, dtype in GraphStoreBuilder.Columns}
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, chunks: list, node_count: int = 0, weights: dict = None, memory: int = 1 << 24,
+                 temporary: str = None):
+        """
+        Initializes the GraphStoreBuilder to its' default state.
+        :param chunks: The edge chunk paths to build the store from
+        :param node_count: The amount of nodes; grown to cover the largest id found in the chunks
+        :param weights: Optional dict of EdgeType to float weight; the store is unweighted if not specified
+        :param memory: The maximum amount of edges to sort in memory at once
+        :param temporary: The directory to write the bucket runs to; defaults to the system's temporary directory
+        """
+        self.chunks     = chunks
+        self.node_count = node_count
+        self.weights    = weights
+        self.memory     = max(int(memory), 1)
+        self.temporary  = temporary
+
+    ## -------
+    ## Methods
+
+    def degrees(self):
+        """
+        Counts the out-degree of every source over all the chunks & grows the node count to cover every id.
+        :return: numpy int64 array of out-degrees
+        """
+
+        # Initialize the degrees
+        degrees = numpy.zeros(self.node_count, dtype=numpy.int64)
+
+        # Iterate through the chunks
+        for chunk in self.chunks:
+
+            # Load the chunk
+            columns = GraphStoreBuilder.load_chunk(chunk)
+
+            # If the chunk is empty, skip it
+            if len(columns['source']) == 0: continue
+
+            # Grow the node count
+            self.node_count = max(self.node_count, int(columns['source'].max()) + 1,
+                                  int(columns['target'].max()) + 1)
+
+            # Count the sources
+            counts = numpy.bincount(columns['source'], minlength=self.node_count)
+
+            # Grow the degrees if necessary
+            if len(degrees) < len(counts): degrees = numpy.pad(degrees, (0, len(counts) - len(degrees)))
+
+            # Accumulate
+            degrees[:len(counts)] += counts
+
+        # Return the result
+        return numpy.pad(degrees, (0, self.node_count - len(degrees)))
+
+    def partition(self, buckets, runs: str) -> None:
+        """
+        Appends every chunk's edges to the run files of their source bucket.
+        :param buckets: numpy array mapping each source node to its bucket
+        :param runs: The directory to write the run files to
+        """
+
+        # Iterate through the chunks
+        for chunk in self.chunks:
+
+            # Load the chunk
+            columns = GraphStoreBuilder.load_chunk(chunk)
+
+            # Order the edges by bucket
+            bucket  = buckets[columns['source']]
+            order   = numpy.argsort(bucket, kind='stable')
+            bucket  = bucket[order]
+
+            # Retrieve the distinct buckets & their boundaries
+            present, starts = numpy.unique(bucket, return_index=True)
+            ends            = numpy.append(starts[1:], len(bucket))
+
+            # Iterate through each column
+            for name, _ in GraphStoreBuilder.Columns:
+
+                # Initialize the ordered column
+                column = columns[name][order]
+
+                # Append each bucket's slice to its run
+                for index, start, end in zip(present, starts, ends):
+
+                    with open(os.path.join(runs, f'{index}.{name}'), 'ab') as output_file:
+                        column[start:end].tofile(output_file)
+
+    def build(self, path: str) -> GraphStore:
+        """
+        Builds the store into the specified directory & returns it opened. The metadata is written last, so an
+        interrupted build never leaves a store that appears complete.
+        :param path: The store directory
+        :return: GraphStore
+        """
+
+        # Create the directory
+        os.makedirs(path, exist_ok=True)
+
+        # Remove any previous metadata
+        if GraphStore.exists(path): os.remove(os.path.join(path, GraphStore.MetaFile))
+
+        # Count the degrees & compute the offsets
+        degrees     = self.degrees()
+        offsets     = numpy.concatenate(([0], numpy.cumsum(degrees)))
+        edge_count  = int(offsets[-1])
+        dtype       = GraphStore.index_dtype(self.node_count, edge_count)
+
+        # Report
+        if GraphStoreBuilder.Log is not None:
+            GraphStoreBuilder.Log.Info(f'Building store: {self.node_count} nodes, {edge_count} edges')
+
+        # Write the offsets
+        numpy.save(GraphStore.column_path(path, 'offsets'), offsets.astype(dtype))
+
+        # Initialize the output columns
+        neighbors   = open_memmap(GraphStore.column_path(path, 'neighbors'), 'w+', dtype, (edge_count,))
+        types       = open_memmap(GraphStore.column_path(path, 'types'), 'w+', numpy.uint8, (edge_count,))
+        timestamps  = open_memmap(GraphStore.column_path(path, 'timestamps'), 'w+', numpy.uint32, (edge_count,))
+        weights     = open_memmap(GraphStore.column_path(path, 'weights'), 'w+', numpy.float32, (edge_count,)) \
+            if self.weights is not None else None
+
+        # Initialize the weights lookup table
+        table = numpy.zeros(256, dtype=numpy.float32)
+        for edge_type, weight in (self.weights or {}).items(): table[int(edge_type)] = weight
+
+        # Assign each source the bucket that its first edge falls into
+        buckets = (offsets[:-1] // self.memory).astype(numpy.int64)
+        runs    = tempfile.mkdtemp(dir=self.temporary)
+
+        try:
+
+            # Partition the edges into the runs
+            self.partition(buckets, runs)
+
+            # Iterate through the non-empty buckets in order
+            for index in numpy.unique(buckets[degrees > 0]):
+
+                # Read the run
+                run = {name: numpy.fromfile(os.path.join(runs, f'{index}.{name}'), dtype=dtype_name)
+                       for name, dtype_name in GraphStoreBuilder.Columns}
+
+                # Order the run by source & then timestamp
+                order = numpy.lexsort((run['timestamp'], run['source']))
+
+                # Compute the run's position in the output; buckets cover contiguous sources
+                start   = int(offsets[run['source'].min()])
+                end     = start + len(order)
+
+                # Write the run
+                neighbors[start:end]    = run['target'][order]
+                types[start:end]        = run['type'][order]
+                timestamps[start:end]   = run['timestamp'][order]
+
+                # Write the weights
+                if weights is not None: weights[start:end] = table[types[start:end]]
+
+                # Remove the run
+                for name, _ in GraphStoreBuilder.Columns: os.remove(os.path.join(runs, f'{index}.{name}'))
+
+        finally:
+
+            # Remove the runs
+            shutil.rmtree(runs, ignore_errors=True)
+
+        # Flush the columns
+        for column in (neighbors, types, timestamps, weights):
+            if column is not None: column.flush()
+
+        # Release the maps
+        del neighbors, types, timestamps, weights
+
+        # Remove any stale weights
+        if self.weights is None and os.path.isfile(GraphStore.column_path(path, 'weights')):
+            os.remove(GraphStore.column_path(path, 'weights'))
+
+        # Write the metadata
+        with open(os.path.join(path, GraphStore.MetaFile), 'w') as output_file:
+
+            output_file.write(json.dumps({
+                'node_count':   self.node_count,
+                'edge_count':   edge_count,
+                'index_dtype':  numpy.dtype(dtype).name,
+                'weighted':     self.weights is not None,
+                'chunks':       [os.path.basename(chunk) for chunk in self.chunks]
+            }, indent=4))
+
+        # Report
+        if GraphStoreBuilder.Log is not None: GraphStoreBuilder.Log.Info(f'Store written to {path}')
+
+        # Return the opened store
+        return GraphStore(path)
+
+## ------
+## Script
+
+if __name__ == "__main__":
+
+    from arguments import Arguments
+    from log import Log
+
+    # Initialize the log
+    GraphStore.Log = GraphStoreBuilder.Log = Arguments.Log = log = Log()
+
+    # Consume the arguments
+    arguments = Arguments(sys.argv, ['graph', 'store'])
+
+    # Initialize the optional arguments
+    memory  = int(arguments['memory']) if 'memory' in arguments.dictionary else 1 << 24
+    weights = arguments['weights'] if 'weights' in arguments.dictionary else None
+
+    # Map the weights (one per EdgeType, in order) to their edge types
+    if weights is not None:
+        weights = {edge_type: float(weight) for edge_type, weight in enumerate(weights if isinstance(weights, list) else [weights])}
+
+    # Build the store
+    store = GraphStoreBuilder(GraphStoreBuilder.chunks_of(arguments['graph']),
+                              GraphStoreBuilder.node_count_of(arguments['graph']),
+                              weights, memory).build(arguments['store'])
+
+    # Report
+    log.Info(f'{store.node_count()} nodes, {store.edge_count()} edges')
@@ -0,0 +1,297 @@
+"""
+Incremental PageRank. Keeps a dataset's graph as a base GraphStore plus delta segments built from the edge chunks
+that arrived since, warm-starts power iteration from the previous rank vector & periodically compacts the deltas
+into the base.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import sys
+import os
+import json
+import shutil
+
+from import_modules import import_modules
+from graph_store import GraphStore, GraphStoreBuilder
+from graph_algorithms import GraphAlgorithms
+
+# Import the required modules
+import_modules(sys.modules[__name__], 0,
+               numpy={'package_name': 'numpy'})
+
+## -------
+## Classes
+
+class IncrementalPageRank:
+    """
+    Maintains a segmented graph store & its PageRank vector. The segments & the previous ranks live in the
+    specified directory:
+        segments.json   | The base segment, the delta segments in order & the next delta number
+        base-NNNNNN/    | GraphStore built from the first chunks or compacted from every consumed chunk
+        delta-NNNNNN/   | GraphStore built from the chunks consumed by one update
+        pagerank.npy    | The rank vector of the last update
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log             = None
+    SegmentsFile    = 'segments.json'
+    RanksFile       = 'pagerank.npy'
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, path: str, graph_path: str, compact_after: int = 7, compact_ratio: float = 0.25,
+                 weights: dict = None):
+        """
+        Initializes the IncrementalPageRank with the specified directories & compaction policy.
+        :param path: The directory containing the segments & ranks
+        :param graph_path: The dataset's graph directory written by the ingestion graph extractor
+        :param compact_after: The amount of delta segments that triggers a compaction
+        :param compact_ratio: The ratio of delta edges to base edges that triggers a compaction
+        :param weights: Optional dict of EdgeType to float weight passed to the GraphStoreBuilder
+        """
+
+        # Initialize the members
+        self.path           = path
+        self.graph_path     = graph_path
+        self.compact_after  = compact_after
+        self.compact_ratio  = compact_ratio
+        self.weights        = weights
+        self.segments       = {'base': None, 'deltas': [], 'next': 0}
+
+        # Create the directory
+        os.makedirs(path, exist_ok=True)
+
+        # Read any existing segments
+        if os.path.isfile(os.path.join(path, IncrementalPageRank.SegmentsFile)):
+
+            with open(os.path.join(path, IncrementalPageRank.SegmentsFile), 'r') as input_file:
+
+                self.segments = json.loads(input_file.read())
+
+    ## -------
+    ## Methods
+
+    def write_segments(self) -> None:
+        """
+        Writes the segments manifest. The manifest is replaced atomically so a failed update leaves the previous
+        segments intact.
+        """
+
+        # Initialize the paths
+        path        = os.path.join(self.path, IncrementalPageRank.SegmentsFile)
+        temporary   = f'{path}.tmp'
+
+        # Write the manifest
+        with open(temporary, 'w') as output_file:
+
+            output_file.write(json.dumps(self.segments, indent=4))
+
+        # Replace the existing manifest
+        os.replace(temporary, path)
+
+    def stores(self) -> list:
+        """
+        Returns the opened GraphStores of the base & delta segments
+        :return: list of GraphStores
+        """
+
+        # Initialize the names
+        names = ([self.segments['base']] if self.segments['base'] is not None else []) + self.segments['deltas']
+
+        # Return the opened stores
+        return [GraphStore(os.path.join(self.path, name)) for name in names]
+
+    def consumed(self) -> set:
+        """
+        Returns the names of the edge chunks contained in the segments
+        :return: set of chunk names
+        """
+        return {chunk for store in self.stores() for chunk in store.meta['chunks']}
+
+    def append_delta(self) -> int:
+        """
+        Builds a delta segment from the edge chunks that are not yet contained in any segment. If there is no base
+        yet, the segment becomes the base.
+        :return: The amount of chunks consumed
+        """
+
+        # Retrieve the new chunks
+        consumed    = self.consumed()
+        chunks      = [chunk for chunk in GraphStoreBuilder.chunks_of(self.graph_path)
+                       if os.path.basename(chunk) not in consumed]
+
+        # If there's nothing new, leave
+        if len(chunks) == 0: return 0
+
+        # Initialize the segment name; the first segment becomes the base
+        name = f'{"delta" if self.segments["base"] is not None else "base"}-{self.segments["next"]:06d}'
+
+        # Build the segment
+        GraphStoreBuilder(chunks, GraphStoreBuilder.node_count_of(self.graph_path), self.weights)\
+            .build(os.path.join(self.path, name))
+
+        # Update the segments
+        if self.segments['base'] is None: self.segments['base'] = name
+        else: self.segments['deltas'].append(name)
+        self.segments['next'] += 1
+        self.write_segments()
+
+        # Report
+        if IncrementalPageRank.Log is not None:
+            IncrementalPageRank.Log.Info(f'Appended {name} from {len(chunks)} chunks')
+
+        # Return the result
+        return len(chunks)
+
+    def should_compact(self) -> bool:
+        """
+        Returns a flag indicating if the delta segments should be compacted into the base, i.e. if there are too many
+        deltas or they hold too large a share of the edges.
+        :return: boolean flag indicating if a compaction is due
+        """
+
+        # Retrieve the stores
+        stores = self.stores()
+
+        # If there are no deltas, there's nothing to compact
+        if len(self.segments['deltas']) == 0: return False
+
+        # If we have too many deltas, compact
+        if len(self.segments['deltas']) >= self.compact_after: return True
+
+        # Otherwise, compact if the deltas are too large relative to the base
+        return sum(store.edge_count() for store in stores[1:]) > self.compact_ratio * max(stores[0].edge_count(), 1)
+
+    def compact(self) -> None:
+        """
+        Rebuilds the base from every consumed chunk & removes the delta segments.
+        """
+
+        # Retrieve the consumed chunks in order
+        consumed    = self.consumed()
+        chunks      = [chunk for chunk in GraphStoreBuilder.chunks_of(self.graph_path)
+                       if os.path.basename(chunk) in consumed]
+
+        # Initialize the segment name
+        name = f'base-{self.segments["next"]:06d}'
+
+        # Build the base
+        GraphStoreBuilder(chunks, GraphStoreBuilder.node_count_of(self.graph_path), self.weights)\
+            .build(os.path.join(self.path, name))
+
+        # Retrieve the stale segments
+        stale = ([self.segments['base']] if self.segments['base'] is not None else []) + self.segments['deltas']
+
+        # Update the segments
+        self.segments = {'base': name, 'deltas': [], 'next': self.segments['next'] + 1}
+        self.write_segments()
+
+        # Remove the stale segments
+        for segment in stale: shutil.rmtree(os.path.join(self.path, segment), ignore_errors=True)
+
+        # Report
+        if IncrementalPageRank.Log is not None:
+            IncrementalPageRank.Log.Info(f'Compacted {len(stale)} segments into {name}')
+
+    def matrix(self):
+        """
+        Returns the adjacency of the union of the segments.
+        :return: scipy.sparse.csr_matrix
+        """
+
+        # Retrieve the stores & the node count that covers all of them
+        stores      = self.stores()
+        node_count  = max([store.node_count() for store in stores] + [0])
+
+        # Initialize the result
+        result = stores[0].matrix(node_count=node_count)
+
+        # Sum the deltas
+        for store in stores[1:]: result = result + store.matrix(node_count=node_count)
+
+        # Return the result
+        return result
+
+    def update(self, compare: bool = False, **parameters) -> dict:
+        """
+        Consumes the new edge chunks, compacts the segments if due & recomputes the ranks warm-started from the
+        previous rank vector.
+        :param compare: Flag indicating if a cold start should also be run to report the iteration savings
+        :param parameters: Any parameters to pass to GraphAlgorithms.pagerank
+        :return: The metrics of the update
+        """
+
+        # Consume the new chunks
+        chunks = self.append_delta()
+
+        # If there is no graph yet, leave
+        if self.segments['base'] is None: return {'chunks': 0}
+
+        # Compact if due
+        if self.should_compact(): self.compact()
+
+        # Retrieve the matrix & the previous ranks
+        matrix      = self.matrix()
+        ranks_path  = os.path.join(self.path, IncrementalPageRank.RanksFile)
+        previous    = numpy.load(ranks_path) if os.path.isfile(ranks_path) else None
+
+        # Compute the ranks
+        ranks, metrics = GraphAlgorithms.pagerank(matrix, initial=previous, **parameters)
+
+        # Initialize the metrics
+        metrics['chunks']       = chunks
+        metrics['segments']     = len(self.segments['deltas']) + (self.segments['base'] is not None)
+        metrics['warm_start']   = previous is not None
+
+        # If we're comparing against a cold start
+        if compare:
+
+            # Compute the cold start
+            _, cold = GraphAlgorithms.pagerank(matrix, **parameters)
+
+            # Set the savings
+            metrics['cold_iterations']  = cold['iterations']
+            metrics['cold_time']        = cold['time']
+            metrics['saved_iterations'] = cold['iterations'] - metrics['iterations']
+            metrics['saved_ratio']      = metrics['saved_iterations'] / max(cold['iterations'], 1)
+
+        # Save the ranks
+        numpy.save(ranks_path, ranks)
+
+        # Report
+        if IncrementalPageRank.Log is not None: IncrementalPageRank.Log.Info(f'Incremental PageRank - {str(metrics)}')
+
+        # Return the result
+        return metrics
+
+## ------
+## Script
+
+if __name__ == "__main__":
+
+    from arguments import Arguments
+    from log import Log
+
+    # Initialize the log
+    IncrementalPageRank.Log = GraphAlgorithms.Log = GraphStoreBuilder.Log = Arguments.Log = log = Log()
+
+    # Consume the arguments
+    arguments = Arguments(sys.argv, ['graph', 'store'])
+
+    # Initialize the ranker
+    ranker = IncrementalPageRank(arguments['store'], arguments['graph'],
+                                 int(arguments['compact_after']) if 'compact_after' in arguments.dictionary else 7)
+
+    # Update the ranks
+    metrics = ranker.update('compare' in arguments.dictionary)
+
+    # Write the metrics
+    with open(os.path.join(arguments['store'], 'pagerank-metrics.json'), 'w') as output_file:
+
+        output_file.write(json.dumps(metrics, indent=4))
@@ -0,0 +1,428 @@
+"""
+Time-indexed temporal edge store. Keeps the extracted interaction edges sorted by timestamp in memory-mapped columns
+with a sparse block index, so the interaction graph between two points in time is a zero-copy slice.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+from import_modules import import_modules
+from graph_store import GraphStoreBuilder
+
+# Import the required modules
+import_modules(sys.modules[__name__], 0,
+               numpy={'package_name': 'numpy'},
+               scipy={'package_name': 'scipy',
+                      'sparse': {
+                          'csr_matrix': {}
+                      }})
+
+# Initialize the names
+open_memmap = numpy.lib.format.open_memmap
+
+## -------
+## Classes
+
+class TemporalWindow:
+    """
+    View over the edges created within [start, end). The columns are slices of the store's mapped columns & are
+    not copied until a matrix is requested.
+    @author Carlos L. Cuenca
+    """
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, start: int, end: int, sources, targets, types, timestamps):
+        """
+        Initializes the TemporalWindow with the specified bounds & column slices.
+        :param start: The inclusive start of the window, in seconds since the epoch
+        :param end: The exclusive end of the window, in seconds since the epoch
+        :param sources: The source column slice
+        :param targets: The target column slice
+        :param types: The type column slice
+        :param timestamps: The timestamp column slice
+        """
+        self.start      = start
+        self.end        = end
+        self.sources    = sources
+        self.targets    = targets
+        self.types      = types
+        self.timestamps = timestamps
+
+    ## -------
+    ## Methods
+
+    def edge_count(self) -> int:
+        """
+        Returns the amount of edges within the window
+        :return: The amount of edges
+        """
+        return len(self.sources)
+
+    def nodes(self):
+        """
+        Returns the distinct nodes incident to the window's edges
+        :return: sorted numpy array of node ids
+        """
+        return numpy.unique(numpy.concatenate((self.sources, self.targets)))
+
+    def matrix(self, node_count: int, edge_types: list = None):
+        """
+        Returns the window's adjacency as a scipy csr_matrix over the full id space, so results line up with the
+        store's node ids. Duplicate edges are summed.
+        :param node_count: The amount of nodes in the id space
+        :param edge_types: Optional list of EdgeTypes to keep
+        :return: scipy.sparse.csr_matrix of shape (node_count, node_count)
+        """
+
+        # Initialize the columns
+        sources, targets = self.sources, self.targets
+
+        # Filter the edge types if specified
+        if edge_types is not None:
+
+            mask                = numpy.isin(self.types, edge_types)
+            sources, targets    = sources[mask], targets[mask]
+
+        # Return the matrix
+        return csr_matrix((numpy.ones(len(sources), dtype=numpy.float32), (sources, targets)),
+                          shape=(node_count, node_count))
+
+class TemporalEdgeStore:
+    """
+    Read-only temporal edge store opened from a store directory. Every column is memory-mapped:
+        timestamps  | uint32, edge_count | Creation time of each edge in ascending order
+        sources     | uint32, edge_count | Source node of each edge
+        targets     | uint32, edge_count | Target node of each edge
+        types       | uint8, edge_count  | EdgeType of each edge
+        blocks      | uint32, blocks     | Timestamp of every block-th edge
+    A window query binary-searches the block index & then a single block of timestamps.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log         = None
+    MetaFile    = 'meta.json'
+    Hour        = 3600
+    Day         = 86400
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, path: str):
+        """
+        Opens the store contained in the specified directory.
+        :param path: The store directory
+        """
+
+        # Read the metadata
+        with open(os.path.join(path, TemporalEdgeStore.MetaFile), 'r') as input_file:
+
+            self.meta = json.loads(input_file.read())
+
+        # Initialize the members
+        self.path       = path
+        self.block      = self.meta['block']
+        self.blocks     = numpy.load(os.path.join(path, 'blocks.npy'), mmap_mode='r')
+        self.timestamps = numpy.load(os.path.join(path, 'timestamps.npy'), mmap_mode='r')
+        self.sources    = numpy.load(os.path.join(path, 'sources.npy'), mmap_mode='r')
+        self.targets    = numpy.load(os.path.join(path, 'targets.npy'), mmap_mode='r')
+        self.types      = numpy.load(os.path.join(path, 'types.npy'), mmap_mode='r')
+
+    ## -------
+    ## Methods
+
+    def node_count(self) -> int:
+        """
+        Returns the amount of nodes in the id space
+        :return: The amount of nodes
+        """
+        return self.meta['node_count']
+
+    def edge_count(self) -> int:
+        """
+        Returns the amount of edges in the store
+        :return: The amount of edges
+        """
+        return len(self.timestamps)
+
+    def position(self, timestamp: int) -> int:
+        """
+        Returns the index of the first edge created at or after the specified timestamp.
+        :param timestamp: The timestamp in seconds since the epoch
+        :return: The index of the edge, or the edge count if every edge is older
+        """
+
+        # Find the first block that starts at or after the timestamp
+        block = int(numpy.searchsorted(self.blocks, timestamp, side='left'))
+
+        # If it's the first block, the position is the start
+        if block == 0: return 0
+
+        # Otherwise, the position lies within the previous block
+        start = (block - 1) * self.block
+        end   = min(block * self.block, self.edge_count())
+
+        # Return the result
+        return start + int(numpy.searchsorted(self.timestamps[start:end], timestamp, side='left'))
+
+    def window(self, start: int, end: int) -> TemporalWindow:
+        """
+        Returns a zero-copy view of the edges created within [start, end).
+        :param start: The inclusive start, in seconds since the epoch
+        :param end: The exclusive end, in seconds since the epoch
+        :return: TemporalWindow
+        """
+
+        # Retrieve the bounds
+        lower, upper = self.position(start), self.position(end)
+
+        # Return the result
+        return TemporalWindow(start, end, self.sources[lower:upper], self.targets[lower:upper],
+                              self.types[lower:upper], self.timestamps[lower:upper])
+
+    def windows(self, width: int, step: int = None, start: int = None, end: int = None):
+        """
+        Yields consecutive windows of the specified width. The first window starts at the specified start or at the
+        oldest edge's time aligned down to a multiple of the step.
+        :param width: The width of each window, in seconds
+        :param step: The amount of seconds between window starts; defaults to the width (tumbling windows)
+        :param start: Optional start of the first window
+        :param end: Optional end past which no window starts; defaults to the newest edge's time
+        :return: generator of TemporalWindows
+        """
+
+        # If the store is empty, there are no windows
+        if self.edge_count() == 0: return
+
+        # Initialize the bounds
+        step    = step if step is not None else width
+        start   = start if start is not None else (int(self.timestamps[0]) // step) * step
+        end     = end if end is not None else int(self.timestamps[-1]) + 1
+
+        # Yield each window
+        while start < end:
+
+            yield self.window(start, start + width)
+
+            start += step
+
+    def daily(self, start: int = None, end: int = None):
+        """
+        Yields the daily snapshots of the store
+        :param start: Optional start of the first snapshot
+        :param end: Optional end past which no snapshot starts
+        :return: generator of TemporalWindows
+        """
+        return self.windows(TemporalEdgeStore.Day, start=start, end=end)
+
+    def hourly(self, start: int = None, end: int = None):
+        """
+        Yields the hourly snapshots of the store
+        :param start: Optional start of the first snapshot
+        :param end: Optional end past which no snapshot starts
+        :return: generator of TemporalWindows
+        """
+        return self.windows(TemporalEdgeStore.Hour, start=start, end=end)
+
+class TemporalEdgeStoreBuilder:
+    """
+    Out-of-core temporal store builder. Mirrors the GraphStoreBuilder's distribution sort, keyed by the hour of
+    each edge instead of its source:
+        1) Count the edges of every hour over all chunks
+        2) Group consecutive hours into buckets holding at most 'memory' edges & append each chunk's edges to
+           per-bucket run files
+        3) Sort each bucket in memory by timestamp & write it sequentially into the memory-mapped output
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log = None
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, chunks: list, node_count: int = 0, block: int = 4096, memory: int = 1 << 24,
+                 temporary: str = None):
+        """
+        Initializes the TemporalEdgeStoreBuilder to its' default state.
+        :param chunks: The edge chunk paths to build the store from
+        :param node_count: The amount of nodes; grown to cover the largest id found in the chunks
+        :param block: The amount of edges per block index entry
+        :param memory: The maximum amount of edges to sort in memory at once
+        :param temporary: The directory to write the bucket runs to; defaults to the system's temporary directory
+        """
+        self.chunks     = chunks
+        self.node_count = node_count
+        self.block      = max(int(block), 1)
+        self.memory     = max(int(memory), 1)
+        self.temporary  = temporary
+
+    ## -------
+    ## Methods
+
+    def hours(self) -> tuple:
+        """
+        Counts the edges created in every hour over all chunks & grows the node count to cover every id.
+        :return: tuple containing the sorted hours & their edge counts
+        """
+
+        # Initialize the counts
+        counts = {}
+
+        # Iterate through the chunks
+        for chunk in self.chunks:
+
+            # Load the chunk
+            columns = GraphStoreBuilder.load_chunk(chunk)
+
+            # If the chunk is empty, skip it
+            if len(columns['source']) == 0: continue
+
+            # Grow the node count
+            self.node_count = max(self.node_count, int(columns['source'].max()) + 1,
+                                  int(columns['target'].max()) + 1)
+
+            # Accumulate the distinct hours
+            for hour, count in zip(*numpy.unique(columns['timestamp'] // TemporalEdgeStore.Hour, return_counts=True)):
+                counts[int(hour)] = counts.get(int(hour), 0) + int(count)
+
+        # Initialize the sorted hours
+        hours = numpy.array(sorted(counts), dtype=numpy.int64)
+
+        # Return the result
+        return hours, numpy.array([counts[hour] for hour in hours.tolist()], dtype=numpy.int64)
+
+    def build(self, path: str) -> TemporalEdgeStore:
+        """
+        Builds the store into the specified directory & returns it opened. The metadata is written last.
+        :param path: The store directory
+        :return: TemporalEdgeStore
+        """
+
+        # Create the directory & remove any previous metadata
+        os.makedirs(path, exist_ok=True)
+        if os.path.isfile(os.path.join(path, TemporalEdgeStore.MetaFile)):
+            os.remove(os.path.join(path, TemporalEdgeStore.MetaFile))
+
+        # Count the hours & assign each hour the bucket its first edge falls into
+        hours, counts   = self.hours()
+        before          = numpy.cumsum(counts) - counts
+        buckets         = before // self.memory
+        edge_count      = int(counts.sum())
+
+        # Initialize the output columns
+        columns = {name: open_memmap(os.path.join(path, f'{name}.npy'), 'w+', dtype, (edge_count,))
+                   for name, dtype in (('timestamps', numpy.uint32), ('sources', numpy.uint32),
+                                       ('targets', numpy.uint32), ('types', numpy.uint8))}
+
+        # Map the chunk columns to the store columns
+        names   = {'timestamp': 'timestamps', 'source': 'sources', 'target': 'targets', 'type': 'types'}
+        runs    = tempfile.mkdtemp(dir=self.temporary)
+
+        try:
+
+            # Iterate through the chunks
+            for chunk in self.chunks:
+
+                # Load the chunk & order the edges by bucket
+                chunk   = GraphStoreBuilder.load_chunk(chunk)
+                bucket  = buckets[numpy.searchsorted(hours, chunk['timestamp'] // TemporalEdgeStore.Hour)]
+                order   = numpy.argsort(bucket, kind='stable')
+                bucket  = bucket[order]
+
+                # Retrieve the distinct buckets & their boundaries
+                present, starts = numpy.unique(bucket, return_index=True)
+                ends            = numpy.append(starts[1:], len(bucket))
+
+                # Append each bucket's slice of each column to its run
+                for name, _ in GraphStoreBuilder.Columns:
+
+                    column = chunk[name][order]
+
+                    for index, start, end in zip(present, starts, ends):
+
+                        with open(os.path.join(runs, f'{index}.{name}'), 'ab') as output_file:
+                            column[start:end].tofile(output_file)
+
+            # Initialize the write position
+            position = 0
+
+            # Iterate through the buckets in order
+            for index in numpy.unique(buckets):
+
+                # Read the run & order it by timestamp
+                run     = {name: numpy.fromfile(os.path.join(runs, f'{index}.{name}'), dtype=dtype)
+                           for name, dtype in GraphStoreBuilder.Columns}
+                order   = numpy.argsort(run['timestamp'], kind='stable')
+
+                # Write the run
+                for name, column in names.items():
+                    columns[column][position:position + len(order)] = run[name][order]
+
+                # Advance the position
+                position += len(order)
+
+        finally:
+
+            # Remove the runs
+            shutil.rmtree(runs, ignore_errors=True)
+
+        # Write the block index
+        numpy.save(os.path.join(path, 'blocks.npy'), numpy.array(columns['timestamps'][::self.block]))
+
+        # Flush & release the columns
+        for column in columns.values(): column.flush()
+        del columns
+
+        # Write the metadata
+        with open(os.path.join(path, TemporalEdgeStore.MetaFile), 'w') as output_file:
+
+            output_file.write(json.dumps({
+                'node_count':   self.node_count,
+                'edge_count':   edge_count,
+                'block':        self.block,
+                'chunks':       [os.path.basename(chunk) for chunk in self.chunks]
+            }, indent=4))
+
+        # Report
+        if TemporalEdgeStoreBuilder.Log is not None:
+            TemporalEdgeStoreBuilder.Log.Info(f'Temporal store written to {path}: {edge_count} edges')
+
+        # Return the opened store
+        return TemporalEdgeStore(path)
+
+## ------
+## Script
+
+if __name__ == "__main__":
+
+    from arguments import Arguments
+    from log import Log
+
+    # Initialize the log
+    TemporalEdgeStore.Log = TemporalEdgeStoreBuilder.Log = Arguments.Log = log = Log()
+
+    # Consume the arguments
+    arguments = Arguments(sys.argv, ['graph', 'store'])
+
+    # Build the store
+    store = TemporalEdgeStoreBuilder(GraphStoreBuilder.chunks_of(arguments['graph']),
+                                     GraphStoreBuilder.node_count_of(arguments['graph'])).build(arguments['store'])
+
+    # Report the daily snapshots
+    for snapshot in store.daily():
+
+        log.Info(f'{snapshot.start} - {snapshot.end}: {snapshot.edge_count()} edges')
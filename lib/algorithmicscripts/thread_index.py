@@ -0,0 +1,473 @@
+"""
+Reply-thread index. Reconstructs the conversation trees of the ingested partitions from each post's id & parent &
+lays every tree out in preorder, so that any thread (or any subtree of a thread) is one contiguous slice & subtree
+sentiment aggregates are a difference of prefix sums.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import sys
+import os
+import json
+
+from import_modules import import_modules
+
+# Import the required modules
+import_modules(sys.modules[__name__], 0,
+               numpy={'package_name': 'numpy'})
+
+## -------
+## Classes
+
+class ThreadIndex:
+    """
+    Read-only thread index opened from an index directory. Posts are identified by their dense index, i.e. the
+    line of their id in ids.txt; every column is memory-mapped:
+        parent          | int64, posts          | Index of the post's parent or -1 for roots
+        root            | int64, posts          | Index of the post's thread root
+        depth           | int32, posts          | Depth of the post within its thread
+        size            | int64, posts          | Amount of posts in the post's subtree, including itself
+        position        | int64, posts          | Position of the post within the preorder layout
+        order           | int64, posts          | Index of the post at each preorder position
+        child_offsets   | int64, posts + 1      | Offsets into children
+        children        | int64, replies        | Children of each post, grouped by parent
+        scores          | float32, posts x labels | Category scores of each post, in preorder
+        score_prefix    | float64, (posts + 1) x labels | Prefix sums of the scores in preorder
+    The subtree of post i occupies the preorder positions [position[i], position[i] + size[i]).
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log         = None
+    MetaFile    = 'meta.json'
+    Columns     = ['parent', 'root', 'depth', 'size', 'position', 'order', 'child_offsets', 'children', 'scores',
+                   'score_prefix']
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, path: str):
+        """
+        Opens the index contained in the specified directory.
+        :param path: The index directory
+        """
+
+        # Read the metadata
+        with open(os.path.join(path, ThreadIndex.MetaFile), 'r') as input_file:
+
+            self.meta = json.loads(input_file.read())
+
+        # Initialize the members
+        self.path           = path
+        self.labels         = self.meta['labels']
+        self.identifiers    = None
+        self.indices        = None
+
+        # Map each column
+        for column in ThreadIndex.Columns:
+            setattr(self, column, numpy.load(os.path.join(path, f'{column}.npy'), mmap_mode='r'))
+
+    ## -------
+    ## Methods
+
+    def ids(self) -> list:
+        """
+        Returns the id of every post; read on first use
+        :return: list of post ids ordered by index
+        """
+
+        # If we haven't read the ids
+        if self.identifiers is None:
+
+            with open(os.path.join(self.path, 'ids.txt'), 'r') as input_file:
+
+                self.identifiers = input_file.read().split('\n')[:-1]
+
+        # Return the result
+        return self.identifiers
+
+    def index_of(self, post_id: str) -> int:
+        """
+        Returns the index of the specified post id; the lookup is built on first use
+        :param post_id: The id of the post
+        :return: The index of the post
+        """
+
+        # If we haven't built the lookup, build it
+        if self.indices is None: self.indices = {identifier: index for index, identifier in enumerate(self.ids())}
+
+        # Return the result
+        return self.indices[post_id]
+
+    def subtree(self, index: int):
+        """
+        Returns the indices of the posts in the specified post's subtree in preorder, as one zero-copy slice
+        :param index: The index of the post
+        :return: numpy array of post indices
+        """
+        return self.order[self.position[index]:self.position[index] + self.size[index]]
+
+    def thread(self, index: int):
+        """
+        Returns the indices of every post in the specified post's thread in preorder, as one zero-copy slice
+        :param index: The index of any post in the thread
+        :return: numpy array of post indices
+        """
+        return self.subtree(self.root[index])
+
+    def subtree_scores(self, indices=None):
+        """
+        Returns the summed category scores of the specified posts' subtrees; every subtree costs two lookups.
+        :param indices: Optional indices of the posts; defaults to every post
+        :return: numpy array of shape (len(indices), len(labels))
+        """
+
+        # Initialize the indices
+        indices = numpy.arange(len(self.parent)) if indices is None else numpy.asarray(indices)
+
+        # Retrieve the bounds
+        start = self.position[indices]
+        end   = start + self.size[indices]
+
+        # Return the difference of the prefix sums
+        return self.score_prefix[end] - self.score_prefix[start]
+
+    def subtree_means(self, indices=None):
+        """
+        Returns the mean category scores of the specified posts' subtrees
+        :param indices: Optional indices of the posts; defaults to every post
+        :return: numpy array of shape (len(indices), len(labels))
+        """
+
+        # Initialize the indices
+        indices = numpy.arange(len(self.parent)) if indices is None else numpy.asarray(indices)
+
+        # Return the result
+        return self.subtree_scores(indices) / self.size[indices][:, None]
+
+class ThreadIndexBuilder:
+    """
+    Builds a ThreadIndex from ingested partitions. Records are streamed once to intern the post ids & collect the
+    parents & scores; the rest of the construction operates level by level on whole arrays:
+        1) Group the children by parent into CSR arrays
+        2) Walk the trees breadth-first from the roots, one vectorized gather per level, to assign depths & roots
+        3) Accumulate the subtree sizes from the deepest level up
+        4) Assign the preorder positions from the roots down: a child starts after its parent & its earlier
+           siblings' subtrees
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log = None
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def children_of(nodes, offsets, children):
+        """
+        Returns the children of the specified nodes, grouped by node in the order of the nodes
+        :param nodes: numpy array of node indices
+        :param offsets: The child offsets
+        :param children: The children grouped by parent
+        :return: numpy array of child indices
+        """
+
+        # Retrieve the amount of children of each node
+        starts = offsets[nodes]
+        counts = offsets[nodes + 1] - starts
+
+        # Compute each child's position within its group
+        total   = int(counts.sum())
+        within  = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+
+        # Return the children
+        return children[numpy.repeat(starts, counts) + within]
+
+    @staticmethod
+    def group(parent) -> tuple:
+        """
+        Groups the posts by parent into CSR arrays
+        :param parent: numpy array of parent indices, -1 for roots
+        :return: tuple containing the child offsets & the children
+        """
+
+        # Retrieve the replies
+        replies = numpy.flatnonzero(parent >= 0)
+
+        # Return the offsets & the replies ordered by parent
+        return numpy.concatenate(([0], numpy.cumsum(numpy.bincount(parent[replies], minlength=len(parent))))), \
+            replies[numpy.argsort(parent[replies], kind='stable')]
+
+    @staticmethod
+    def traverse(parent, child_offsets, children) -> tuple:
+        """
+        Walks the trees breadth-first from the roots, one level at a time.
+        :param parent: numpy array of parent indices, -1 for roots
+        :param child_offsets: The child offsets
+        :param children: The children grouped by parent
+        :return: tuple containing the depths (-1 if unreachable), the roots & the list of levels
+        """
+
+        # Initialize the result
+        depth   = numpy.full(len(parent), -1, dtype=numpy.int32)
+        root    = numpy.full(len(parent), -1, dtype=numpy.int64)
+        levels  = []
+
+        # Initialize the frontier
+        frontier = numpy.flatnonzero(parent < 0)
+
+        # While we have a level
+        while len(frontier) > 0:
+
+            # Set the depth & root of the level
+            depth[frontier] = len(levels)
+            root[frontier]  = frontier if len(levels) == 0 else root[parent[frontier]]
+            levels.append(frontier)
+
+            # Advance to the children
+            frontier = ThreadIndexBuilder.children_of(frontier, child_offsets, children)
+
+        # Return the result
+        return depth, root, levels
+
+    @staticmethod
+    def cycles_of(parent, unreachable):
+        """
+        Returns the posts caught in parent cycles among the specified unreachable posts. Posts that only descend
+        from a cycle are peeled off leaf first until only the cycles remain.
+        :param parent: numpy array of parent indices, -1 for roots
+        :param unreachable: numpy array of the indices of the posts no root reaches
+        :return: numpy array of the indices of the cycles' posts
+        """
+
+        # Initialize the remaining posts & the amount of remaining children of each post
+        remaining               = numpy.zeros(len(parent), dtype=bool)
+        remaining[unreachable]  = True
+        children                = numpy.bincount(parent[unreachable], minlength=len(parent))
+
+        # Initialize the leaves
+        leaves = unreachable[children[unreachable] == 0]
+
+        # While we have leaves, peel them off
+        while len(leaves) > 0:
+
+            # Remove the leaves from their parents
+            remaining[leaves] = False
+            numpy.subtract.at(children, parent[leaves], 1)
+
+            # Advance to the parents that became leaves
+            parents = numpy.unique(parent[leaves])
+            leaves  = parents[(children[parents] == 0) & remaining[parents]]
+
+        # Return the result
+        return numpy.flatnonzero(remaining)
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, labels: list = None, dataset: str = None):
+        """
+        Initializes the ThreadIndexBuilder to its' default state.
+        :param labels: The category labels to aggregate
+        :param dataset: Optional dataset to restrict the records to
+        """
+
+        # Initialize the members
+        self.labels         = labels if labels is not None else ['POSITIVE', 'NEGATIVE']
+        self.dataset        = dataset
+        self.identifiers    = {}
+        self.parents        = []
+        self.scores         = []
+
+    ## -------
+    ## Methods
+
+    def intern(self, post_id: str) -> int:
+        """
+        Returns the index of the specified post id, assigning the next index if it was not encountered before
+        :param post_id: The id of the post
+        :return: The index of the post
+        """
+
+        # Attempt to retrieve the index
+        index = self.identifiers.get(post_id)
+
+        # If we haven't seen it
+        if index is None:
+
+            # Assign the next index
+            index = self.identifiers[post_id] = len(self.parents)
+
+            # Initialize the parent & scores
+            self.parents.append(-1)
+            self.scores.append(None)
+
+        # Return the result
+        return index
+
+    def add(self, entry: dict) -> None:
+        """
+        Adds the specified record.
+        :param entry: The ingested record
+        """
+
+        # If the record has no id or belongs to another dataset, skip it
+        if entry.get('id') in (None, ''): return
+        if self.dataset is not None and entry.get('dataset') != self.dataset: return
+
+        # Intern the post
+        index = self.intern(str(entry['id']))
+
+        # Set the parent; a parent without a record of its own is interned as a post without scores
+        self.parents[index] = self.intern(str(entry['parent'])) if entry.get('parent') not in (None, '') else -1
+        self.scores[index]  = [float(entry.get(label, 0.0)) for label in self.labels]
+
+    def read(self, path: str) -> None:
+        """
+        Adds every record contained in the specified partition, or every partition in the specified directory.
+        :param path: The path of an ingested partition or a directory of partitions
+        """
+
+        # Initialize the partitions
+        partitions = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.json')] \
+            if os.path.isdir(path) else [path]
+
+        # Iterate through the partitions
+        for partition in partitions:
+
+            # Report
+            if ThreadIndexBuilder.Log is not None: ThreadIndexBuilder.Log.Info(f'Reading {partition}')
+
+            with open(partition, 'r') as input_file:
+
+                # Add each non-empty line
+                for line in input_file:
+                    if line.strip() != '': self.add(json.loads(line))
+
+    def build(self, path: str) -> ThreadIndex:
+        """
+        Builds the index into the specified directory & returns it opened. The metadata is written last.
+        :param path: The index directory
+        :return: ThreadIndex
+        """
+
+        # Create the directory & remove any previous metadata
+        os.makedirs(path, exist_ok=True)
+        if os.path.isfile(os.path.join(path, ThreadIndex.MetaFile)): os.remove(os.path.join(path, ThreadIndex.MetaFile))
+
+        # Initialize the parents
+        parent = numpy.array(self.parents, dtype=numpy.int64)
+        count  = len(parent)
+
+        # Initialize the scores of posts without records
+        scores = numpy.array([score if score is not None else [0.0] * len(self.labels) for score in self.scores],
+                             dtype=numpy.float32).reshape(count, len(self.labels))
+
+        # Group the children by parent & walk down from the roots
+        child_offsets, children = ThreadIndexBuilder.group(parent)
+        depth, root, levels     = ThreadIndexBuilder.traverse(parent, child_offsets, children)
+
+        # If any posts are unreachable, they're caught in or descend from a parent cycle; detach the cycles'
+        # posts, keeping their subtrees attached, & walk again
+        if (depth < 0).any():
+
+            # Retrieve the cycles' posts
+            cycles = ThreadIndexBuilder.cycles_of(parent, numpy.flatnonzero(depth < 0))
+
+            # Report
+            if ThreadIndexBuilder.Log is not None:
+                ThreadIndexBuilder.Log.Warn(f'Detaching {len(cycles)} posts caught in parent cycles')
+
+            # Detach them
+            parent[cycles] = -1
+
+            # Walk again
+            child_offsets, children = ThreadIndexBuilder.group(parent)
+            depth, root, levels     = ThreadIndexBuilder.traverse(parent, child_offsets, children)
+
+        # Accumulate the subtree sizes from the deepest level up
+        size = numpy.ones(count, dtype=numpy.int64)
+        for nodes in reversed(levels[1:]): numpy.add.at(size, parent[nodes], size[nodes])
+
+        # Assign the roots' positions; without posts there are no levels & every column is written empty
+        position = numpy.zeros(count, dtype=numpy.int64)
+        if count > 0: position[levels[0]] = numpy.cumsum(size[levels[0]]) - size[levels[0]]
+
+        # Assign each following level's positions
+        for nodes in levels[1:]:
+
+            # Group the level's nodes by parent
+            nodes = nodes[numpy.argsort(parent[nodes], kind='stable')]
+
+            # Compute the exclusive sum of the earlier siblings' sizes
+            before  = numpy.cumsum(size[nodes]) - size[nodes]
+            firsts  = numpy.flatnonzero(numpy.concatenate(([True], parent[nodes][1:] != parent[nodes][:-1])))
+            group   = numpy.repeat(firsts, numpy.diff(numpy.append(firsts, len(nodes))))
+
+            # A child starts after its parent & its earlier siblings' subtrees
+            position[nodes] = position[parent[nodes]] + 1 + before - before[group]
+
+        # Compute the preorder & the prefix sums of the scores in preorder
+        order           = numpy.argsort(position, kind='stable')
+        ordered         = scores[order]
+        score_prefix    = numpy.vstack((numpy.zeros((1, len(self.labels))), numpy.cumsum(ordered, axis=0, dtype=numpy.float64)))
+
+        # Write the columns
+        for name, column in (('parent', parent), ('root', root), ('depth', depth), ('size', size),
+                             ('position', position), ('order', order), ('child_offsets', child_offsets),
+                             ('children', children), ('scores', ordered), ('score_prefix', score_prefix)):
+            numpy.save(os.path.join(path, f'{name}.npy'), column)
+
+        # Write the ids
+        with open(os.path.join(path, 'ids.txt'), 'w') as output_file:
+            output_file.writelines(f'{identifier}\n' for identifier in self.identifiers)
+
+        # Write the metadata
+        with open(os.path.join(path, ThreadIndex.MetaFile), 'w') as output_file:
+
+            output_file.write(json.dumps({
+                'posts':    count,
+                'threads':  int(len(levels[0])) if len(levels) > 0 else 0,
+                'depth':    len(levels),
+                'labels':   self.labels
+            }, indent=4))
+
+        # Report
+        if ThreadIndexBuilder.Log is not None:
+            ThreadIndexBuilder.Log.Info(f'Thread index written to {path}: {count} posts, {len(levels)} levels')
+
+        # Return the opened index
+        return ThreadIndex(path)
+
+## ------
+## Script
+
+if __name__ == "__main__":
+
+    from arguments import Arguments
+    from log import Log
+
+    # Initialize the log
+    ThreadIndex.Log = ThreadIndexBuilder.Log = Arguments.Log = log = Log()
+
+    # Consume the arguments
+    arguments = Arguments(sys.argv, ['partitions', 'index'])
+
+    # Retrieve the labels; a single label is parsed as a string
+    labels = arguments['labels'] if 'labels' in arguments.dictionary else None
+    labels = [labels] if isinstance(labels, str) else labels
+
+    # Initialize the builder
+    builder = ThreadIndexBuilder(labels,
+                                 arguments['dataset'] if 'dataset' in arguments.dictionary else None)
+
+    # Read the partitions & build the index
+    builder.read(arguments['partitions'])
+    builder.build(arguments['index'])
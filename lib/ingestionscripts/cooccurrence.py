@@ -0,0 +1,337 @@
+"""
+Hashtag co-occurrence. Turns each post's hashtag set into pairwise co-occurrence counts that are accumulated in
+batched COO buffers & merged into a scipy sparse matrix per date partition.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import sys
+import os
+import re
+import threading
+
+from array import array
+from itertools import combinations
+from collections import OrderedDict
+from import_modules import import_modules
+from graph_extraction import InteractionGraphExtractor
+
+# Import the required modules
+import_modules(sys.modules[__name__], 0,
+               numpy={'package_name': 'numpy'},
+               scipy={'package_name': 'scipy',
+                      'sparse': {
+                          'coo_matrix': {},
+                          'csr_matrix': {}
+                      }})
+
+## -------
+## Classes
+
+class CooccurrenceMatrix:
+    """
+    Upper-triangular hashtag co-occurrence matrix & the vocabulary of its ids. Entry (i, j), i < j, is the amount
+    of posts containing both hashtags; entry (i, i) is the amount of posts containing hashtag i. Matrices with
+    different vocabularies are summed by remapping the ids onto the union vocabulary.
+    @author Carlos L. Cuenca
+    """
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def load(path: str):
+        """
+        Loads the matrix persisted at the specified path
+        :param path: The path of the .npz file
+        :return: CooccurrenceMatrix
+        """
+        with numpy.load(path) as arrays:
+            return CooccurrenceMatrix(arrays['vocabulary'].tolist(),
+                                      csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                                 shape=tuple(arrays['shape'])))
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, vocabulary: list = None, matrix=None):
+        """
+        Initializes the CooccurrenceMatrix with the specified vocabulary & matrix.
+        :param vocabulary: The hashtag of each id
+        :param matrix: The co-occurrence counts over the vocabulary's ids
+        """
+        self.vocabulary = vocabulary if vocabulary is not None else []
+        self.matrix     = matrix if matrix is not None else \
+            csr_matrix((len(self.vocabulary), len(self.vocabulary)), dtype=numpy.int64)
+
+    ## -------
+    ## Methods
+
+    def merge(self, other) -> None:
+        """
+        Sums the specified matrix into this matrix.
+        :param other: The CooccurrenceMatrix to merge
+        """
+
+        # Map the other vocabulary onto this vocabulary, extending it with any new hashtags
+        identifiers = {tag: identifier for identifier, tag in enumerate(self.vocabulary)}
+        mapping     = numpy.empty(len(other.vocabulary), dtype=numpy.int64)
+
+        # Iterate through the other vocabulary
+        for identifier, tag in enumerate(other.vocabulary):
+
+            # If the tag is new, append it
+            if tag not in identifiers:
+
+                identifiers[tag] = len(self.vocabulary)
+                self.vocabulary.append(tag)
+
+            # Map it
+            mapping[identifier] = identifiers[tag]
+
+        # Remap the other matrix's entries
+        entries = other.matrix.tocoo()
+        rows    = mapping[entries.row]
+        columns = mapping[entries.col]
+
+        # Keep the remapped entries upper-triangular
+        rows, columns = numpy.minimum(rows, columns), numpy.maximum(rows, columns)
+
+        # Grow this matrix & sum
+        shape       = (len(self.vocabulary), len(self.vocabulary))
+        self.matrix = self.matrix.copy()
+        self.matrix.resize(shape)
+        self.matrix = (self.matrix + coo_matrix((entries.data.astype(numpy.int64), (rows, columns)), shape=shape)).tocsr()
+
+    def save(self, path: str) -> None:
+        """
+        Saves the matrix to the specified path, summing it with the matrix already persisted there. The file is
+        replaced atomically.
+        :param path: The path of the .npz file
+        """
+
+        # Initialize the result
+        result = self
+
+        # If a matrix was already persisted, sum into it
+        if os.path.isfile(path):
+
+            result = CooccurrenceMatrix.load(path)
+            result.merge(self)
+
+        # Retrieve the matrix
+        matrix = result.matrix.tocsr()
+
+        # Write to a temporary file & replace
+        with open(f'{path}.tmp', 'wb') as output_file:
+
+            numpy.savez(output_file, data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+                        shape=numpy.array(matrix.shape), vocabulary=numpy.array(result.vocabulary, dtype=str))
+
+        os.replace(f'{path}.tmp', path)
+
+    def top(self, amount: int = 10) -> list:
+        """
+        Returns the most frequent hashtag pairs
+        :param amount: The amount of pairs to return
+        :return: list of (hashtag, hashtag, count) tuples ordered by count
+        """
+
+        # Retrieve the off-diagonal entries
+        entries = self.matrix.tocoo()
+        mask    = entries.row != entries.col
+
+        # Order them by count
+        rows, columns, data = entries.row[mask], entries.col[mask], entries.data[mask]
+        order               = numpy.argsort(-data, kind='stable')[:amount]
+
+        # Return the result
+        return [(self.vocabulary[rows[index]], self.vocabulary[columns[index]], int(data[index])) for index in order]
+
+class CooccurrenceStage:
+    """
+    Ingestion stage that accumulates the hashtag co-occurrence counts of each date partition. Hashtags are interned
+    into ids shared by every partition & each post's pairs are appended to the partition's array('I') COO buffers,
+    which are merged into the partition's sparse matrix once they reach the batch size. The buffers of every
+    partition hold at most 'buffer_limit' pairs together; the largest buffer is merged when they exceed it. At most
+    'resident' partitions are kept in memory; the least recently used partition is summed into its file when
+    another partition is needed.
+    The stage is shared by the ingestion threads & serializes access with a lock.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log = None
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, root: str, dataset: str, batch_size: int = 1 << 20, resident: int = 8,
+                 buffer_limit: int = 1 << 22):
+        """
+        Initializes the CooccurrenceStage to persist the specified dataset's matrices into the given root.
+        :param root: The directory containing the partitions
+        :param dataset: The name of the dataset
+        :param batch_size: The amount of buffered pairs that triggers a merge into the partition's matrix
+        :param resident: The maximum amount of partitions kept in memory
+        :param buffer_limit: The maximum amount of pairs buffered across every partition
+        """
+        self.root           = root
+        self.dataset        = re.sub(r'(\.[a-zA-Z0-9]+)+', '', dataset)
+        self.batch_size     = batch_size
+        self.resident       = resident
+        self.buffer_limit   = buffer_limit
+        self.buffered       = 0
+        self.lock           = threading.Lock()
+        self.identifiers    = {}
+        self.vocabulary     = []
+        self.partitions     = OrderedDict()
+        self.buffers        = {}
+
+    ## -------
+    ## Methods
+
+    def path_of(self, partition: str) -> str:
+        """
+        Returns the path of the specified partition's matrix
+        :param partition: The name of the date partition
+        :return: The path of the .npz file
+        """
+        return os.path.join(self.root, f'{partition}-{self.dataset}-cooccurrence.npz')
+
+    def intern(self, hashtag: str) -> int:
+        """
+        Returns the id of the specified hashtag, assigning the next id if it was not encountered before. The caller
+        must hold the lock.
+        :param hashtag: The hashtag to intern
+        :return: The id corresponding to the hashtag
+        """
+
+        # Attempt to retrieve the identifier
+        identifier = self.identifiers.get(hashtag)
+
+        # If we haven't seen it, assign the next identifier
+        if identifier is None:
+
+            identifier = self.identifiers[hashtag] = len(self.vocabulary)
+            self.vocabulary.append(hashtag)
+
+        # Return the result
+        return identifier
+
+    def update(self, partition: str, entry: dict) -> None:
+        """
+        Appends the co-occurrences of the specified record's hashtags to the given partition's buffers.
+        :param partition: The name of the date partition
+        :param entry: The (retained) record
+        """
+
+        # Retrieve the distinct hashtags
+        hashtags = set(InteractionGraphExtractor.hashtags_from(entry.get('hashtags')))
+
+        # If there are none, leave
+        if len(hashtags) == 0: return
+
+        with self.lock:
+
+            # Intern & order the hashtags
+            identifiers = sorted(self.intern(hashtag) for hashtag in hashtags)
+
+            # Retrieve the buffers
+            rows, columns = self.buffers.setdefault(partition, (array('I'), array('I')))
+
+            # Append the occurrences & the pairs
+            count = len(rows)
+
+            rows.extend(identifiers)
+            columns.extend(identifiers)
+
+            for row, column in combinations(identifiers, 2):
+
+                rows.append(row)
+                columns.append(column)
+
+            # Update the amount of buffered pairs
+            self.buffered += len(rows) - count
+
+            # Merge the buffers if they're full
+            if len(rows) >= self.batch_size: self.apply(partition)
+
+            # Otherwise, if every buffer together is full, merge the largest
+            elif self.buffered >= self.buffer_limit:
+
+                self.apply(max(self.buffers, key=lambda buffered: len(self.buffers[buffered][0])))
+
+    def apply(self, partition: str) -> None:
+        """
+        Merges the specified partition's buffers into its matrix, evicting the least recently used partition if
+        necessary. The caller must hold the lock.
+        :param partition: The name of the date partition
+        """
+
+        # Retrieve & clear the buffers
+        rows, columns = self.buffers.pop(partition, (array('I'), array('I')))
+        self.buffered -= len(rows)
+
+        # If the partition is not resident
+        if partition not in self.partitions:
+
+            # Evict the least recently used partition
+            if len(self.partitions) >= self.resident: self.evict(next(iter(self.partitions)))
+
+            # Initialize the partition
+            self.partitions[partition] = csr_matrix((0, 0), dtype=numpy.int64)
+
+        # Mark the partition as recently used
+        self.partitions.move_to_end(partition)
+
+        # Initialize the shape & the batch
+        shape   = (len(self.vocabulary), len(self.vocabulary))
+        batch   = coo_matrix((numpy.ones(len(rows), dtype=numpy.int64),
+                              (numpy.frombuffer(rows, dtype=numpy.uint32), numpy.frombuffer(columns, dtype=numpy.uint32))),
+                             shape=shape)
+
+        # Grow the partition's matrix & sum the batch; duplicates are summed by the conversion
+        matrix = self.partitions[partition]
+        matrix.resize(shape)
+        self.partitions[partition] = (matrix + batch).tocsr()
+
+    def evict(self, partition: str) -> None:
+        """
+        Sums the specified resident partition into its file & releases it. The caller must hold the lock.
+        :param partition: The name of the date partition
+        """
+
+        # Retrieve the matrix
+        matrix = self.partitions.pop(partition)
+
+        # Save it along with the vocabulary it spans
+        CooccurrenceMatrix(self.vocabulary[:matrix.shape[0]], matrix).save(self.path_of(partition))
+
+        # Report
+        if CooccurrenceStage.Log is not None: CooccurrenceStage.Log.Info(f'Persisted co-occurrences: {partition}')
+
+    def flush(self) -> None:
+        """
+        Merges every buffer & persists every resident partition.
+        """
+
+        with self.lock:
+
+            # Merge the buffers
+            for partition in list(self.buffers): self.apply(partition)
+
+            # Persist the partitions
+            for partition in list(self.partitions): self.evict(partition)
+
+    def load(self, partition: str) -> CooccurrenceMatrix:
+        """
+        Returns the persisted matrix of the specified partition
+        :param partition: The name of the date partition
+        :return: CooccurrenceMatrix
+        """
+        return CooccurrenceMatrix.load(self.path_of(partition))
@@ -0,0 +1,320 @@
+"""
+Interaction graph extraction. Interns the users, posts & hashtags of ingested records into dense integer ids &
+accumulates the typed edges between them into growable, compact buffers that are persisted as chunked edge lists.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import sys
+import os
+import re
+import threading
+
+from array import array
+from import_modules import import_modules
+
+# Import the required modules
+import_modules(sys.modules[__name__], 0,
+               numpy={'package_name': 'numpy'})
+
+## -------
+## Classes
+
+class NodeKind:
+    """
+    Enumerates the kinds of nodes an InteractionGraphExtractor interns.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    USER    = 0
+    POST    = 1
+    HASHTAG = 2
+
+class EdgeType:
+    """
+    Enumerates the kinds of edges an InteractionGraphExtractor produces.
+        REPLY   | User  -> Post the user replied to
+        HASHTAG | User  -> Hashtag the user posted
+        AUTHOR  | Post  -> User that created the post
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    REPLY   = 0
+    HASHTAG = 1
+    AUTHOR  = 2
+
+class InteractionGraphExtractor:
+    """
+    Streaming interaction graph extractor. Each record is reduced to a handful of typed edges whose endpoints are
+    interned into a single, dense integer id space. Edges are appended to array('I') buffers & written out as a
+    numbered .npz chunk whenever the buffers reach the chunk size, so the memory held by the extractor is bounded by
+    the chunk size & the interned strings. Newly interned nodes are appended to the dataset's nodes.tsv on every flush;
+    the line number of a node corresponds to its id.
+    The extractor is shared by the ingestion threads & serializes access with a lock.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log         = None
+    NodesFile   = 'nodes.tsv'
+    ChunkPrefix = 'edges-'
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def hashtags_from(value) -> list:
+        """
+        Returns the list of normalized hashtags contained in the specified value. Hashtags may be given either as a
+        list or as a single string separated by whitespace or commas.
+        :param value: The hashtags value of a record
+        :return: list of lowercase hashtags without the leading '#'
+        """
+
+        # If we have a string, split it
+        if isinstance(value, str): value = re.split(r'[\s,]+', value)
+
+        # If we don't have a list, there are no hashtags
+        if not isinstance(value, list): return []
+
+        # Return the normalized, non-empty hashtags
+        return [tag for tag in (str(tag).strip().lstrip('#').lower() for tag in value) if tag != '']
+
+    @staticmethod
+    def chunk_path(path: str, index: int) -> str:
+        """
+        Returns the path of the edge chunk with the specified index
+        :param path: The dataset's graph directory
+        :param index: The index of the chunk
+        :return: The path corresponding to the chunk
+        """
+        return os.path.join(path, f'{InteractionGraphExtractor.ChunkPrefix}{index:06d}.npz')
+
+    @staticmethod
+    def chunks_in(path: str) -> list:
+        """
+        Returns the sorted list of edge chunk paths contained in the specified graph directory.
+        :param path: The dataset's graph directory
+        :return: list of chunk paths ordered by chunk index
+        """
+
+        # If the directory does not exist, there are no chunks
+        if not os.path.isdir(path): return []
+
+        # Return the ordered chunk paths
+        return [os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.startswith(InteractionGraphExtractor.ChunkPrefix) and name.endswith('.npz')]
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, root: str, dataset: str, chunk_size: int = 1 << 20):
+        """
+        Initializes the InteractionGraphExtractor to write the specified dataset's edge chunks into the given root.
+        If the dataset's graph directory already contains nodes & chunks, the extractor resumes from them so that
+        the ids remain consistent across runs.
+        :param root: The directory containing each dataset's graph directory
+        :param dataset: The name of the dataset
+        :param chunk_size: The amount of edges to buffer before writing a chunk
+        """
+
+        # Initialize the members
+        self.path           = os.path.join(root, re.sub(r'(\.[a-zA-Z0-9]+)+', '', dataset))
+        self.chunk_size     = chunk_size
+        self.lock           = threading.Lock()
+        self.identifiers    = {NodeKind.USER: {}, NodeKind.POST: {}, NodeKind.HASHTAG: {}}
+        self.kinds          = array('B')
+        self.pending        = []
+        self.chunk_count    = 0
+        self.edge_count     = 0
+        self.sources        = array('I')
+        self.targets        = array('I')
+        self.types          = array('B')
+        self.timestamps     = array('I')
+
+        # Create the directory if it does not exist
+        os.makedirs(self.path, exist_ok=True)
+
+        # Resume from any existing nodes & chunks
+        self.resume()
+
+    ## -------
+    ## Methods
+
+    def resume(self) -> None:
+        """
+        Re-interns the nodes contained in the dataset's nodes file & advances the chunk count past the existing
+        chunks.
+        """
+
+        # Initialize the nodes path
+        nodes_path = os.path.join(self.path, InteractionGraphExtractor.NodesFile)
+
+        # If we have a nodes file
+        if os.path.isfile(nodes_path):
+
+            # Open it
+            with open(nodes_path, 'r') as input_file:
+
+                # Iterate through the lines
+                for line in input_file:
+
+                    # Retrieve the kind & value; the id is implicit
+                    _, kind, value = line.rstrip('\n').split('\t', 2)
+
+                    # Re-intern it
+                    self.identifiers[int(kind)][value] = len(self.kinds)
+                    self.kinds.append(int(kind))
+
+        # Update the chunk count
+        self.chunk_count = len(InteractionGraphExtractor.chunks_in(self.path))
+
+        # Report
+        if InteractionGraphExtractor.Log is not None:
+            InteractionGraphExtractor.Log.Info(f'Graph extractor: {len(self.kinds)} nodes, {self.chunk_count} chunks')
+
+    def intern(self, kind: int, value) -> int:
+        """
+        Returns the dense integer id of the specified value, assigning the next id if the value was not
+        encountered before.
+        :param kind: The NodeKind of the value
+        :param value: The string value to intern
+        :return: The id corresponding to the value
+        """
+
+        # Retrieve the identifiers of the kind & normalize the value
+        identifiers = self.identifiers[kind]
+        value       = re.sub(r'[\t\r\n]+', ' ', str(value))
+
+        # Attempt to retrieve the identifier
+        identifier = identifiers.get(value)
+
+        # If we haven't seen it
+        if identifier is None:
+
+            # Assign the next identifier
+            identifier = identifiers[value] = len(self.kinds)
+
+            # Mark the kind & pend it for writing
+            self.kinds.append(kind)
+            self.pending.append((identifier, kind, value))
+
+        # Return the result
+        return identifier
+
+    def append(self, source: int, target: int, edge_type: int, timestamp: int) -> None:
+        """
+        Appends the specified edge to the buffers.
+        :param source: The source node id
+        :param target: The target node id
+        :param edge_type: The EdgeType of the edge
+        :param timestamp: The time the edge was created, in seconds since the epoch
+        """
+        self.sources.append(source)
+        self.targets.append(target)
+        self.types.append(edge_type)
+        self.timestamps.append(timestamp)
+
+    def extract(self, entry: dict) -> None:
+        """
+        Extracts the typed edges from the specified record:
+            creator -> parent   (REPLY)   if the record has a parent
+            creator -> hashtag  (HASHTAG) for each of the record's hashtags
+            id      -> creator  (AUTHOR)  if the record has an id
+        Records without a creator are skipped.
+        :param entry: The (retained) record
+        """
+
+        # If the entry has no creator, there are no edges
+        if entry.get('creator') in (None, ''): return
+
+        # Retrieve the timestamp
+        timestamp = max(int(entry.get('seconds', 0)), 0)
+
+        with self.lock:
+
+            # Intern the creator
+            creator = self.intern(NodeKind.USER, entry['creator'])
+
+            # If the entry is a reply
+            if entry.get('parent') not in (None, ''):
+
+                # Append the reply edge
+                self.append(creator, self.intern(NodeKind.POST, entry['parent']), EdgeType.REPLY, timestamp)
+
+            # Append the hashtag edges
+            for hashtag in InteractionGraphExtractor.hashtags_from(entry.get('hashtags')):
+                self.append(creator, self.intern(NodeKind.HASHTAG, hashtag), EdgeType.HASHTAG, timestamp)
+
+            # If the entry identifies the post
+            if entry.get('id') not in (None, ''):
+
+                # Append the author edge
+                self.append(self.intern(NodeKind.POST, entry['id']), creator, EdgeType.AUTHOR, timestamp)
+
+            # Flush if we reached the chunk size
+            if len(self.sources) >= self.chunk_size: self.write()
+
+    def write(self) -> None:
+        """
+        Writes the buffered edges as the next chunk & appends the pending nodes to the nodes file. The caller must
+        hold the lock.
+        """
+
+        # Append the pending nodes first so every written edge refers to a persisted node
+        if len(self.pending) > 0:
+
+            # Open the nodes file in append mode
+            with open(os.path.join(self.path, InteractionGraphExtractor.NodesFile), 'a') as output_file:
+
+                # Write the nodes
+                output_file.writelines(f'{identifier}\t{kind}\t{value}\n' for identifier, kind, value in self.pending)
+
+            # Clear the pending nodes
+            self.pending = []
+
+        # If we have edges
+        if len(self.sources) > 0:
+
+            # Write the chunk; the buffers are exported without per-element conversion
+            numpy.savez(InteractionGraphExtractor.chunk_path(self.path, self.chunk_count),
+                        source=numpy.frombuffer(self.sources, dtype=numpy.uint32),
+                        target=numpy.frombuffer(self.targets, dtype=numpy.uint32),
+                        type=numpy.frombuffer(self.types, dtype=numpy.uint8),
+                        timestamp=numpy.frombuffer(self.timestamps, dtype=numpy.uint32))
+
+            # Report
+            if InteractionGraphExtractor.Log is not None:
+                InteractionGraphExtractor.Log.Info(f'Wrote chunk {self.chunk_count}: {len(self.sources)} edges')
+
+            # Update the counts & reset the buffers
+            self.chunk_count += 1
+            self.edge_count  += len(self.sources)
+            self.sources     = array('I')
+            self.targets     = array('I')
+            self.types       = array('B')
+            self.timestamps  = array('I')
+
+    def flush(self) -> None:
+        """
+        Writes any buffered edges & pending nodes.
+        """
+        with self.lock:
+            self.write()
+
+    def node_count(self) -> int:
+        """
+        Returns the amount of interned nodes
+        :return: The amount of interned nodes
+        """
+        return len(self.kinds)
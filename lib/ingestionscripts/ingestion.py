@@ -13,8 +13,12 @@ from pathlib import Path
 from datetime import datetime
 from log import Log
 from arguments import Arguments
+from graph_extraction import InteractionGraphExtractor
+from sketches import SketchStage
+from cooccurrence import CooccurrenceStage
 
 REQUIRED_ARGUMENTS = ['datasetsbucket', 'dataset', 'modelsbucket', 'model_name', 'threads']  # , 'endpoint', 'region']
+PROCESSED_PATH     = '/media/cuenca/data/parler_/processed'
 # TODO: Make this into a parameter
 retain = ['body',
           'comments',
@@ -38,10 +42,13 @@ class OpenSearchWorker:
     ## -------------
     ## Static Fields
 
-    Log     = None
-    Count   = 0
-    Bucket  = None
-    Key     = None
+    Log             = None
+    Count           = 0
+    Bucket          = None
+    Key             = None
+    Extractor       = None
+    Sketches        = None
+    Cooccurrence    = None
 
     ## --------------
     ## Static Methods
@@ -443,8 +450,19 @@ class OpenSearchWorker:
             # Set them to the entry
             entry['seconds'] = seconds
 
+            # Extract the interaction edges
+            if OpenSearchWorker.Extractor is not None: OpenSearchWorker.Extractor.extract(entry)
+
+            # Update the partition's sketches
+            if OpenSearchWorker.Sketches is not None:
+                OpenSearchWorker.Sketches.update(f'{date[0]}_{date[1]}_{date[2]}', entry)
+
+            # Accumulate the partition's hashtag co-occurrences
+            if OpenSearchWorker.Cooccurrence is not None:
+                OpenSearchWorker.Cooccurrence.update(f'{date[0]}_{date[1]}_{date[2]}', entry)
+
             # Initialize the key
-            key = f'/media/cuenca/data/parler_/processed/{date[0]}_{date[1]}_{date[2]}.json'
+            key = f'{PROCESSED_PATH}/{date[0]}_{date[1]}_{date[2]}.json'
 
             # If the file does not exist
             if not Path(key).is_file():
@@ -603,6 +621,9 @@ def ingest_s3_files(arguments, chunks):
             # Reset the count
             OpenSearchWorker.Count = 0
 
+    # Wait for the remaining workers
+    [thread.join() for thread in pool]
+
 def ingest_local_files(arguments, chunks, path):
 
     # Download the language model
@@ -660,6 +681,9 @@ def ingest_local_files(arguments, chunks, path):
             # Reinit
             pool = []
 
+    # Wait for the remaining workers
+    [thread.join() for thread in pool]
+
 if __name__ == "__main__":
 
     # Initialize the log
@@ -672,6 +696,26 @@ if __name__ == "__main__":
     OpenSearchWorker.Bucket = args['datasetsbucket']
     OpenSearchWorker.Key    = args['dataset']
 
+    # Initialize the graph extractor
+    InteractionGraphExtractor.Log = log
+    OpenSearchWorker.Extractor    = InteractionGraphExtractor(f'{PROCESSED_PATH}/graph', args['dataset'])
+
+    # Initialize the sketches; persisted next to the partitions
+    SketchStage.Log             = log
+    OpenSearchWorker.Sketches   = SketchStage(PROCESSED_PATH, args['dataset'])
+
+    # Initialize the hashtag co-occurrences; persisted next to the partitions
+    CooccurrenceStage.Log           = log
+    OpenSearchWorker.Cooccurrence   = CooccurrenceStage(PROCESSED_PATH, args['dataset'])
+
     # Ingest
     #ingest_s3_files(args, int(args['threads']))
     ingest_local_files(args, int(args['threads']), f'/media/cuenca/data/parler_/parler_data/data{int(args["set"])}')
+
+    # Write the remaining edges, sketches & co-occurrences
+    OpenSearchWorker.Extractor.flush()
+    OpenSearchWorker.Sketches.flush()
+    OpenSearchWorker.Cooccurrence.flush()
+
+    # Report the distinct creators of the dataset
+    log.Info(f'Distinct creators: {OpenSearchWorker.Sketches.distinct_creators():.0f}')
@@ -1,48 +1,224 @@
+## -------
+## Imports
+
+import os
+import sys
+import time
+import queue
+import atexit
+import threading
+
+from datetime import datetime
+
 class Log:
     """
-    A class representing a logger that reports (structured) events.
+    A class representing a logger that reports (structured) events. Events below the configured level are dropped
+    before their message is formatted; messages accept %-style arguments & callables, which are only evaluated
+    for events that are kept. Hot-path events may be sampled to keep one in every 'sample' occurrences of the
+    same message. Kept events are queued & written in batches by a background thread.
+    The state is shared by every instance so the static & instance invocations report through the same writer.
     """
 
-    ## -------
-    ## Imports
+    ## -------------
+    ## Static Fields
 
-    from datetime import datetime
+    Levels      = {'debug': 10, 'info': 20, 'warn': 30, 'error': 40}
+    Level       = Levels.get(os.environ.get('LOG_LEVEL', 'info').lower(), 20)
+    Context     = None
+    Stream      = sys.stdout
+    BatchSize   = 1024
+    Queue       = queue.Queue()
+    Counts      = {}
+    Writer      = None
+    Lock        = threading.Lock()
 
     ## --------------
     ## Static Methods
 
     @staticmethod
-    def Warn(message: str):
+    def enabled(level: str) -> bool:
         """
-        Outputs the specified message with a warning level.
-        :param message: The message string to output
+        Returns a flag indicating if events with the specified level are reported
+        :param level: The name of the level
+        :return: boolean flag indicating if the level is enabled
+        """
+        return Log.Levels[level] >= Log.Level
+
+    @staticmethod
+    def format(message, arguments: tuple) -> str:
+        """
+        Formats the specified message with the given arguments. Callable messages & arguments are invoked first.
+        :param message: The message string, %-style template or callable returning either
+        :param arguments: The %-style arguments
+        :return: The formatted message string
         """
-        # Output the message with a timestamp
-        print(f'{Log.datetime.now().strftime("%Y-%m-%d %H:%M:%S")} | Warn | {message}')
+
+        # Evaluate the message & the arguments
+        message     = message() if callable(message) else message
+        arguments   = tuple(argument() if callable(argument) else argument for argument in arguments)
+
+        # Return the result
+        return message % arguments if len(arguments) > 0 else str(message)
+
+    @staticmethod
+    def write() -> None:
+        """
+        Background writer. Drains the queue in batches & writes each batch with a single call.
+        """
+
+        while True:
+
+            # Wait for an event & drain the rest of the batch
+            batch = [Log.Queue.get()]
+
+            while len(batch) < Log.BatchSize:
+
+                try: batch.append(Log.Queue.get_nowait())
+
+                except queue.Empty: break
+
+            try:
+
+                # Format & write the batch
+                Log.Stream.write(''.join(
+                    f'{datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")} | '
+                    f'{context + " | " if context is not None else ""}{level} | {message}\n'
+                    for timestamp, context, level, message in batch))
+                Log.Stream.flush()
+
+            # If the stream was closed, drop the batch rather than stopping the writer
+            except (OSError, ValueError): pass
+
+            # Mark the batch as written so flush never blocks
+            finally:
+
+                for _ in batch: Log.Queue.task_done()
 
     @staticmethod
-    def Info(message: str):
+    def report(level: str, label: str, message, arguments: tuple, sample: int) -> None:
+        """
+        Queues the specified event if its level is enabled & it's not sampled out.
+        :param level: The name of the level
+        :param label: The label written with the event
+        :param message: The message string, %-style template or callable returning either
+        :param arguments: The %-style arguments
+        :param sample: Keep one in every 'sample' events with the same message
+        """
+
+        # If the level is disabled, leave before formatting anything
+        if Log.Levels[level] < Log.Level: return
+
+        # If we're sampling, keep one in every 'sample' events; concurrent updates only skew the rate
+        if sample > 1:
+
+            count               = Log.Counts.get(message, 0)
+            Log.Counts[message] = count + 1
+
+            if count % sample != 0: return
+
+        # Start the writer if necessary
+        if Log.Writer is None:
+
+            with Log.Lock:
+
+                if Log.Writer is None:
+
+                    Log.Writer = threading.Thread(target=Log.write, daemon=True)
+                    Log.Writer.start()
+
+        # Queue the event
+        Log.Queue.put((time.time(), Log.Context, label, Log.format(message, arguments)))
+
+    @staticmethod
+    def flush() -> None:
+        """
+        Blocks until every queued event has been written.
+        """
+        if Log.Writer is not None: Log.Queue.join()
+
+    @staticmethod
+    def reset() -> None:
+        """
+        Resets the writer in a forked child. Only the forking thread survives a fork, so the parent's writer is dead
+        in the child & its queue & lock may be held; the child starts its own writer on its first event. Since
+        multiprocessing's workers exit without running atexit, their events are written by its finalizers instead.
+        """
+
+        # Drop the parent's writer, queue & lock
+        Log.Queue   = queue.Queue()
+        Log.Writer  = None
+        Log.Lock    = threading.Lock()
+
+        # If the child may be a multiprocessing worker, write its events before it exits
+        if 'multiprocessing.util' in sys.modules:
+
+            sys.modules['multiprocessing.util'].Finalize(None, Log.flush, exitpriority=0)
+
+    @staticmethod
+    def Debug(message, *arguments, sample: int = 1):
+        """
+        Outputs the specified message with a debug level.
+        :param message: The message string, %-style template or callable to output
+        :param arguments: The %-style arguments
+        :param sample: Keep one in every 'sample' events with the same message
+        """
+        Log.report('debug', 'Debug', message, arguments, sample)
+
+    @staticmethod
+    def Info(message, *arguments, sample: int = 1):
         """
         Outputs the specified message with an info level.
-        :param message: The message string to output
+        :param message: The message string, %-style template or callable to output
+        :param arguments: The %-style arguments
+        :param sample: Keep one in every 'sample' events with the same message
         """
-        # Output the message with a timestamp
-        print(f'{Log.datetime.now().strftime("%Y-%m-%d %H:%M:%S")} | Info | {message}')
+        Log.report('info', 'Info', message, arguments, sample)
 
     @staticmethod
-    def Error(message: str):
+    def Warn(message, *arguments, sample: int = 1):
+        """
+        Outputs the specified message with a warning level.
+        :param message: The message string, %-style template or callable to output
+        :param arguments: The %-style arguments
+        :param sample: Keep one in every 'sample' events with the same message
+        """
+        Log.report('warn', 'Warn', message, arguments, sample)
+
+    @staticmethod
+    def Error(message, *arguments):
         """
         Outputs the specified message with an error level; terminates the execution
-        :param message: The message string to output
+        :param message: The message string, %-style template or callable to output
+        :param arguments: The %-style arguments
         """
-        # Output the message with a timestamp
-        print(f'{Log.datetime.now().strftime("%Y-%m-%d %H:%M:%S")} | Info | {message}')
+
+        # Output the message & wait for it to be written
+        Log.report('error', 'Error', message, arguments, 1)
+        Log.flush()
 
         # Exit
         exit(1)
 
+    # Lowercase aliases used by the lambdas
+    debug   = Debug
+    info    = Info
+    warn    = Warn
+    error   = Error
+
     ## ------------
     ## Constructors
 
-    def __init__(self):
-        pass
+    def __init__(self, level: str = None, stream=None):
+        """
+        Initializes the Log, optionally overriding the shared level & stream.
+        :param level: The name of the minimum level to report
+        :param stream: The stream the events are written to
+        """
+        if level is not None: Log.Level = Log.Levels[level.lower()]
+        if stream is not None: Log.Stream = stream
+
+# Write any queued events before the interpreter exits
+atexit.register(Log.flush)
+
+# Reset the writer in forked children
+if hasattr(os, 'register_at_fork'): os.register_at_fork(after_in_child=Log.reset)
@@ -0,0 +1,564 @@
+"""
+Bounded-memory streaming sketches for ingestion: Count-Min Sketch & SpaceSaving top-K for heavy hitters &
+HyperLogLog for cardinality. Every sketch is mergeable, so partial sketches from different workers, processes or
+runs combine into the same result as a single pass.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import sys
+import os
+import re
+import heapq
+import hashlib
+import threading
+
+from collections import Counter, OrderedDict
+from import_modules import import_modules
+from graph_extraction import InteractionGraphExtractor
+
+# Import the required modules
+import_modules(sys.modules[__name__], 0,
+               numpy={'package_name': 'numpy'})
+
+## ---------
+## Functions
+
+def stable_hashes(keys: list):
+    """
+    Returns the 64-bit hashes of the specified keys. Unlike hash(), the hashes are stable across processes, which
+    is required for sketches to be mergeable.
+    :param keys: The string keys to hash
+    :return: numpy uint64 array of hashes
+    """
+    return numpy.fromiter((int.from_bytes(hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).digest(), 'little')
+                           for key in keys), dtype=numpy.uint64, count=len(keys))
+
+## -------
+## Classes
+
+class CountMinSketch:
+    """
+    Count-Min Sketch. Estimates the frequency of any key with an overestimate of at most e * N / width with
+    probability 1 - exp(-depth). The row indices are derived from a single 64-bit hash by double hashing.
+    @author Carlos L. Cuenca
+    """
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, width: int = 1 << 14, depth: int = 4, table=None):
+        """
+        Initializes the CountMinSketch with the specified dimensions or table.
+        :param width: The amount of counters per row
+        :param depth: The amount of rows
+        :param table: Optional existing (depth, width) table
+        """
+        self.table = table if table is not None else numpy.zeros((depth, width), dtype=numpy.int64)
+
+    ## -------
+    ## Methods
+
+    def columns(self, hashes):
+        """
+        Returns the column of each hash in every row
+        :param hashes: numpy uint64 array of hashes
+        :return: numpy array of shape (depth, len(hashes))
+        """
+
+        # Split the hash into two halves
+        lower = hashes & numpy.uint64(0xffffffff)
+        upper = hashes >> numpy.uint64(32)
+
+        # Initialize the row multipliers
+        rows = numpy.arange(self.table.shape[0], dtype=numpy.uint64)[:, None]
+
+        # Return the double hashed columns
+        return ((lower[None, :] + rows * upper[None, :]) % numpy.uint64(self.table.shape[1])).astype(numpy.int64)
+
+    def add(self, keys: list, counts=None) -> None:
+        """
+        Adds the specified keys to the sketch.
+        :param keys: The keys to add
+        :param counts: Optional count of each key; defaults to one
+        """
+
+        # If there are no keys, leave
+        if len(keys) == 0: return
+
+        # Retrieve the columns & counts
+        columns = self.columns(stable_hashes(keys))
+        counts  = numpy.ones(len(keys), dtype=numpy.int64) if counts is None else numpy.asarray(counts, numpy.int64)
+
+        # Accumulate every row
+        for row in range(self.table.shape[0]): numpy.add.at(self.table[row], columns[row], counts)
+
+    def estimate(self, keys: list):
+        """
+        Returns the estimated frequency of each of the specified keys
+        :param keys: The keys to estimate
+        :return: numpy int64 array of estimates
+        """
+
+        # Retrieve the columns
+        columns = self.columns(stable_hashes(keys))
+
+        # Return the minimum over the rows
+        return self.table[numpy.arange(self.table.shape[0])[:, None], columns].min(axis=0)
+
+    def merge(self, other) -> None:
+        """
+        Merges the specified sketch into this sketch. Both must share dimensions.
+        :param other: The CountMinSketch to merge
+        """
+        self.table += other.table
+
+class SpaceSaving:
+    """
+    SpaceSaving top-K summary. Tracks at most 'capacity' keys; a new key replaces the key with the minimum count &
+    inherits that count as its error. Any key with a true frequency above N / capacity is guaranteed to be tracked.
+    @author Carlos L. Cuenca
+    """
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, capacity: int = 1024, counts: dict = None, errors: dict = None):
+        """
+        Initializes the SpaceSaving summary with the specified capacity.
+        :param capacity: The maximum amount of tracked keys
+        :param counts: Optional existing counts
+        :param errors: Optional existing errors
+        """
+        self.capacity   = capacity
+        self.counts     = counts if counts is not None else {}
+        self.errors     = errors if errors is not None else {}
+
+    ## -------
+    ## Methods
+
+    def add(self, keys: list) -> None:
+        """
+        Adds the specified keys. The batch is pre-aggregated so each distinct key is applied once & the minimum is
+        tracked with a lazily invalidated heap, so a replacement costs O(log capacity).
+        :param keys: The keys to add
+        """
+
+        # Initialize the heap of (count, key) pairs
+        heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(heap)
+
+        # Iterate through the distinct keys, largest first so heavy hitters claim the free slots
+        for key, count in Counter(keys).most_common():
+
+            # If we're tracking the key
+            if key in self.counts:
+
+                self.counts[key] += count
+
+            # Otherwise, if we have space
+            elif len(self.counts) < self.capacity:
+
+                self.counts[key] = count
+                self.errors[key] = 0
+
+            # Otherwise, replace the minimum
+            else:
+
+                # Discard any stale entries; every update pushed the key's current count
+                while heap[0][0] != self.counts.get(heap[0][1]): heapq.heappop(heap)
+
+                # Retrieve the minimum
+                floor, minimum = heapq.heappop(heap)
+
+                # Remove it
+                del self.counts[minimum]
+                del self.errors[minimum]
+
+                # Set the key
+                self.counts[key] = floor + count
+                self.errors[key] = floor
+
+            # Track the key's count
+            heapq.heappush(heap, (self.counts[key], key))
+
+    def floor(self) -> int:
+        """
+        Returns the minimum tracked count if the summary is full, otherwise 0; the upper bound on any untracked
+        key's count
+        :return: The floor count
+        """
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other) -> None:
+        """
+        Merges the specified summary into this summary. Keys missing from either summary are assumed to have that
+        summary's floor count, after which the largest 'capacity' keys are kept.
+        :param other: The SpaceSaving summary to merge
+        """
+
+        # Retrieve the floors
+        floor, other_floor = self.floor(), other.floor()
+
+        # Combine the counts & errors
+        keys    = set(self.counts) | set(other.counts)
+        counts  = {key: self.counts.get(key, floor) + other.counts.get(key, other_floor) for key in keys}
+        errors  = {key: self.errors.get(key, floor) + other.errors.get(key, other_floor) for key in keys}
+
+        # Keep the largest
+        kept = sorted(counts, key=counts.get, reverse=True)[:self.capacity]
+
+        # Set the result
+        self.counts = {key: counts[key] for key in kept}
+        self.errors = {key: errors[key] for key in kept}
+
+    def top(self, amount: int = 10) -> list:
+        """
+        Returns the most frequent keys
+        :param amount: The amount of keys to return
+        :return: list of (key, count, error) tuples ordered by count
+        """
+        return [(key, self.counts[key], self.errors[key])
+                for key in sorted(self.counts, key=self.counts.get, reverse=True)[:amount]]
+
+class HyperLogLog:
+    """
+    HyperLogLog cardinality estimator with 2^precision registers; the relative error is about
+    1.04 / sqrt(2^precision).
+    @author Carlos L. Cuenca
+    """
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, precision: int = 14, registers=None):
+        """
+        Initializes the HyperLogLog with the specified precision or registers.
+        :param precision: The amount of hash bits that select the register
+        :param registers: Optional existing registers
+        """
+        self.precision = precision
+        self.registers = registers if registers is not None else numpy.zeros(1 << precision, dtype=numpy.uint8)
+
+    ## -------
+    ## Methods
+
+    def add(self, keys: list) -> None:
+        """
+        Adds the specified keys.
+        :param keys: The keys to add
+        """
+
+        # If there are no keys, leave
+        if len(keys) == 0: return
+
+        # Retrieve the hashes
+        hashes = stable_hashes(keys)
+
+        # Select the register with the top bits & rank the next 32 bits by their leading zeros
+        index       = (hashes >> numpy.uint64(64 - self.precision)).astype(numpy.int64)
+        remaining   = ((hashes >> numpy.uint64(32 - self.precision)) & numpy.uint64(0xffffffff)).astype(numpy.float64)
+        rank        = (33 - numpy.frexp(remaining)[1]).astype(numpy.uint8)
+
+        # Keep the maximum rank of every register
+        numpy.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> float:
+        """
+        Returns the estimated amount of distinct keys
+        :return: The cardinality estimate
+        """
+
+        # Initialize the amount of registers & the bias correction
+        size  = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+
+        # Compute the raw estimate
+        estimate = alpha * size * size / numpy.sum(numpy.ldexp(1.0, -self.registers.astype(numpy.int64)))
+
+        # Use linear counting for small cardinalities
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * size and zeros > 0: estimate = size * numpy.log(size / zeros)
+
+        # Return the result
+        return float(estimate)
+
+    def merge(self, other) -> None:
+        """
+        Merges the specified estimator into this estimator. Both must share the precision.
+        :param other: The HyperLogLog to merge
+        """
+        numpy.maximum(self.registers, other.registers, out=self.registers)
+
+class PartitionSketches:
+    """
+    The sketches of one date partition of one dataset: heavy hitters of the hashtags & creators & the amount of
+    distinct creators.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Fields = ['hashtags', 'creators']
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def load(path: str):
+        """
+        Loads the sketches persisted at the specified path
+        :param path: The path of the .npz file
+        :return: PartitionSketches
+        """
+
+        # Initialize the result
+        result = PartitionSketches()
+
+        # Load the arrays
+        with numpy.load(path) as arrays:
+
+            # Iterate through the fields
+            for field in PartitionSketches.Fields:
+
+                # Restore the count-min sketch & the top-k summary
+                result.frequencies[field]   = CountMinSketch(table=arrays[f'{field}_cms'])
+                result.top[field]           = SpaceSaving(int(arrays[f'{field}_capacity']),
+                                                          dict(zip(arrays[f'{field}_keys'].tolist(),
+                                                                   arrays[f'{field}_counts'].tolist())),
+                                                          dict(zip(arrays[f'{field}_keys'].tolist(),
+                                                                   arrays[f'{field}_errors'].tolist())))
+
+            # Restore the cardinality estimator
+            result.creators = HyperLogLog(int(arrays['precision']), arrays['registers'])
+
+        # Return the result
+        return result
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, width: int = 1 << 14, depth: int = 4, capacity: int = 1024, precision: int = 14):
+        """
+        Initializes the PartitionSketches with the specified dimensions.
+        :param width: The width of the count-min sketches
+        :param depth: The depth of the count-min sketches
+        :param capacity: The capacity of the top-k summaries
+        :param precision: The precision of the cardinality estimator
+        """
+        self.frequencies    = {field: CountMinSketch(width, depth) for field in PartitionSketches.Fields}
+        self.top            = {field: SpaceSaving(capacity) for field in PartitionSketches.Fields}
+        self.creators       = HyperLogLog(precision)
+
+    ## -------
+    ## Methods
+
+    def add(self, hashtags: list, creators: list) -> None:
+        """
+        Adds a batch of hashtags & creators
+        :param hashtags: The hashtags of the batch
+        :param creators: The creators of the batch
+        """
+
+        # Iterate through the fields
+        for field, keys in (('hashtags', hashtags), ('creators', creators)):
+
+            self.frequencies[field].add(keys)
+            self.top[field].add(keys)
+
+        # Count the distinct creators
+        self.creators.add(creators)
+
+    def merge(self, other) -> None:
+        """
+        Merges the specified sketches into these sketches
+        :param other: The PartitionSketches to merge
+        """
+
+        # Iterate through the fields
+        for field in PartitionSketches.Fields:
+
+            self.frequencies[field].merge(other.frequencies[field])
+            self.top[field].merge(other.top[field])
+
+        # Merge the cardinality estimator
+        self.creators.merge(other.creators)
+
+    def save(self, path: str) -> None:
+        """
+        Saves the sketches to the specified path, merging with the sketches already persisted there. The file is
+        replaced atomically.
+        :param path: The path of the .npz file
+        """
+
+        # Merge the existing sketches
+        if os.path.isfile(path): self.merge(PartitionSketches.load(path))
+
+        # Initialize the arrays
+        arrays = {'precision': self.creators.precision, 'registers': self.creators.registers}
+
+        # Iterate through the fields
+        for field in PartitionSketches.Fields:
+
+            # Retrieve the top-k summary
+            top = self.top[field]
+
+            # Set the arrays
+            arrays[f'{field}_cms']      = self.frequencies[field].table
+            arrays[f'{field}_capacity'] = top.capacity
+            arrays[f'{field}_keys']     = numpy.array(list(top.counts), dtype=str)
+            arrays[f'{field}_counts']   = numpy.array(list(top.counts.values()), dtype=numpy.int64)
+            arrays[f'{field}_errors']   = numpy.array([top.errors[key] for key in top.counts], dtype=numpy.int64)
+
+        # Write to a temporary file & replace
+        with open(f'{path}.tmp', 'wb') as output_file: numpy.savez(output_file, **arrays)
+        os.replace(f'{path}.tmp', path)
+
+class SketchStage:
+    """
+    Ingestion stage that maintains the PartitionSketches of each date partition. Records are buffered & applied to
+    the sketches in batches so hashing & counter updates are vectorized. At most 'resident' partitions are kept in
+    memory; the least recently used partition is merged into its file when another partition is needed.
+    The stage is shared by the ingestion threads & serializes access with a lock.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log = None
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, root: str, dataset: str, batch_size: int = 4096, resident: int = 8, **dimensions):
+        """
+        Initializes the SketchStage to persist the specified dataset's sketches into the given root.
+        :param root: The directory containing the partitions
+        :param dataset: The name of the dataset
+        :param batch_size: The amount of records to buffer before updating a partition's sketches
+        :param resident: The maximum amount of partitions kept in memory
+        :param dimensions: Any dimensions to pass to PartitionSketches
+        """
+        self.root           = root
+        self.dataset        = re.sub(r'(\.[a-zA-Z0-9]+)+', '', dataset)
+        self.batch_size     = batch_size
+        self.resident       = resident
+        self.dimensions     = dimensions
+        self.lock           = threading.Lock()
+        self.partitions     = OrderedDict()
+        self.buffers        = {}
+
+    ## -------
+    ## Methods
+
+    def path_of(self, partition: str) -> str:
+        """
+        Returns the path of the specified partition's sketches
+        :param partition: The name of the date partition
+        :return: The path of the .npz file
+        """
+        return os.path.join(self.root, f'{partition}-{self.dataset}-sketches.npz')
+
+    def update(self, partition: str, entry: dict) -> None:
+        """
+        Buffers the specified record's hashtags & creator for the given partition.
+        :param partition: The name of the date partition
+        :param entry: The (retained) record
+        """
+
+        with self.lock:
+
+            # Retrieve the buffer
+            hashtags, creators = self.buffers.setdefault(partition, ([], []))
+
+            # Buffer the hashtags & creator
+            hashtags.extend(InteractionGraphExtractor.hashtags_from(entry.get('hashtags')))
+            if entry.get('creator') not in (None, ''): creators.append(str(entry['creator']))
+
+            # Apply the batch if it's full
+            if len(creators) >= self.batch_size: self.apply(partition)
+
+    def apply(self, partition: str) -> None:
+        """
+        Applies the specified partition's buffer to its sketches, evicting the least recently used partition if
+        necessary. The caller must hold the lock.
+        :param partition: The name of the date partition
+        """
+
+        # Retrieve & clear the buffer
+        hashtags, creators = self.buffers.pop(partition, ([], []))
+
+        # If the partition is not resident
+        if partition not in self.partitions:
+
+            # Evict the least recently used partition
+            if len(self.partitions) >= self.resident: self.evict(next(iter(self.partitions)))
+
+            # Initialize the partition
+            self.partitions[partition] = PartitionSketches(**self.dimensions)
+
+        # Mark the partition as recently used & apply the batch
+        self.partitions.move_to_end(partition)
+        self.partitions[partition].add(hashtags, creators)
+
+    def evict(self, partition: str) -> None:
+        """
+        Merges the specified resident partition into its file & releases it. The caller must hold the lock.
+        :param partition: The name of the date partition
+        """
+
+        # Save the partition
+        self.partitions.pop(partition).save(self.path_of(partition))
+
+        # Report
+        if SketchStage.Log is not None: SketchStage.Log.Info(f'Persisted sketches: {partition}')
+
+    def flush(self) -> None:
+        """
+        Applies every buffer & persists every resident partition.
+        """
+
+        with self.lock:
+
+            # Apply the buffers
+            for partition in list(self.buffers): self.apply(partition)
+
+            # Persist the partitions
+            for partition in list(self.partitions): self.evict(partition)
+
+    def load(self, partition: str) -> PartitionSketches:
+        """
+        Returns the persisted sketches of the specified partition
+        :param partition: The name of the date partition
+        :return: PartitionSketches
+        """
+        return PartitionSketches.load(self.path_of(partition))
+
+    def distinct_creators(self) -> float:
+        """
+        Returns the estimated amount of distinct creators over every persisted partition of the dataset
+        :return: The cardinality estimate
+        """
+
+        # Initialize the result
+        result = None
+
+        # Iterate through the dataset's sketches
+        for name in os.listdir(self.root):
+
+            # If the file belongs to the dataset
+            if name.endswith(f'-{self.dataset}-sketches.npz'):
+
+                # Load the estimator
+                estimator = PartitionSketches.load(os.path.join(self.root, name)).creators
+
+                # Merge it into the result
+                if result is None: result = estimator
+                else: result.merge(estimator)
+
+        # Return the result
+        return result.estimate() if result is not None else 0.0
@@ -0,0 +1,270 @@
+"""
+Benchmarks of the ingestion lambda: the module's cold start & the conversion's parse, transform & serialize stages
+over synthetic Parler-like pages of growing size. Kept out of ingestion_lambda so the handler never imports them.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import statistics
+import shutil
+import subprocess
+import tempfile
+import tracemalloc
+
+from log import Log
+from arguments import Arguments
+from ingestion_lambda import HTMLToArenaParser, TransformationEngine, OutputWriter, RULES, values_of
+
+## ----------
+## Benchmarks
+
+STARTUP_BENCHMARK = """
+import json, sys, time
+start       = time.perf_counter()
+import ingestion_lambda
+imported    = time.perf_counter()
+ingestion_lambda.CLIENTS['s3'] = ingestion_lambda.LocalS3Client(sys.argv[1])
+event       = json.loads(sys.argv[2])
+ingestion_lambda.handler(event, None)
+first       = time.perf_counter()
+ingestion_lambda.handler(event, None)
+warm        = time.perf_counter()
+print(json.dumps([imported - start, first - imported, warm - first]))
+"""
+
+def benchmark_startup(filenames: list, repeat: int = 5) -> dict:
+    """
+    Measures the module's import time, the handler's first invocation latency & a warm invocation's latency, each
+    run in a fresh interpreter. The handler converts the specified pages from a LocalS3Client without deleting
+    them, so creating the boto3 client is not measured.
+    :param filenames: The html pages the invocations convert
+    :param repeat: The amount of fresh interpreters
+    :return: dict of the median seconds of each stage
+    """
+
+    with tempfile.TemporaryDirectory() as root:
+
+        # Initialize the input bucket & the event
+        os.makedirs(f'{root}/input/pages')
+
+        for filename in filenames: shutil.copy(filename, f'{root}/input/pages/{os.path.basename(filename)}')
+
+        event = {'Records': [{'s3': {'bucket': {'name': 'input'},
+                                     'object': {'key': f'pages/{os.path.basename(filename)}'}}}
+                             for filename in filenames], 'output_bucket': 'output', 'delete': False}
+
+        # Initialize the environment; the module's directory is importable & events below warnings are dropped
+        directory   = os.path.dirname(os.path.abspath(__file__))
+        environment = dict(os.environ, LOG_LEVEL='warn',
+                           PYTHONPATH=os.pathsep.join(filter(None, [directory, os.environ.get('PYTHONPATH')])))
+
+        # Run the fresh interpreters
+        timings = [json.loads(subprocess.run([sys.executable, '-c', STARTUP_BENCHMARK, root, json.dumps(event)],
+                                             env=environment, capture_output=True, text=True,
+                                             check=True).stdout.splitlines()[-1]) for _ in range(repeat)]
+
+    # Return the result
+    return {'pages': len(filenames), 'repeat': repeat,
+            'import_seconds': statistics.median(timing[0] for timing in timings),
+            'first_invocation_seconds': statistics.median(timing[1] for timing in timings),
+            'warm_invocation_seconds': statistics.median(timing[2] for timing in timings)}
+
+SYNTHETIC_POST = """<div class="card--post-container" id="p{number}">
+  <div class="card--header"><div class="ch--avatar--wrapper"><img src="/a/{number}.png" alt="Avatar"></div>
+    <div class="ch--meta-col"><span class="author--name">User {user}</span> <span class="author--username">@user{user}</span>
+    <span class="post--timestamp">{hours} hours ago</span></div></div>
+  {echo}
+  <div class="card--body"><p>Post body text {number} with #tag{tag} and
+ newline</p>{media}</div>
+  <div class="separator"></div>
+  <div class="card--footer"><div class="post--actions"><div class="ca--item--count"><img src="/icons/Comments.svg" alt="Comments"><span class="ca--item--count">{comments}</span></div><div class="ca--item--count"><img src="/icons/Echoes.svg" alt="Echoes"><span class="ca--item--count">{echoes}</span></div><div class="pa--item--count"><img src="/icons/Upvotes.svg" alt="Upvotes"><span class="pa--item--count">{upvotes}</span></div><div class="pa--item--count"><img src="/icons/Impressions.svg" alt="Impressions"><span class="pa--item--count">{impressions}</span></div></div><span class="impressions--icon--wrapper"><img src="/i.svg" alt=""></span></div>
+  <div class="show-comments--wrapper" onclick="x()">Show</div><div class="hide-comments--wrapper">Hide</div>
+"""
+
+SYNTHETIC_ECHO  = '<div class="eb--col"><span class="eb--label">{label}</span><a class="eb--user" href="/u{user}">@user{user}</a></div>'
+SYNTHETIC_MEDIA = '<div class="media-container--wrapper"><div class="mc-image--wrapper"><img src="https://img/{number}.jpg" ' \
+                  'alt="Post Image {number}"></div><a class="mc-video--link--icon" href="#">v</a></div>'
+
+def synthetic_page(posts: int, seed: int = 0, depth: int = 3) -> str:
+    """
+    Generates a Parler-like page with the specified amount of posts, using the class names of the scraped pages.
+    Posts randomly echo another user, carry media & nest replies in comment--card--wrapper elements up to the given
+    depth; the same seed generates the same page.
+    :param posts: The amount of posts
+    :param seed: The seed of the random values
+    :param depth: The maximum nesting of the replies
+    :return: The html of the page
+    """
+
+    # Initialize the random values & the page
+    generator   = random.Random(seed)
+    page        = ['<!DOCTYPE html><html><head><meta name="x" content="y"><title>Parler</title>'
+                   '<link rel="stylesheet" href="s.css"></head>\n<body><div class="w--100 gutter--15 container--main">'
+                   '<nav class="ms--menu"><a class="ms--menu-item" href="/">Home</a>'
+                   '<a class="ms--menu-item" href="/d">Discover</a></nav>\n<div class="login-more">Login</div>\n']
+    open_posts  = 0
+
+    # Iterate through the posts
+    for number in range(posts):
+
+        # Open the post
+        page.append(SYNTHETIC_POST.format(
+            number=number, user=generator.randrange(posts), hours=generator.randrange(1, 24), tag=generator.randrange(20),
+            echo=SYNTHETIC_ECHO.format(label=generator.choice(('By', 'Echoed')), user=generator.randrange(posts))
+            if generator.random() < 0.5 else '',
+            media=SYNTHETIC_MEDIA.format(number=number) if generator.random() < 0.5 else '',
+            comments=generator.randrange(1000), echoes=generator.randrange(1000), upvotes=generator.randrange(1000),
+            impressions=generator.randrange(1000)))
+
+        open_posts += 1
+
+        # Either nest the next post as a reply or close the open posts
+        if open_posts < depth and generator.random() < 0.3: page.append('  <div class="comment--card--wrapper">\n')
+
+        else:
+
+            page.append('\n</div></div>' * (open_posts - 1) + '\n</div>\n')
+            open_posts = 0
+
+    # Close the open posts & the page
+    page.append('\n</div></div>' * max(open_posts - 1, 0) + ('\n</div>\n' if open_posts > 0 else ''))
+    page.append('<div class="footer--container"><span class="version-text">v1</span></div></div></body></html>\n')
+
+    # Return the result
+    return ''.join(page)
+
+def benchmark_stages(html: str, repeat: int = 3, writer: OutputWriter = None) -> dict:
+    """
+    Times the parse, transform & serialize stages of the specified page's conversion separately & measures the
+    peak memory allocated while parsing & transforming it. Each stage's fastest run is kept; the memory is
+    measured in a separate run since tracing slows the stages down.
+    :param html: The html of the page
+    :param repeat: The amount of times the page is converted
+    :param writer: The OutputWriter serializing the page; defaults to compact json objects
+    :return: dict of the seconds of each stage & the peak bytes
+    """
+
+    # Initialize the writer, the transformation & the timings
+    writer      = writer if writer is not None else OutputWriter()
+    transform   = TransformationEngine(RULES)
+    timings     = {'parse': [], 'transform': [], 'serialize': []}
+
+    for _ in range(repeat):
+
+        # Parse the page
+        start   = time.perf_counter()
+        parser  = HTMLToArenaParser('synthetic.html', source=io.StringIO(html))
+        parsed  = time.perf_counter()
+
+        # Transform it
+        page    = ('synthetic.html', transform(parser.root), parser.index(), parser.keys(), None)
+        done    = time.perf_counter()
+
+        # Serialize its documents
+        for _, write in writer.documents(page): writer.encode(write)
+
+        serialized = time.perf_counter()
+
+        # Update the timings
+        timings['parse'].append(parsed - start)
+        timings['transform'].append(done - parsed)
+        timings['serialize'].append(serialized - done)
+
+    # Measure the peak memory of parsing & transforming the page
+    tracemalloc.start()
+
+    try:
+
+        parser = HTMLToArenaParser('synthetic.html', source=io.StringIO(html))
+        transform(parser.root)
+
+        _, peak = tracemalloc.get_traced_memory()
+
+    finally: tracemalloc.stop()
+
+    # Return the result
+    return {**{f'{stage}_seconds': min(times) for stage, times in timings.items()},
+            'seconds': sum(min(times) for times in timings.values()), 'peak_bytes': peak}
+
+def benchmark_scaling(posts: int = 250, steps: int = 4, repeat: int = 3, tolerance: float = 1.35) -> dict:
+    """
+    Converts synthetic pages whose amount of posts doubles at each step, checking that the time & peak memory of
+    the conversion grow near-linearly: each doubling may multiply them by at most 2 * tolerance.
+    :param posts: The amount of posts of the smallest page
+    :param steps: The amount of page sizes
+    :param repeat: The amount of times each page is converted
+    :param tolerance: The allowed growth over linear per doubling
+    :return: dict of the measurements of each size, the growth of each doubling & the flag indicating if it's linear
+    """
+
+    # Initialize the sizes & the measurements
+    sizes   = [posts << step for step in range(steps)]
+    results = []
+
+    # Iterate through the sizes
+    for size in sizes:
+
+        # Generate & measure the page
+        html = synthetic_page(size)
+
+        results.append({'posts': size, 'bytes': len(html), **benchmark_stages(html, repeat)})
+
+        Log.info('Converted %s posts (%s bytes) in %.3fs', size, len(html), results[-1]['seconds'])
+
+    # Compute the growth of each doubling
+    growth = [{'posts': current['posts'],
+               **{metric: current[metric] / max(previous[metric], 1e-9)
+                  for metric in ('seconds', 'parse_seconds', 'transform_seconds', 'serialize_seconds', 'peak_bytes')}}
+              for previous, current in zip(results, results[1:])]
+
+    # Return the result
+    return {'sizes': results, 'growth': growth, 'tolerance': tolerance,
+            'linear': all(step['seconds'] <= 2 * tolerance and step['peak_bytes'] <= 2 * tolerance
+                          for step in growth)}
+
+
+def main(argv: list) -> None:
+    """
+    Command-line entry point. Runs one of the benchmarks, printing its JSON result:
+        --startup pages... [--repeat n]
+        --scaling [--posts n] [--steps n] [--repeat n]
+    --output also writes the result to the specified file. The scaling benchmark exits with an error if the
+    conversion grows super-linearly.
+    :param argv: The command-line arguments
+    """
+
+    # Initialize the log & consume the arguments
+    Arguments.Log   = Log
+    arguments       = Arguments(argv, None)
+    options         = arguments.dictionary
+    repeat          = int(options['repeat']) if options.get('repeat') is not None else None
+
+    # Run the specified benchmark
+    if 'startup' in options: result = benchmark_startup(values_of(arguments, 'startup'), repeat or 5)
+
+    else: result = benchmark_scaling(int(options.get('posts') or 250), int(options.get('steps') or 4), repeat or 3)
+
+    # Output the result
+    print(json.dumps(result, indent=4))
+
+    if options.get('output') is not None:
+
+        with open(options['output'], 'w') as output_file: json.dump(result, output_file, indent=4)
+
+    # If the conversion doesn't scale, fail
+    if 'linear' in result and not result['linear']: Log.error('The conversion grows super-linearly')
+
+## ------
+## Script
+
+if __name__ == "__main__":
+
+    main(sys.argv)
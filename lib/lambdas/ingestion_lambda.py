@@ -1,17 +1,30 @@
 ## -------
 ## Imports
 
-import boto3
 import re
+import sys
 import json
 import os
-
+import time
+import importlib
+import importlib.util
+import codecs
+import contextlib
+import gzip
+import io
+import math
+import base64
+import hashlib
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, unquote_plus
+
+from array import array
 from html.parser import HTMLParser
-
-FILENAME = ''
+from log import Log
+from arguments import Arguments
 
 REMOVE_KEYS = [
-    'duplicated',
     'id',
     'content',
     'onclick',
@@ -47,42 +60,407 @@ OMIT = [
 ## -------
 ## Classes
 
-class Log:
+class MultiValueDict(dict):
+    """
+    A dictionary whose keys may hold multiple values. The first value of a key is stored as-is; adding another
+    value converts the entry into a list of the values & later values are appended to it. The keys holding lists
+    of values are tracked in a set, so inserts & appends are O(1) & the dictionary serializes without any
+    sentinel keys.
+    Attributes
+    ----------
+    multiple : set
+        The keys whose entry is a list of values
+    """
+
+    ## -------------
+    ## Static Fields
+
+    __slots__ = ('multiple',)
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def of(source: dict, items):
+        """
+        Returns a MultiValueDict containing the specified items that keeps the source's multi-valued keys
+        :param source: The dictionary the items were derived from
+        :param items: The key-value pairs of the result
+        :return: MultiValueDict
+        """
+
+        # Initialize the result
+        result = MultiValueDict(items)
+
+        # Keep the multi-valued keys that remain
+        result.multiple = {key for key in getattr(source, 'multiple', ()) if key in result}
+
+        # Return the result
+        return result
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, *arguments, **keywords):
+        """
+        Initializes the MultiValueDict with the specified items; every key holds a single value.
+        """
+        dict.__init__(self, *arguments, **keywords)
+
+        # Initialize the members
+        self.multiple = set()
+
+    ## -------
+    ## Methods
+
+    def add(self, key, value) -> None:
+        """
+        Sets the key-value pair if the key does not exist; otherwise the value is added to the key's values.
+        :param key: The key corresponding to the value
+        :param value: The value corresponding with the key
+        """
+
+        # If we don't contain the key, set the key-value pair as-is
+        if key not in self: self[key] = value
+
+        # Otherwise, if the key already holds multiple values, simply append
+        elif key in self.multiple: self[key].append(value)
+
+        # Otherwise, we have a duplicate
+        else:
+
+            # Update the value as a list
+            self[key] = [self[key], value]
+
+            # Mark the key
+            self.multiple.add(key)
+
+    def extend(self, other) -> None:
+        """
+        Adds the values of the specified MultiValueDict; each value of a multi-valued key is added on its own, so
+        extending partial results in order is equivalent to adding every value to a single dictionary.
+        :param other: The MultiValueDict whose values to add
+        """
+
+        # Iterate through the key-value pairs
+        for key, value in other.items():
+
+            # If the key holds multiple values, add each
+            if key in other.multiple:
+
+                for child in value: self.add(key, child)
+
+            # Otherwise, add the value
+            else: self.add(key, value)
+
+    def pop(self, key, *default):
+        """
+        Removes the specified key, returning its value
+        :param key: The key to remove
+        :param default: The value to return if the key does not exist
+        :return: The key's value
+        """
+        self.multiple.discard(key)
+        return super().pop(key, *default)
+
+    def clear(self) -> None:
+        """
+        Removes every key-value pair
+        """
+        self.multiple.clear()
+        super().clear()
+
+    ## ---------
+    ## Overloads
+
+    def __delitem__(self, key) -> None:
+        self.multiple.discard(key)
+        super().__delitem__(key)
+
+def open_source(source):
+    """
+    Returns a context manager yielding a readable text stream over the specified source. Streams are yielded as-is
+    & left open.
+    :param source: The path of an html file or a readable text stream
+    :return: Context manager yielding the text stream
+    """
+    return open(source, 'r') if isinstance(source, str) else contextlib.nullcontext(source)
+
+class HTMLParserBackend:
     """
-    A class representing a logger that reports (structured) events.
+    Parser backend that feeds the file to the stdlib HTMLParser in chunks. Each chunk is cut before its last '<'
+    so the data between two tags is never split across handle_data invocations.
     """
 
+    ## -------------
+    ## Static Fields
+
+    Name = 'html.parser'
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def available() -> bool:
+        """
+        Returns a flag indicating if the backend can be used
+        :return: boolean flag indicating if the backend is available
+        """
+        return True
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, chunk_size: int = 1 << 16):
+        """
+        Initializes the HTMLParserBackend with the specified chunk size.
+        :param chunk_size: The amount of characters read at a time
+        """
+        self.chunk_size = chunk_size
+
     ## -------
-    ## Imports
+    ## Methods
 
-    from datetime import datetime
+    def parse(self, source, handler: HTMLParser) -> None:
+        """
+        Feeds the specified file to the handler
+        :param source: The html file to parse or a readable text stream
+        :param handler: The HTMLParser receiving the events
+        """
+
+        # Initialize the pending data
+        pending = ''
+
+        with open_source(source) as input_file:
+
+            # Read the chunks
+            for chunk in iter(lambda: input_file.read(self.chunk_size), ''):
+
+                # Feed up to the last tag
+                pending += chunk
+                cut      = pending.rfind('<')
+
+                if cut > 0:
+
+                    handler.feed(pending[:cut])
+                    pending = pending[cut:]
+
+        # Feed the remainder
+        if len(pending) > 0: handler.feed(pending)
+
+class LxmlBackend:
+    """
+    Parser backend that translates the events of lxml's (libxml2) incremental HTML parser into the start, data &
+    end invocations of the stdlib HTMLParser. An element's text is emitted once its first child starts or it ends
+    & its tail once its next sibling starts or its parent ends. Finished elements are released so the memory is
+    proportional to the element stack. Void elements don't emit an end since the markup has no closing tag.
+    libxml2 repairs malformed markup & reports boolean attributes with their name as the value, so such pages may
+    differ from the stdlib parser.
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Name = 'lxml'
+    Void = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source',
+                      'track', 'wbr'])
 
     ## --------------
     ## Static Methods
 
     @staticmethod
-    def warn(message: str):
+    def available() -> bool:
+        """
+        Returns a flag indicating if the backend can be used
+        :return: boolean flag indicating if lxml is installed
+        """
+        return importlib.util.find_spec('lxml') is not None
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, chunk_size: int = 1 << 16):
+        """
+        Initializes the LxmlBackend with the specified chunk size.
+        :param chunk_size: The amount of characters read at a time
+        """
+        self.chunk_size = chunk_size
+        self.etree      = importlib.import_module('lxml.etree')
+
+    ## -------
+    ## Methods
+
+    def parse(self, source, handler) -> None:
         """
-        Outputs the specified message with a warning level.
-        :param message: The message string to output
+        Parses the specified file, invoking the handler's handle_starttag, handle_data & handle_endtag
+        :param source: The html file to parse or a readable text stream
+        :param handler: The object receiving the events
         """
-        # Output the message with a timestamp
-        print(f'{Log.datetime.now().strftime("%Y-%m-%d %H:%M:%S")} | {FILENAME} | Warn | {message}')
+
+        # Initialize the parser & the (element, 'text' or 'tail') whose data is due
+        parser  = self.etree.HTMLPullParser(events=('start', 'end', 'comment'))
+        due     = None
+
+        # Emits the due data; it's complete once the next event is read
+        def emit_due() -> None:
+
+            data = getattr(*due) if due is not None else None
+
+            if data: handler.handle_data(data)
+
+        # Translates the events read so far
+        def translate() -> None:
+
+            nonlocal due
+
+            for event, element in parser.read_events():
+
+                # Emit the due data
+                emit_due()
+
+                # If an element started, emit it & mark its text as due
+                if event == 'start':
+
+                    handler.handle_starttag(element.tag, list(element.attrib.items()))
+                    due = (element, 'text')
+
+                # Otherwise, if an element ended
+                elif event == 'end':
+
+                    # Emit the end, if the markup has one
+                    if element.tag not in LxmlBackend.Void: handler.handle_endtag(element.tag)
+
+                    # Release the children & the previous siblings
+                    element.clear(keep_tail=True)
+
+                    while element.getprevious() is not None: del element.getparent()[0]
+
+                    # Mark its tail as due
+                    due = (element, 'tail')
+
+                # Otherwise, a comment only has a tail
+                else: due = (element, 'tail')
+
+        with open_source(source) as input_file:
+
+            # Feed the chunks & translate their events
+            for chunk in iter(lambda: input_file.read(self.chunk_size), ''):
+
+                parser.feed(chunk)
+                translate()
+
+        # Close the parser, translate the remaining events & emit the last tail
+        parser.close()
+        translate()
+        emit_due()
+
+class SelectolaxBackend:
+    """
+    Parser backend that parses the file with selectolax (lexbor) & walks the resulting tree, invoking the start,
+    data & end events of the stdlib HTMLParser in document order. Void elements don't emit an end since the markup
+    has no closing tag. lexbor repairs malformed markup, so such pages may differ from the stdlib parser.
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Name = 'selectolax'
+
+    ## --------------
+    ## Static Methods
 
     @staticmethod
-    def info(message: str):
+    def available() -> bool:
         """
-        Outputs the specified message with an info level.
-        :param message: The message string to output
+        Returns a flag indicating if the backend can be used
+        :return: boolean flag indicating if selectolax is installed
         """
-        # Output the message with a timestamp
-        print(f'{Log.datetime.now().strftime("%Y-%m-%d %H:%M:%S")} | {FILENAME} | Info | {message}')
+        return importlib.util.find_spec('selectolax') is not None
 
     ## ------------
     ## Constructors
 
     def __init__(self):
-        pass
+        """
+        Initializes the SelectolaxBackend to its' default state.
+        """
+        self.lexbor = importlib.import_module('selectolax.lexbor')
+
+    ## -------
+    ## Methods
+
+    def parse(self, source, handler) -> None:
+        """
+        Parses the specified file, invoking the handler's handle_starttag, handle_data & handle_endtag
+        :param source: The html file to parse or a readable text stream
+        :param handler: The object receiving the events
+        """
+
+        # Parse the file
+        with open_source(source) as input_file:
+
+            tree = self.lexbor.LexborHTMLParser(input_file.read())
+
+        # Initialize the stack of (node, ending) pairs
+        stack = [(tree.root, False)] if tree.root is not None else []
+
+        while len(stack) > 0:
+
+            # Retrieve the next node
+            node, ending    = stack.pop()
+            tag             = node.tag
+
+            # If the node is ending, emit the end, if the markup has one
+            if ending:
+
+                if tag not in LxmlBackend.Void: handler.handle_endtag(tag)
+
+            # Otherwise, if the node is text, emit the data
+            elif tag == '-text': handler.handle_data(node.text_content)
+
+            # Otherwise, if the node is an element
+            elif not tag.startswith('-'):
+
+                # Emit the start & push the end
+                handler.handle_starttag(tag, list(node.attributes.items()))
+                stack.append((node, True))
+
+                # Push the children in reverse order
+                children    = []
+                child       = node.child
+
+                while child is not None:
+
+                    children.append(child)
+                    child = child.next
+
+                stack.extend((child, False) for child in reversed(children))
+
+PARSER_BACKENDS = [HTMLParserBackend, LxmlBackend, SelectolaxBackend]
+
+def parser_backend(name: str = None):
+    """
+    Returns the specified parser backend. The name defaults to the PARSER_BACKEND environment variable; 'auto'
+    selects the first installed C-accelerated backend. Unavailable backends fall back to the stdlib parser.
+    :param name: The name of the backend; 'html.parser', 'lxml', 'selectolax' or 'auto'
+    :return: The parser backend
+    """
+
+    # Initialize the name & the candidates
+    name        = name if name is not None else os.environ.get('PARSER_BACKEND', HTMLParserBackend.Name)
+    candidates  = [SelectolaxBackend, LxmlBackend] if name == 'auto' else \
+        [backend for backend in PARSER_BACKENDS if backend.Name == name]
+
+    # Return the first available candidate
+    for backend in candidates:
+
+        if backend.available(): return backend()
+
+    # Otherwise, fall back to the stdlib parser
+    if name != 'auto' and name != HTMLParserBackend.Name: Log.warn('Parser backend %s unavailable; using %s',
+                                                                    name, HTMLParserBackend.Name)
+
+    return HTMLParserBackend()
 
 class HTMLToDictionaryParser(HTMLParser):
     """
@@ -98,43 +476,15 @@ class HTMLToDictionaryParser(HTMLParser):
     ## Static Methods
 
     @staticmethod
-    def set_or_duplicate(target: dict, key, value) -> None:
+    def set_or_duplicate(target: MultiValueDict, key, value) -> None:
         """
         Sets the key-value pair to the specified dictionary if the key-value pair does not exist;
         otherwise this will create a list with the current & new values and update the entry.
-        This method will insert a 'duplicated' key into the target dictionary if it doesn't already
-        exist.
-        :param target: The dictionary to aggregate the key-value pair
+        :param target: The MultiValueDict to aggregate the key-value pair
         :param key: The key corresponding to the value
         :param value: The value corresponding with the key
         """
-
-        # Initialize a duplicated list if the target does not contain a 'duplicated' key
-        if 'duplicated' not in target: target['duplicated'] = []
-
-        # If the target does not contain the key
-        if key not in target:
-
-            # Set the key-value pair as-is
-            target[key] = value
-
-        # Otherwise, we have a duplicate
-        else:
-
-            # If we haven't encountered a duplicate
-            if key not in target['duplicated']:
-
-                # Update the value as a list
-                target[key] = [target[key], value]
-
-                # Update the duplicated flag
-                target['duplicated'].append(key)
-
-            # Otherwise, we must have a list
-            else:
-
-                # Simply append
-                target[key].append(value)
+        target.add(key, value)
 
     @staticmethod
     def list_to_string(data) -> str:
@@ -164,7 +514,7 @@ class HTMLToDictionaryParser(HTMLParser):
         """
 
         # Report the event
-        Log.info(f'merging source into target')
+        Log.debug('merging source into target', sample=100)
 
         if source is not None:
 
@@ -175,32 +525,31 @@ class HTMLToDictionaryParser(HTMLParser):
                 HTMLToDictionaryParser.set_or_duplicate(target, key, value)
 
                 # Report the aggregation
-                Log.info(f'aggregated {key}:{value} into target')
+                Log.debug('aggregated %s:%s into target', key, value, sample=100)
 
     ## ------------
     ## Constructors
 
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, backend=None, source=None):
         """
         Default constructor. Initializes the HTMLToDictionaryParser to its' default state.
         :param filename: The string value corresponding to the html file to process
+        :param backend: The parser backend that reads the file; defaults to parser_backend()
+        :param source: Readable text stream to parse instead of the file; the filename is only recorded
         """
         super().__init__()
 
         # Initialize the members
-        self.attributes_index   = {}
-        self.keys_index         = {}
-        self.root               = {'filename': filename}
+        self.attributes_index   = MultiValueDict()
+        self.keys_index         = MultiValueDict()
+        self.root               = MultiValueDict(filename=filename)
         self.parent             = self.root
         self.current            = self.root
         self.current_key        = 'root'
         self.stack              = []
 
-        # Open the file
-        with open(filename, 'r') as input_file:
-
-            # And feed it into our parser
-            self.feed(input_file.read())
+        # Parse the file
+        (backend if backend is not None else parser_backend()).parse(source if source is not None else filename, self)
 
     ## -------
     ## Methods
@@ -218,7 +567,7 @@ class HTMLToDictionaryParser(HTMLParser):
         :param attributes: The html tag's specified attributes
         """
         # Log the event
-        Log.info(f'start tag: \"{tag}\" attributes: {str(attributes)}')
+        Log.debug('start tag: "%s" attributes: %s', tag, attributes, sample=100)
 
         # Check if the tag contained a set of attributes & the attributes included a class
         if len(attributes) > 0:
@@ -234,7 +583,7 @@ class HTMLToDictionaryParser(HTMLParser):
 
                 # Initialize the child & key
                 self.current_key = HTMLToDictionaryParser.list_to_string(attributes['class'])
-                self.current = {}
+                self.current = MultiValueDict()
 
                 # Remove the 'class' key-value pair
                 del attributes['class']
@@ -243,13 +592,13 @@ class HTMLToDictionaryParser(HTMLParser):
                 HTMLToDictionaryParser.set_or_duplicate(self.keys_index, self.current_key, True)
 
                 # Report the event
-                Log.info(f'{self.stack[-1][0]} aggregated child {self.current_key}')
+                Log.debug('%s aggregated child %s', self.stack[-1][0], self.current_key, sample=100)
 
             # Merge the attributes into the current dictionary & index the keys
             HTMLToDictionaryParser.merge(self.current, attributes)
 
             # Report the event
-            Log.info(f'merged attributes into {self.current_key}')
+            Log.debug('merged attributes into %s', self.current_key, sample=100)
 
     def handle_data(self, data: str) -> None:
         """
@@ -267,7 +616,7 @@ class HTMLToDictionaryParser(HTMLParser):
             if data != '' and data != ' ':
 
                 # Report the event
-                Log.info(f'received data: {data}')
+                Log.debug('received data: %s', data, sample=100)
 
                 # Set the data
                 HTMLToDictionaryParser.set_or_duplicate(self.current, 'data', data)
@@ -305,10 +654,10 @@ class HTMLToDictionaryParser(HTMLParser):
                         HTMLToDictionaryParser.set_or_duplicate(self.attributes_index, key, value)
 
                         # Report the event
-                        Log.info(f'aggregated {key}:{value} into index')
+                        Log.debug('aggregated %s:%s into index', key, value, sample=100)
 
             # Report the event
-            Log.info(f'Closing {child_id}')
+            Log.debug('Closing %s', child_id, sample=100)
 
     def index(self) -> dict:
         """
@@ -331,133 +680,547 @@ class HTMLToDictionaryParser(HTMLParser):
         """
         return self.keys_index
 
-def handler(event, context): 
+class NodeArena:
+    """
+    Stores a parsed page in parallel arrays instead of a dictionary per element. Strings are interned into a
+    table & referenced by id. A node is a classed element (or the root) & holds the ids of its key & parent, and
+    the offsets of its first & last entries. An entry is one key-value pair of a node in insertion order: the id
+    of its key, its value (a string id if non-negative, otherwise the complement of a child node) & the offset of
+    the node's next entry. Attributes & data are entries, so the insertion order of the dictionaries is kept.
+    """
 
-    table_name  = event['table_name']
-    input_name  = event['input_bucket']
-    output_name = event['output_bucket']
+    ## ------------
+    ## Constructors
 
-    input_bucket = boto3.resource('s3').Bucket(input_name)
-    output_bucket = boto3.resource('s3').Bucket(output_name)
-    table = boto3.resource('dynamodb').Table(table_name)
+    def __init__(self):
+        """
+        Initializes the NodeArena to its' default state.
+        """
+        self.strings    = []
+        self.ids        = {}
+        self.key        = array('i')
+        self.parent     = array('i')
+        self.first      = array('i')
+        self.last       = array('i')
+        self.size       = array('i')
+        self.entry_key  = array('i')
+        self.value      = array('i')
+        self.next       = array('i')
 
-    for obj in input_bucket.objects():
-        with open(obj.key, 'wb') as data:
-            input_bucket.download_fileobj(obj.key, data)
-            # table.put_item(Item=ParlerParser(data).result)
-            output_bucket.upload_file(obj.key, obj.key)
-        
-        input_bucket.delete_objects(Delete={"Objects": [{"Key": obj.key}]})
+    ## -------
+    ## Methods
 
-    return {}
+    def intern(self, value) -> int:
+        """
+        Returns the id of the specified string, adding it to the table if necessary
+        :param value: The string (or None) to intern
+        :return: The id of the string
+        """
 
-def snake_case(value):
+        # Attempt to retrieve the identifier
+        identifier = self.ids.get(value)
 
-    # Attempt to convert the value into a string
-    value = str(value) if not isinstance(value, str) else value
+        # If we haven't seen it, assign the next identifier
+        if identifier is None:
 
-    # Return the result of consolidating spaces of the lowercase string
-    return re.sub(r'[\t\f\r\n ]+', '_', value.lower())
+            identifier = self.ids[value] = len(self.strings)
+            self.strings.append(value)
 
-def traverse(data, callback):
+        # Return the result
+        return identifier
 
-    Log.warn(f'Traversing: {data}')
+    def node(self, key, parent: int) -> int:
+        """
+        Allocates a node with the specified key & parent
+        :param key: The key the node is attached with
+        :param parent: The index of the parent node or -1
+        :return: The index of the node
+        """
 
-    # If the data is a list
-    if isinstance(data, list):
+        # Append the node
+        self.key.append(self.intern(key))
+        self.parent.append(parent)
+        self.first.append(-1)
+        self.last.append(-1)
+        self.size.append(0)
 
-        # Create a new list with the result of this method
-        data = [traverse(child, callback) for child in data]
+        # Return the result
+        return len(self.key) - 1
 
-    # Otherwise, if the data is a dictionary
-    elif isinstance(data, dict):
+    def link(self, node: int, key: int, value: int) -> None:
+        """
+        Appends an entry to the specified node
+        :param node: The index of the node
+        :param key: The id of the entry's key
+        :param value: The string id or the complement of a child node
+        """
 
-        # Set each key's value to the result of this method
-        data = {key: traverse(child, callback) for key, child in data.items()}
+        # Append the entry
+        entry = len(self.entry_key)
+        self.entry_key.append(key)
+        self.value.append(value)
+        self.next.append(-1)
 
-    # Return the result of the callback, if any
-    return callback(data) if callback is not None else data
+        # Link it after the node's last entry
+        if self.last[node] < 0: self.first[node] = entry
 
-def starts_with(key, other):
+        else: self.next[self.last[node]] = entry
 
-    return key.startswith(other) if key is not None else False
+        self.last[node] = entry
+        self.size[node] += 1
 
-class MergeValueAsKeyCallback:
-    """
-    Defines a callback that converts a value to a key, and assigns an existing, sibling
-    value as it's value
-    """
+    def append(self, node: int, key, value) -> None:
+        """
+        Appends the specified key-value pair to the given node
+        :param node: The index of the node
+        :param key: The key string
+        :param value: The value string or None
+        """
+        self.link(node, self.intern(key), self.intern(value))
 
-    ## -----------
-    ## Constructor
+    def attach(self, node: int, child: int) -> None:
+        """
+        Appends the specified child to the given node with the child's key
+        :param node: The index of the node
+        :param child: The index of the child node
+        """
+        self.link(node, self.key[child], ~child)
 
-    def __init__(self, value_to_key=None, key=None, transform=None, callback=None):
+    def release(self, node: int) -> None:
+        """
+        Releases the specified node & every node allocated after it. Only valid for the most recently opened node
+        when it has no entries; nodes allocated after it are then unattached.
+        :param node: The index of the node
+        """
+        for values in (self.key, self.parent, self.first, self.last, self.size): del values[node:]
 
-        self.value_to_key   = value_to_key
-        self.key            = key
-        self.transform      = transform
-        self.callback       = callback
+    def entries(self, node: int):
+        """
+        Returns the specified node's entries in insertion order
+        :param node: The index of the node
+        :return: generator of (key id, value) pairs; values are string ids or complemented child nodes
+        """
 
-    ## ---------
-    ## Overloads
+        # Initialize the entry
+        entry = self.first[node]
 
-    def __call__(self, value):
+        # Iterate through the linked entries
+        while entry >= 0:
 
-        # If the value is a list
-        if isinstance(value, list):
+            yield self.entry_key[entry], self.value[entry]
 
-            # Set the result to the modified list
-            value = [self(child) for child in value]
+            entry = self.next[entry]
 
-        # Otherwise, if the value is a dictionary & if we have a valid set of keys
-        elif isinstance(value, dict) and self.value_to_key is not None and self.key is not None:
+    def scalars(self, node: int) -> list:
+        """
+        Returns the key-value pairs of the specified node's keys that hold a single string, in key order
+        :param node: The index of the node
+        :return: list of (key, value) string pairs
+        """
 
-            # If the keys exist in the dictionary
-            if self.value_to_key in value and self.key in value:
+        # Initialize the values; a key that repeats or holds a child maps to None
+        values = {}
 
-                Log.info(f'Converting {self.value_to_key} to key with value {value[self.key]}')
+        for key, value in self.entries(node): values[key] = value if key not in values and value >= 0 else None
 
-                # Retrieve the value to be set as a key, and the corresponding value
-                new_key     = value[self.value_to_key]
-                existing    = value[self.key]
+        # Return the result
+        return [(self.strings[key], self.strings[value]) for key, value in values.items() if value is not None]
 
-                # If the value to be turned into a key is not empty
-                if not RemoveEmptyCallback.is_empty(new_key):
+    def view(self, node: int = 0):
+        """
+        Returns a view of the specified node
+        :param node: The index of the node
+        :return: NodeView
+        """
+        return NodeView(self, node)
 
-                    # Remove the existing key-value pairs
-                    del value[self.value_to_key]
-                    del value[self.key]
+class NodeView:
+    """
+    A lightweight view of a NodeArena node. TransformationPasses walk views like dictionaries, so the nested
+    dictionaries are only created for the keys that survive the walk.
+    """
 
-                    # If we have a transformation function, transform the key
-                    if self.transform is not None: new_key = self.transform(new_key)
+    ## -------------
+    ## Static Fields
 
-                    # Set the new key-value pair
-                    HTMLToDictionaryParser.set_or_duplicate(value, new_key, existing)
+    __slots__ = ('arena', 'node')
 
-            # Reset the value
-            value = {key: self(child) for key, child in value.items()}
+    ## ------------
+    ## Constructors
 
-        # Return the result
-        return self.callback(value) if self.callback is not None else value
+    def __init__(self, arena: NodeArena, node: int):
+        """
+        Initializes the NodeView of the specified arena's node.
+        :param arena: The NodeArena containing the node
+        :param node: The index of the node
+        """
+        self.arena  = arena
+        self.node   = node
+
+    ## -------
+    ## Methods
+
+    def key(self):
+        """
+        Returns the key the node is attached with
+        :return: The key string
+        """
+        return self.arena.strings[self.arena.key[self.node]]
+
+    def parent(self):
+        """
+        Returns a view of the node's parent
+        :return: NodeView or None if the node is the root
+        """
+        return NodeView(self.arena, self.arena.parent[self.node]) if self.arena.parent[self.node] >= 0 else None
+
+    def items(self):
+        """
+        Returns the node's key-value pairs in insertion order; children are NodeViews
+        :return: generator of (key, value) pairs
+        """
+
+        # Retrieve the strings
+        strings = self.arena.strings
+
+        for key, value in self.arena.entries(self.node):
+
+            yield strings[key], strings[value] if value >= 0 else NodeView(self.arena, ~value)
+
+    def entries(self) -> MultiValueDict:
+        """
+        Returns the node's key-value pairs as a MultiValueDict whose children are NodeViews
+        :return: MultiValueDict
+        """
+
+        # Initialize the result
+        result = MultiValueDict()
+
+        for key, value in self.items(): result.add(key, value)
+
+        # Return the result
+        return result
+
+    def materialize(self) -> MultiValueDict:
+        """
+        Converts the node into the nested dictionary HTMLToDictionaryParser produces
+        :return: MultiValueDict
+        """
+        return TransformationPass()(self)
+
+    ## ---------
+    ## Overloads
+
+    def __len__(self) -> int:
+        """
+        Returns the amount of the node's entries
+        :return: The amount of entries
+        """
+        return self.arena.size[self.node]
+
+class HTMLToArenaParser(HTMLParser):
+    """
+    Parses an html file into a NodeArena; equivalent to HTMLToDictionaryParser without creating a dictionary per
+    element. The nested dictionaries are created by the TransformationEngine walking the root view, or by
+    dictionary().
+    """
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, filename: str, backend=None, source=None):
+        """
+        Default constructor. Initializes the HTMLToArenaParser to its' default state & parses the file.
+        :param filename: The string value corresponding to the html file to process
+        :param backend: The parser backend that reads the file; defaults to parser_backend()
+        :param source: Readable text stream to parse instead of the file; the filename is only recorded
+        """
+        super().__init__()
+
+        # Initialize the members
+        self.arena              = NodeArena()
+        self.attributes_index   = MultiValueDict()
+        self.keys_index         = MultiValueDict()
+        self.current            = self.arena.node('root', -1)
+        self.stack              = []
+        self.root               = self.arena.view(self.current)
+
+        # Record the filename
+        self.arena.append(self.current, 'filename', filename)
+
+        # Parse the file
+        (backend if backend is not None else parser_backend()).parse(source if source is not None else filename, self)
+
+    ## -------
+    ## Methods
+
+    def handle_starttag(self, tag: str, attributes: list[tuple[str, str]]) -> None:
+        """
+        Invoked when the HTMLToArenaParser has encountered an html opening tag. Opens a child node if the tag has a
+        class & appends the remaining attributes to the current node.
+        :param tag: The string value corresponding to the html tag
+        :param attributes: The html tag's specified attributes
+        """
+
+        # Check if the tag contained a set of attributes
+        if len(attributes) > 0:
+
+            # Convert the list into a dictionary
+            attributes = {key: value for key, value in attributes}
+
+            # If the attributes dictionary contains a key 'class'
+            if 'class' in attributes and attributes['class'] != '':
+
+                # Open the child
+                key             = HTMLToDictionaryParser.list_to_string(attributes.pop('class'))
+                self.stack.append(self.current)
+                self.current    = self.arena.node(key, self.current)
+
+                # Insert into the keys index
+                self.keys_index.add(key, True)
+
+            # Append the attributes to the current node
+            for key, value in attributes.items(): self.arena.append(self.current, key, value)
+
+    def handle_data(self, data: str) -> None:
+        """
+        Invoked when the HTMLToArenaParser has encountered data; appends it to the current node.
+        :param data: The string value corresponding to the data
+        """
+
+        # If we have valid data:
+        if data is not None:
+
+            # Scrub the data
+            data = re.sub(r'[\t\f\r\n ]+', ' ', data)
+
+            # If the data is not a single space, append it
+            if data != '' and data != ' ': self.arena.append(self.current, 'data', data)
+
+    def handle_endtag(self, tag: str) -> None:
+        """
+        Invoked when the HTMLToArenaParser has encountered an html closing tag. Closes the current node, attaching
+        it to its parent & indexing its values if it received anything.
+        :param tag: The string value corresponding to the html tag
+        """
+
+        if len(self.stack) > 0:
+
+            # Close the current child
+            child           = self.current
+            self.current    = self.stack.pop()
+
+            # If we even received anything
+            if self.arena.size[child] > 0:
+
+                # Attach the child & index its values
+                self.arena.attach(self.current, child)
+
+                for key, value in self.arena.scalars(child): self.attributes_index.add(key, value)
+
+            # Otherwise, release it
+            else: self.arena.release(child)
+
+    def index(self) -> dict:
+        """
+        Returns the resultant attributes index composed of the keys the parser encountered.
+        :return: dictionary containing the keys the parser encountered while processing the specified file
+        """
+        return self.attributes_index
+
+    def dictionary(self) -> dict:
+        """
+        Returns the nested dictionary corresponding to the html document the parser processed
+        :return: dictionary corresponding to the html document the parser processed.
+        """
+        return self.root.materialize()
+
+    def keys(self) -> dict:
+        """
+        Returns the resultant keys index corresponding to the html document the parser processed
+        :return: dictionary corresponding to the keys the parser encountered.
+        """
+        return self.keys_index
+
+CLIENTS = {}
+
+def client(service: str):
+    """
+    Returns the boto3 client of the specified service. Clients are created on first use & reused by the warm
+    invocations; boto3 is only imported then, so importing the module does no work beyond definitions.
+    :param service: The name of the service, e.g. 's3'
+    :return: The service's client
+    """
+
+    # If the client doesn't exist, create it
+    if service not in CLIENTS: CLIENTS[service] = importlib.import_module('boto3').client(service)
+
+    # Return the result
+    return CLIENTS[service]
+
+def handler(event, context):
+    """
+    Converts the html objects named by the S3 event's records or, if the event has none, every html object listed
+    under the event's input bucket & prefix. The converted objects are uploaded to the output bucket & the
+    consumed objects deleted.
+    :param event: The S3 notification or a dict with 'input_bucket', 'output_bucket' & optionally 'prefix'; a
+    false 'delete' keeps the consumed objects. 'format', 'compression' & 'consolidated' configure the OutputWriter;
+    a false 'manifest' converts every object, otherwise the conversions are recorded under the output bucket's
+    'manifest/' prefix
+    :param context: The lambda context
+    :return: dict of metrics
+    """
+
+    # Initialize the output bucket & the manifest
+    output_bucket   = event.get('output_bucket', os.environ.get('OUTPUT_BUCKET'))
+    manifest        = S3Manifest(client('s3'), output_bucket) if event.get('manifest', True) else None
+
+    # Initialize the processor
+    processor = S3Processor(client('s3'), output_bucket, delete=event.get('delete', True),
+                            writer=OutputWriter(event.get('format', 'compact'), event.get('compression'),
+                                                event.get('consolidated', False)),
+                            manifest=manifest)
+
+    # Retrieve the objects named by the event or list the input bucket
+    objects = S3Processor.objects_of(event)
+    objects = objects if len(objects) > 0 else processor.listing(event['input_bucket'], event.get('prefix', ''))
+
+    # Return the result of processing the objects; the process is frozen once we return, so write the events first
+    try: return processor(objects)
+
+    finally: Log.flush()
+
+def snake_case(value):
+
+    # Attempt to convert the value into a string
+    value = str(value) if not isinstance(value, str) else value
+
+    # Return the result of consolidating spaces of the lowercase string
+    return re.sub(r'[\t\f\r\n ]+', '_', value.lower())
+
+def traverse(data, callback):
+
+    # If the data is a list
+    if isinstance(data, list):
+
+        # Create a new list with the result of this method
+        data = [traverse(child, callback) for child in data]
+
+    # Otherwise, if the data is a dictionary
+    elif isinstance(data, dict):
+
+        # Set each key's value to the result of this method
+        data = MultiValueDict.of(data, ((key, traverse(child, callback)) for key, child in data.items()))
+
+    # Return the result of the callback, if any
+    return callback(data) if callback is not None else data
+
+def starts_with(key, other):
+
+    return key.startswith(other) if key is not None else False
+
+class MergeValueAsKeyCallback:
+    """
+    Defines a callback that converts a value to a key, and assigns an existing, sibling
+    value as it's value
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Scope = 'subtree'
+
+    ## -----------
+    ## Constructor
+
+    def __init__(self, value_to_key=None, key=None, transform=None, callback=None):
+
+        self.value_to_key   = value_to_key
+        self.key            = key
+        self.transform      = transform
+        self.callback       = callback
+
+    ## -------
+    ## Methods
+
+    def apply(self, value):
+        """
+        Converts the value_to_key value of the specified dictionary into a key with the sibling key's value,
+        without recurring into the dictionary's children.
+        :param value: The value to modify
+        :return: Potentially modified value
+        """
+
+        # If the value is a dictionary, we have a valid set of keys & the keys exist in the dictionary
+        if isinstance(value, dict) and self.value_to_key is not None and self.key is not None \
+                and self.value_to_key in value and self.key in value:
+
+            Log.debug('Converting %s to key with value %s', self.value_to_key, value[self.key], sample=100)
+
+            # Retrieve the value to be set as a key, and the corresponding value
+            new_key     = value[self.value_to_key]
+            existing    = value[self.key]
+
+            # If the value to be turned into a key is not empty
+            if not RemoveEmptyCallback.is_empty(new_key):
+
+                # Remove the existing key-value pairs
+                del value[self.value_to_key]
+                del value[self.key]
+
+                # If we have a transformation function, transform the key
+                if self.transform is not None: new_key = self.transform(new_key)
+
+                # Set the new key-value pair
+                HTMLToDictionaryParser.set_or_duplicate(value, new_key, existing)
+
+        # Return the result
+        return value
+
+    ## ---------
+    ## Overloads
+
+    def __call__(self, value):
+
+        # If the value is a list
+        if isinstance(value, list):
+
+            # Set the result to the modified list
+            value = [self(child) for child in value]
+
+        # Otherwise, if the value is a dictionary & if we have a valid set of keys
+        elif isinstance(value, dict) and self.value_to_key is not None and self.key is not None:
+
+            # Convert the value into a key
+            value = self.apply(value)
+
+            # Reset the value
+            value = MultiValueDict.of(value, ((key, self(child)) for key, child in value.items()))
+
+        # Return the result
+        return self.callback(value) if self.callback is not None else value
 
 class MergeLeavesCallback:
     """
     Defines a callback that merges the leaves of a piece of data onto the parent.
     """
 
+    ## -------------
+    ## Static Fields
+
+    Scope = 'subtree'
+
     ## --------------
     ## Static Methods
 
     @staticmethod
     def flatten(result, value):
 
-        Log.warn(f'Flattening {value}')
+        Log.debug('Flattening %s', value, sample=100)
 
         # If the value is a dictionary
         if isinstance(value, dict):
 
-            Log.warn(f'Value is dictionary')
-
             # Iterate through the key-value pairs
             for child_key, child in value.items():
 
@@ -476,15 +1239,13 @@ class MergeLeavesCallback:
         # Otherwise, if the value is a list
         elif isinstance(value, list):
 
-            Log.warn(f'Value is list')
-
             # Recur on the children
             value = [MergeLeavesCallback.flatten(result, child) for child in value]
 
             # Filter out the empty results
             value = [child for child in value if not RemoveEmptyCallback.is_empty(child)]
 
-        Log.warn(f'Result: {value}')
+        Log.debug('Result: %s', value, sample=100)
 
         # Finally, return the result
         return value
@@ -514,7 +1275,7 @@ class MergeLeavesCallback:
                 for key in found_keys:
 
                     # Initialize the result
-                    result = {}
+                    result = MultiValueDict()
 
                     # Flatten the value into the result
                     MergeLeavesCallback.flatten(result, value[key])
@@ -533,6 +1294,11 @@ class RemoveKeyCallback:
     Defines a callback that recursively removes the specified key from a given value
     """
 
+    ## -------------
+    ## Static Fields
+
+    Scope = 'key'
+
     ## ------------
     ## Constructors
 
@@ -563,7 +1329,7 @@ class RemoveKeyCallback:
             if self.key in value:
 
                 # Report the event
-                Log.info(f'Removing {self.key}: {value[self.key]}')
+                Log.debug('Removing %s: %s', self.key, value[self.key], sample=100)
 
                 # Remove it
                 del value[self.key]
@@ -576,6 +1342,11 @@ class RemoveEmptyCallback:
     Defines a callback that returns a filtered list; specifically checked against empty values.
     """
 
+    ## -------------
+    ## Static Fields
+
+    Scope = 'subtree'
+
     ## --------------
     ## Static Methods
 
@@ -621,7 +1392,8 @@ class RemoveEmptyCallback:
         elif isinstance(value, dict):
 
             # Set the value to a filtered dictionary
-            value = {key: child for key, child in value.items() if not RemoveEmptyCallback.is_empty(child)}
+            value = MultiValueDict.of(value, ((key, child) for key, child in value.items()
+                                              if not RemoveEmptyCallback.is_empty(child)))
 
         # Finally, return the value
         return self.callback(value) if self.callback is not None else value
@@ -632,6 +1404,11 @@ class PullSingleUpCallback:
     the parent
     """
 
+    ## -------------
+    ## Static Fields
+
+    Scope = 'subtree'
+
     ## ------------
     ## Constructors
 
@@ -640,6 +1417,15 @@ class PullSingleUpCallback:
         self.key        = None
         self.callback   = callback
 
+    ## -------
+    ## Methods
+
+    def reset(self):
+        """
+        Clears the key carried over from the last walk so that it doesn't prefix the next document's keys
+        """
+        self.key = None
+
     ## ---------
     ## Overloads
 
@@ -668,7 +1454,7 @@ class PullSingleUpCallback:
                 if self.key == 'data':
 
                     # Report the event
-                    Log.info(f'Pulling member {value[self.key]} up')
+                    Log.debug('Pulling member %s up', value[self.key], sample=100)
 
                     # Set the result
                     result = value[self.key]
@@ -683,7 +1469,7 @@ class PullSingleUpCallback:
             else:
 
                 # Initialize the result
-                new_value = {}
+                new_value = MultiValueDict()
                 remove_keys = []
 
                 # Iterate through the key value pairs
@@ -699,7 +1485,7 @@ class PullSingleUpCallback:
                     new_key = f'{key} {self.key}' if self.key is not None else key
 
                     # Report the event
-                    Log.info(f'Writing {key}: {value[key]} to {new_key}: {result}')
+                    Log.debug('Writing %s: %s to %s: %s', key, value[key], new_key, result, sample=100)
 
                     # Initialize the key-value pair
                     HTMLToDictionaryParser.set_or_duplicate(new_value, new_key, result)
@@ -716,145 +1502,2392 @@ class PullSingleUpCallback:
         # Return the result
         return self.callback(value) if self.callback is not None else value
 
-## ------------
-## Script Start
+class RemoveKeysCallback:
+    """
+    Defines a callback that removes any of the specified keys from a given value with a single set-membership
+    test per key
+    """
 
-mega_index  = {}
-mega_keys   = {}
+    ## -------------
+    ## Static Fields
 
-remove_duplicated   = RemoveKeyCallback('duplicated')
-pull_single_members = PullSingleUpCallback()
+    Scope = 'key'
 
-for filename in os.listdir('sample'):
+    ## ------------
+    ## Constructors
 
-    FILENAME = filename
+    def __init__(self, keys=None, callback=None):
+        """
+        Initializes the RemoveKeysCallback with the specified keys and callback
+        :param keys: The set of keys to potentially remove
+        :param callback: The callback to invoke after key removal
+        """
+        self.keys       = set(keys) if keys is not None else set()
+        self.callback   = callback
 
-    # Start the parser
-    parser = HTMLToDictionaryParser(f'sample/{filename}')
+    ## ---------
+    ## Overloads
 
-    # Remove the 'duplicated' keys
-    dictionary = traverse(parser.dictionary(), remove_duplicated)
+    def __call__(self, value):
+        """
+        Removes any key-value pairs whose key is contained in the set of keys.
+        :param value: The value to delete the keys from
+        :return: Potentially modified value
+        """
 
-    # Remove the 'footer--container' key
-    dictionary = traverse(dictionary, RemoveKeyCallback('footer--container'))
+        # If the value is a dictionary
+        if isinstance(value, dict):
 
-    # Remove the 'login-more' key
-    dictionary = traverse(dictionary, RemoveKeyCallback('login-more'))
+            # Remove the matching keys
+            for key in [key for key in value if key in self.keys]: del value[key]
 
-    # Remove the 'hide-comments--wrapper' key
-    dictionary = traverse(dictionary, RemoveKeyCallback('hide-comments--wrapper'))
+        # Return the result of the value passed through the callback, if any
+        return self.callback(value) if self.callback is not None else value
 
-    # Remove the 'show-comments--wrapper' key
-    dictionary = traverse(dictionary, RemoveKeyCallback('show-comments--wrapper'))
+class ForgetMultipleCallback:
+    """
+    Defines a callback that forgets which keys of a given value hold multiple values, as removing the 'duplicated'
+    keys did; a later duplicate of such a key nests the list of values instead of being appended to it
+    """
 
-    # Remove the 'impressions-icon--wrapper' key
-    dictionary = traverse(dictionary, RemoveKeyCallback('impressions--icon--wrapper'))
+    ## -------------
+    ## Static Fields
 
-    # Remove the 'mc-video--link--icon' key
-    dictionary = traverse(dictionary, RemoveKeyCallback('mc-video--link--icon'))
+    Scope = 'node'
 
-    # Remove the 'id' key
-    dictionary = traverse(dictionary, RemoveKeyCallback('id'))
+    ## ------------
+    ## Constructors
 
-    # Remove the 'type' key
-    dictionary = traverse(dictionary, RemoveKeyCallback('type'))
+    def __init__(self, callback=None):
+        """
+        Initializes the ForgetMultipleCallback with the specified callback
+        :param callback: The callback to invoke after the keys are forgotten
+        """
+        self.callback = callback
 
-    # Remove the 'onclick' key
-    dictionary = traverse(dictionary, RemoveKeyCallback('onclick'))
+    ## ---------
+    ## Overloads
 
-    # Merge the echo fields
-    dictionary = traverse(dictionary, MergeLeavesCallback('eb--col', condition=starts_with))
+    def __call__(self, value):
+        """
+        Clears the multi-valued keys of the specified value
+        :param value: The value whose multi-valued keys to forget
+        :return: The value
+        """
+
+        # If the value tracks its multi-valued keys, forget them
+        if isinstance(value, MultiValueDict): value.multiple.clear()
+
+        # Return the result of the value passed through the callback, if any
+        return self.callback(value) if self.callback is not None else value
+
+class TransformationPass:
+    """
+    Defines a single bottom-up walk that applies a fused sequence of rules. Keys in the removed set are dropped
+    before their values are walked; the operations are then applied in order to each value after its children.
+    The rules only rewrite dictionaries & lists, so scalar leaves are carried over without invoking them. Arena
+    NodeViews are walked as dictionaries; removed keys are never converted.
+    """
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self):
+        """
+        Initializes the TransformationPass to its' default state.
+        """
+        self.removed    = set()
+        self.operations = []
+
+    ## ---------
+    ## Overloads
+
+    def __call__(self, data):
+        """
+        Walks the specified data, returning the transformed result
+        :param data: The value to transform
+        :return: Transformed value
+        """
+
+        # If the data is an arena node, read its entries; its children are created as they're walked
+        if isinstance(data, NodeView): data = data.entries()
+
+        # If the data is a list
+        if isinstance(data, list):
+
+            # Create a new list with the result of this method
+            data = [self(child) if isinstance(child, (dict, list, NodeView)) else child for child in data]
+
+        # Otherwise, if the data is a dictionary
+        elif isinstance(data, dict):
+
+            # Set each retained key's value to the result of this method
+            data = MultiValueDict.of(data, {key: self(child) if isinstance(child, (dict, list, NodeView)) else child
+                                            for key, child in data.items() if key not in self.removed})
+
+        # Apply the operations in order
+        for operation in self.operations: data = operation(data)
+
+        # Return the result
+        return data
+
+class TransformationEngine:
+    """
+    Composes a declared list of rules into as few tree walks as their dependencies allow. Each rule declares
+    its Scope:
+        key     | Removes a key; consecutive removals are fused into one set-membership test per key
+        node    | Only reads & rewrites the keys of the value it's given
+        subtree | Reads its descendants, which must not have seen any later rule; ends the current walk
+    Rules that define apply are invoked through it once per value instead of recurring themselves. Rules that
+    define reset carry state across values & are reset before each document. The result is identical to traversing
+    the data once per rule, in order.
+    """
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def compose(rules: list) -> list:
+        """
+        Groups the specified rules into TransformationPasses
+        :param rules: The rules to compose, in order
+        :return: list of TransformationPasses
+        """
+
+        # Initialize the result
+        passes = [TransformationPass()]
+
+        # Iterate through the rules
+        for rule in rules:
+
+            # Retrieve the current pass & the rule's scope; chained callbacks are opaque
+            current = passes[-1]
+            scope   = getattr(rule, 'Scope', 'subtree') if getattr(rule, 'callback', None) is None else 'subtree'
+
+            # If the rule removes keys
+            if scope == 'key':
+
+                # Retrieve the keys
+                keys = rule.keys if isinstance(rule, RemoveKeysCallback) else {rule.key} - {None}
+
+                # Keys removed before any operation are dropped on the way down
+                if len(current.operations) == 0: current.removed |= keys
+
+                # Otherwise, fuse them with a preceding removal
+                elif isinstance(current.operations[-1], RemoveKeysCallback): current.operations[-1].keys |= keys
+
+                # Otherwise, append a removal
+                else: current.operations.append(RemoveKeysCallback(keys))
+
+            # Otherwise, if the rule only touches the value it's given
+            elif scope == 'node': current.operations.append(getattr(rule, 'apply', rule))
+
+            # Otherwise, the rule ends the pass
+            else:
+
+                current.operations.append(getattr(rule, 'apply', rule))
+                passes.append(TransformationPass())
+
+        # Return the result without a trailing empty pass
+        return [transformation for transformation in passes
+                if len(transformation.removed) > 0 or len(transformation.operations) > 0]
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, rules: list):
+        """
+        Initializes the TransformationEngine with the specified rules.
+        :param rules: The rules to apply, in order
+        """
+        self.rules      = rules
+        self.stateful   = [rule for rule in rules if hasattr(rule, 'reset')]
+        self.passes     = TransformationEngine.compose(rules)
+
+    ## -------
+    ## Methods
+
+    def sequential(self, data):
+        """
+        Applies the rules with one traversal per rule. This is the reference the composed passes must match.
+        :param data: The value to transform
+        :return: Transformed value
+        """
+
+        # Convert arena nodes
+        if isinstance(data, NodeView): data = data.materialize()
+
+        # Reset the rules' state
+        for rule in self.stateful: rule.reset()
+
+        # Traverse once per rule
+        for rule in self.rules: data = traverse(data, rule)
+
+        # Return the result
+        return data
+
+    ## ---------
+    ## Overloads
+
+    def __call__(self, data):
+        """
+        Applies the composed passes to the specified data
+        :param data: The value or NodeView to transform
+        :return: Transformed value
+        """
+
+        # Convert arena nodes if there's no pass to walk them
+        if isinstance(data, NodeView) and len(self.passes) == 0: data = data.materialize()
+
+        # Reset the rules' state
+        for rule in self.stateful: rule.reset()
+
+        # Walk once per pass
+        for transformation in self.passes: data = transformation(data)
+
+        # Return the result
+        return data
+
+class PostExtractor(HTMLParser):
+    """
+    A streaming HTML parser that emits flat post records as the page is read, instead of building the page's
+    dictionary. Class-keyed elements are matched against a compiled table of selectors:
+        record  | The element's sections are collected into a post record, emitted when it closes
+        section | The element's subtree is built like HTMLToDictionaryParser would, transformed with the rules &
+                  its leaves are merged into the innermost open record under the selector's field
+    Elements outside of any section are discarded as they're read, so the memory is proportional to the element
+    stack & the open sections rather than the page. A trailing '*' matches any class string with that prefix.
+    Since any closing tag closes the innermost classed element, a record may close before its trailing sections
+    (e.g. the footer); sections outside of any open record are merged into the last closed record, which is
+    emitted once the next record starts or the page ends.
+    Attributes
+    ----------
+    records : list
+        The emitted records, if no emit callback was specified
+    """
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def compile(selectors: list) -> tuple:
+        """
+        Compiles the specified selectors into an exact-match dictionary & a list of prefixes
+        :param selectors: list of (pattern, kind) tuples
+        :return: tuple of the exact dictionary & the prefix list, mapping to (field, kind) tuples
+        """
+
+        # Initialize the result
+        exact, prefixes = {}, []
+
+        # Iterate through the selectors
+        for pattern, kind in selectors:
+
+            # If the pattern is a prefix, append it; otherwise, set it
+            if pattern.endswith('*'): prefixes.append((pattern[:-1], (pattern[:-1], kind)))
+            else: exact[pattern] = (pattern, kind)
+
+        # Return the result
+        return exact, prefixes
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, selectors: list = None, emit=None, rules: list = None, backend=None):
+        """
+        Initializes the PostExtractor with the specified selectors, callback, rules & parser backend.
+        :param selectors: list of (pattern, kind) tuples; defaults to POST_SELECTORS
+        :param emit: Callable invoked with each record as it closes; the records are kept otherwise
+        :param rules: The rules applied to each section; defaults to RULES without the rules that only reshape
+        the keys of a section that's flattened anyway
+        :param backend: The parser backend that reads the files; defaults to parser_backend()
+        """
+        super().__init__()
+
+        # Initialize the members
+        self.exact, self.prefixes   = PostExtractor.compile(selectors if selectors is not None else POST_SELECTORS)
+        self.matches                = {}
+        self.transform              = TransformationEngine(rules if rules is not None else
+                                                           [rule for rule in RULES if not isinstance(
+                                                               rule, (MergeLeavesCallback, PullSingleUpCallback))])
+        self.emit                   = emit
+        self.backend                = backend if backend is not None else parser_backend()
+        self.records                = []
+        self.stack                  = []
+        self.open_records           = []
+        self.last                   = None
+        self.current                = None
+
+    ## -------
+    ## Methods
+
+    def match(self, key: str):
+        """
+        Returns the field & kind of the selector matching the specified class string, if any
+        :param key: The class string
+        :return: (field, kind) tuple or None
+        """
+
+        # If we haven't matched the key before
+        if key not in self.matches:
+
+            # Match the exact selectors, then the prefixes
+            result = self.exact.get(key)
+
+            for prefix, selected in self.prefixes:
+
+                if result is None and key.startswith(prefix): result = selected
+
+            # Cache the match
+            self.matches[key] = result
+
+        # Return the result
+        return self.matches[key]
+
+    def flush(self) -> None:
+        """
+        Emits the last closed record, if any.
+        """
+
+        # If there's a closed record, emit it
+        if self.last is not None:
+
+            if self.emit is not None: self.emit(self.last)
+            else: self.records.append(self.last)
+
+        # Clear it
+        self.last = None
+
+    def close(self) -> None:
+        """
+        Closes the parser & emits the last closed record.
+        """
+        super().close()
+        self.flush()
+
+    def extract(self, filename: str) -> list:
+        """
+        Feeds the specified file, returning the records emitted while reading it
+        :param filename: The html file to read
+        :return: list of records
+        """
+
+        # Reset the parser & clear the records & any elements left open by the previous file
+        self.reset()
+
+        self.records, self.stack, self.open_records, self.last, self.current = [], [], [], None, None
+
+        # Parse the file
+        self.backend.parse(filename, self)
+
+        # Close the parser & return the result
+        self.close()
+
+        return self.records
+
+    def handle_starttag(self, tag: str, attributes: list[tuple[str, str]]) -> None:
+        """
+        Invoked when the PostExtractor has encountered an html opening tag. Classed elements are pushed onto the
+        stack; the remaining attributes are kept only within a section.
+        :param tag: The string value corresponding to the html tag
+        :param attributes: The html tag's specified attributes
+        """
+
+        # If the tag has no attributes, there's nothing to do
+        if len(attributes) == 0: return
+
+        # Convert the list into a dictionary
+        attributes = {key: value for key, value in attributes}
+
+        # If the attributes dictionary contains a class
+        if attributes.get('class', '') != '':
+
+            # Initialize the key & match it
+            key         = HTMLToDictionaryParser.list_to_string(attributes.pop('class'))
+            selected    = self.match(key)
+
+            # Start a record, if selected, emitting the last closed record
+            if selected is not None and selected[1] == 'record':
+
+                self.flush()
+                self.open_records.append(MultiValueDict())
+
+            # Start a child if we're within a section or this starts one
+            child = MultiValueDict() \
+                if self.current is not None or (selected is not None and selected[1] == 'section') else None
+
+            # Push the element
+            self.stack.append((key, selected, self.current))
+            self.current = child
+
+        # Keep the attributes if we're within a section
+        if self.current is not None:
+
+            for key, value in attributes.items(): self.current.add(key, value)
+
+    def handle_data(self, data: str) -> None:
+        """
+        Invoked when the PostExtractor has encountered data; the data is kept only within a section.
+        :param data: The string value corresponding to the data
+        """
+
+        # If we're within a section & we have valid data
+        if self.current is not None and data is not None:
+
+            # Scrub the data
+            data = re.sub(r'[\t\f\r\n ]+', ' ', data)
+
+            # Set the data if it's not a single space
+            if data != '' and data != ' ': self.current.add('data', data)
+
+    def handle_endtag(self, tag: str) -> None:
+        """
+        Invoked when the PostExtractor has encountered an html closing tag. Like HTMLToDictionaryParser, any
+        closing tag closes the innermost classed element.
+        :param tag: The string value corresponding to the html tag
+        """
+
+        # If there's nothing open, leave
+        if len(self.stack) == 0: return
+
+        # Pop the element
+        key, selected, parent   = self.stack.pop()
+        child                   = self.current
+        self.current            = parent
+
+        # If the child received anything
+        if child is not None and len(child) > 0:
+
+            # Set it onto the parent if the parent is within a section
+            if parent is not None: parent.add(key, child)
+
+            # Retrieve the record the section belongs to
+            record = self.open_records[-1] if len(self.open_records) > 0 else self.last
+
+            # If the element is a section of a record
+            if selected is not None and selected[1] == 'section' and record is not None:
+
+                # Transform the section & merge its leaves into the record
+                leaves = MultiValueDict()
+                MergeLeavesCallback.flatten(leaves, self.transform(MultiValueDict({key: child})))
+
+                if len(leaves) > 0: record.add(selected[0], leaves)
+
+        # If the element is a record, close it, emitting the previous one
+        if selected is not None and selected[1] == 'record':
+
+            self.flush()
+            self.last = self.open_records.pop()
+
+def leaves_of(value, result: list = None) -> list:
+    """
+    Returns the non-empty scalar leaves of the specified value
+    :param value: The value to collect the leaves of
+    :param result: The list to append the leaves to
+    :return: list of leaves
+    """
+
+    # Initialize the result
+    result = result if result is not None else []
+
+    # If the value is a container, recur on the children; otherwise, append it if it's not empty
+    if isinstance(value, dict):
+        for child in value.values(): leaves_of(child, result)
+    elif isinstance(value, list):
+        for child in value: leaves_of(child, result)
+    elif not RemoveEmptyCallback.is_empty(value): result.append(value)
+
+    # Return the result
+    return result
+
+def selected_leaves(value, extractor: PostExtractor, result: dict) -> dict:
+    """
+    Collects the leaves found under the keys of the specified transformed dictionary that match the extractor's
+    section selectors. The rules may append the child keys to a key, so only the key's first class is matched.
+    :param value: The transformed dictionary
+    :param extractor: The PostExtractor whose selectors to match
+    :param result: dict of field to the list of leaves
+    :return: dict of field to the list of leaves
+    """
+
+    # If the value is a dictionary
+    if isinstance(value, dict):
+
+        # Iterate through the key-value pairs
+        for key, child in value.items():
+
+            # Match the key
+            selected = extractor.match(key.split(' ')[0]) if isinstance(key, str) else None
+
+            # If it's a section, collect its leaves
+            if selected is not None and selected[1] == 'section': leaves_of(child, result.setdefault(selected[0], []))
+
+            # Recur on the child
+            selected_leaves(child, extractor, result)
+
+    # Otherwise, if the value is a list, recur on the children
+    elif isinstance(value, list):
+
+        for child in value: selected_leaves(child, extractor, result)
+
+    # Return the result
+    return result
+
+def validate_extraction(filenames: list) -> dict:
+    """
+    Validates the PostExtractor against the transformed dictionaries of the specified pages. For each section
+    field, the leaf values the extractor emitted must be the leaf values found under the matching keys of the
+    transformed dictionary; fields the rules rename have no matching keys & are reported as unvalidated.
+    :param filenames: The html files to validate
+    :return: dict of field to the amount of matching, mismatching & unvalidated pages & the mismatching files
+    """
+
+    # Initialize the extractor, the transformation & the result
+    extractor   = PostExtractor()
+    transform   = TransformationEngine(RULES)
+    result      = {}
+
+    # Iterate through the pages
+    for filename in filenames:
+
+        # Extract the records & collect the leaves of the transformed page
+        records     = extractor.extract(filename)
+        expected    = selected_leaves(transform(HTMLToDictionaryParser(filename).dictionary()), extractor, {})
+        emitted     = {}
+
+        for record in records:
+            for field, sections in record.items(): leaves_of(sections, emitted.setdefault(field, []))
+
+        # Compare the multisets of leaf values of each field
+        for field in set(expected) | set(emitted):
+
+            # Initialize the field's counts
+            counts = result.setdefault(field, {'matching': 0, 'mismatching': 0, 'unvalidated': 0, 'files': []})
+
+            # If the rules renamed the field's keys, we can't validate it
+            if field not in expected: counts['unvalidated'] += 1
+
+            # Otherwise, if the leaves match
+            elif sorted(expected[field]) == sorted(emitted.get(field, [])): counts['matching'] += 1
+
+            # Otherwise, we have a mismatch
+            else:
+
+                counts['mismatching'] += 1
+                counts['files'].append(filename)
+
+    # Return the result
+    return result
+
+def benchmark_backends(filenames: list, names: list = None, repeat: int = 3) -> dict:
+    """
+    Times HTMLToDictionaryParser with each installed parser backend over the specified pages & checks that the
+    dictionaries, indexes & keys they produce are identical to the stdlib parser's.
+    :param filenames: The html files to parse
+    :param names: The names of the backends to compare; defaults to every backend
+    :param repeat: The amount of times each page is parsed; the fastest time is kept
+    :return: dict of backend name to its seconds per page, speedup & equivalence
+    """
+
+    # Initialize the backends & the result
+    backends    = [backend() for backend in PARSER_BACKENDS
+                   if (names is None or backend.Name in names) and backend.available()]
+    result      = {}
+    reference   = {}
+
+    # Iterate through the backends; the stdlib parser comes first
+    for backend in backends:
+
+        # Initialize the counts
+        elapsed, mismatching = 0.0, []
+
+        # Iterate through the pages
+        for filename in filenames:
+
+            # Time the parser, keeping the fastest run
+            times = []
+
+            for _ in range(repeat):
+
+                start   = time.perf_counter()
+                parser  = HTMLToDictionaryParser(filename, backend)
+                times.append(time.perf_counter() - start)
+
+            elapsed += min(times)
+
+            # Serialize the output & compare it with the stdlib parser's
+            output = json.dumps([parser.dictionary(), parser.index(), parser.keys()])
+
+            if backend.Name == HTMLParserBackend.Name: reference[filename] = output
+
+            elif output != reference.get(filename, output): mismatching.append(filename)
+
+        # Set the backend's results
+        result[backend.Name] = {
+            'seconds_per_page': elapsed / max(len(filenames), 1),
+            'equivalent':       len(filenames) - len(mismatching),
+            'mismatching':      mismatching
+        }
+
+    # Set the speedups relative to the stdlib parser
+    for name, metrics in result.items():
+
+        metrics['speedup'] = result[HTMLParserBackend.Name]['seconds_per_page'] / max(metrics['seconds_per_page'], 1e-9) \
+            if HTMLParserBackend.Name in result else None
+
+    # Return the result
+    return result
+
+class ValueSummary:
+    """
+    Bounded summary of the values of one key:
+        count       | The amount of values
+        distinct    | HyperLogLog estimate of the amount of distinct values; exact while there are few
+        top         | SpaceSaving heavy hitters as (value, count, error) tuples
+        sample      | Bottom-k sample of the distinct values; the values with the smallest hashes
+        types       | The amount of values of each inferred type
+    The memory is bounded by the static fields. Summaries merge into the same result regardless of how the values
+    were split, except for the heavy hitters' counts once more values than the capacity compete.
+    """
+
+    ## -------------
+    ## Static Fields
+
+    __slots__ = ('count', 'hashes', 'registers', 'top', 'errors', 'sample', 'types')
+
+    Precision   = 11
+    Sparse      = 64
+    Capacity    = 16
+    Reservoir   = 8
+    Truncate    = 256
+    Patterns    = [('integer', re.compile(r'-?[0-9]+')),
+                   ('number', re.compile(r'-?[0-9]*\.[0-9]+([eE][-+]?[0-9]+)?')),
+                   ('url', re.compile(r'(https?:)?//\S*|/\S*')),
+                   ('empty', re.compile(r'\s*'))]
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def hash_of(value) -> int:
+        """
+        Returns the stable 64-bit hash of the specified value; unlike hash(), it's equal across processes
+        :param value: The value to hash
+        :return: The hash
+        """
+        return int.from_bytes(hashlib.blake2b(f'{type(value).__name__}:{value}'.encode('utf-8', 'replace'),
+                                              digest_size=8).digest(), 'little')
+
+    @staticmethod
+    def type_of(value) -> str:
+        """
+        Returns the inferred type of the specified value
+        :param value: The value
+        :return: 'null', 'boolean', 'integer', 'number', 'url', 'empty', 'string' or the value's type name
+        """
+
+        # If the value is not a string, name its type
+        if value is None: return 'null'
+
+        if isinstance(value, bool): return 'boolean'
+
+        if not isinstance(value, str): return type(value).__name__
+
+        # Otherwise, return the first matching pattern
+        for name, pattern in ValueSummary.Patterns:
+
+            if pattern.fullmatch(value) is not None: return name
+
+        return 'string'
+
+    @staticmethod
+    def from_dict(source: dict):
+        """
+        Returns the summary persisted as the specified dictionary
+        :param source: The dictionary produced by to_dict
+        :return: ValueSummary
+        """
+
+        # Initialize the result
+        result          = ValueSummary()
+        result.count    = source['count']
+        result.types    = dict(source['types'])
+        result.sample   = {int(hashed): value for hashed, value in source['sample']}
+
+        # Restore the heavy hitters
+        for value, count, error in source['top']:
+
+            result.top[value]       = count
+            result.errors[value]    = error
+
+        # Restore the distinct hashes or the registers
+        if source.get('registers') is not None: result.registers = bytearray(base64.b64decode(source['registers']))
+
+        else: result.hashes = set(int(hashed) for hashed in source['hashes'])
+
+        # Return the result
+        return result
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self):
+        """
+        Initializes the ValueSummary to its' default state.
+        """
+        self.count      = 0
+        self.hashes     = set()
+        self.registers  = None
+        self.top        = {}
+        self.errors     = {}
+        self.sample     = {}
+        self.types      = {}
+
+    ## -------
+    ## Methods
+
+    def observe(self, hashed: int) -> None:
+        """
+        Adds the specified hash to the distinct estimate; switches from the exact set to the registers once the
+        set exceeds the sparse limit
+        :param hashed: The value's hash
+        """
+
+        # If we're still exact, add the hash & leave unless we exceeded the limit
+        if self.registers is None:
+
+            self.hashes.add(hashed)
+
+            if len(self.hashes) <= ValueSummary.Sparse: return
+
+            # Convert the set into registers
+            self.registers, hashes, self.hashes = bytearray(1 << ValueSummary.Precision), self.hashes, set()
+
+            for hashed in hashes: self.observe(hashed)
+
+            return
+
+        # Select the register with the top bits & rank the remaining bits by their leading zeros
+        width       = 64 - ValueSummary.Precision
+        index       = hashed >> width
+        rank        = width - (hashed & ((1 << width) - 1)).bit_length() + 1
+
+        # Keep the maximum rank
+        if rank > self.registers[index]: self.registers[index] = rank
+
+    def count_top(self, value, count: int, error: int) -> None:
+        """
+        Adds the specified count of the value to the heavy hitters, replacing the minimum if they're full
+        :param value: The (truncated) value
+        :param count: The amount of occurrences
+        :param error: The error of the count
+        """
+
+        # If we're tracking the value or have space, count it
+        if value in self.top or len(self.top) < ValueSummary.Capacity:
+
+            self.top[value]     = self.top.get(value, 0) + count
+            self.errors[value]  = self.errors.get(value, 0) + error
+
+            return
+
+        # Otherwise, replace the minimum; the new value inherits its count as the error
+        minimum = min(self.top, key=self.top.get)
+        floor   = self.top.pop(minimum)
+
+        del self.errors[minimum]
+
+        self.top[value]     = floor + count
+        self.errors[value]  = floor + error
+
+    def keep_sample(self, hashed: int, value) -> None:
+        """
+        Adds the specified value to the sample if its hash is among the smallest
+        :param hashed: The value's hash
+        :param value: The (truncated) value
+        """
+
+        # If the value is sampled, leave
+        if hashed in self.sample: return
+
+        # If there's space, keep it
+        if len(self.sample) < ValueSummary.Reservoir: self.sample[hashed] = value
+
+        # Otherwise, if its hash is smaller than the largest, replace it
+        else:
+
+            largest = max(self.sample)
+
+            if hashed < largest:
+
+                del self.sample[largest]
+                self.sample[hashed] = value
+
+    def add(self, value) -> None:
+        """
+        Adds the specified value
+        :param value: The value
+        """
+
+        # Initialize the hash & the truncated value
+        hashed      = ValueSummary.hash_of(value)
+        truncated   = value[:ValueSummary.Truncate] if isinstance(value, str) else value
+        kind        = ValueSummary.type_of(value)
+
+        # Update the summary
+        self.count      += 1
+        self.types[kind] = self.types.get(kind, 0) + 1
+
+        self.observe(hashed)
+        self.count_top(truncated, 1, 0)
+        self.keep_sample(hashed, truncated)
+
+    def distinct(self) -> float:
+        """
+        Returns the estimated amount of distinct values
+        :return: The cardinality estimate
+        """
+
+        # If we're exact, return the amount of hashes
+        if self.registers is None: return float(len(self.hashes))
+
+        # Compute the raw estimate
+        size        = len(self.registers)
+        estimate    = 0.7213 / (1 + 1.079 / size) * size * size / sum(2.0 ** -rank for rank in self.registers)
+
+        # Use linear counting for small cardinalities
+        zeros = self.registers.count(0)
+
+        if estimate <= 2.5 * size and zeros > 0: estimate = size * math.log(size / zeros)
+
+        # Return the result
+        return estimate
+
+    def merge(self, other) -> None:
+        """
+        Merges the specified summary into this summary
+        :param other: The ValueSummary to merge
+        """
+
+        # Merge the counts & types
+        self.count += other.count
+
+        for kind, count in other.types.items(): self.types[kind] = self.types.get(kind, 0) + count
+
+        # Merge the distinct estimate
+        if other.registers is not None and self.registers is None:
+
+            self.registers, hashes, self.hashes = bytearray(other.registers), self.hashes, set()
+
+            for hashed in hashes: self.observe(hashed)
+
+        elif other.registers is not None:
+
+            self.registers = bytearray(max(left, right) for left, right in zip(self.registers, other.registers))
+
+        else:
+
+            for hashed in other.hashes: self.observe(hashed)
+
+        # Merge the heavy hitters & the sample
+        for value, count in other.top.items(): self.count_top(value, count, other.errors[value])
+
+        for hashed, value in other.sample.items(): self.keep_sample(hashed, value)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the summary as a json-serializable dictionary; from_dict restores it
+        :return: dict
+        """
+        return {'count': self.count, 'distinct': round(self.distinct()), 'types': self.types,
+                'top': [[value, self.top[value], self.errors[value]]
+                        for value in sorted(self.top, key=self.top.get, reverse=True)],
+                'sample': [[str(hashed), self.sample[hashed]] for hashed in sorted(self.sample)],
+                'hashes': [str(hashed) for hashed in sorted(self.hashes)] if self.registers is None else None,
+                'registers': base64.b64encode(bytes(self.registers)).decode('ascii')
+                if self.registers is not None else None}
+
+class SchemaSummary:
+    """
+    Bounded schema-discovery summary of an index: a ValueSummary per key. Replaces merging every value of every page
+    into the mega index & keys; summaries of different batches, workers or runs merge into one another & save()
+    accumulates into the persisted summary.
+    """
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def load(path: str):
+        """
+        Loads the summary persisted at the specified path
+        :param path: The path of the json file
+        :return: SchemaSummary
+        """
+
+        # Initialize the result
+        result = SchemaSummary()
+
+        with open(path, 'r', encoding='utf-8') as input_file:
+
+            for key, summary in json.load(input_file).items(): result.keys[key] = ValueSummary.from_dict(summary)
+
+        # Return the result
+        return result
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self):
+        """
+        Initializes the SchemaSummary to its' default state.
+        """
+        self.keys = {}
+
+    ## -------
+    ## Methods
+
+    def add(self, index: dict) -> None:
+        """
+        Adds the values of the specified page index; the values of a multi-valued key are added one at a time
+        :param index: The page's index
+        """
+
+        # Iterate through the key-value pairs
+        for key, value in index.items():
+
+            # Retrieve the key's summary
+            summary = self.keys.get(key)
+
+            if summary is None: summary = self.keys[key] = ValueSummary()
+
+            # Add the values
+            for child in (value if isinstance(value, list) else [value]): summary.add(child)
+
+    def merge(self, other) -> None:
+        """
+        Merges the specified summary into this summary
+        :param other: The SchemaSummary to merge
+        """
+
+        for key, summary in other.keys.items():
+
+            if key in self.keys: self.keys[key].merge(summary)
+
+            else: self.keys[key] = summary
+
+    def to_dict(self) -> dict:
+        """
+        Returns the summary as a json-serializable dictionary
+        :return: dict of the keys' summaries
+        """
+        return {key: summary.to_dict() for key, summary in self.keys.items()}
+
+    def save(self, path: str) -> None:
+        """
+        Saves the summary to the specified path, merging it with the summary already persisted there. The file is
+        replaced atomically.
+        :param path: The path of the json file
+        """
+
+        # Initialize the result
+        result = SchemaSummary()
+
+        # If a summary was already persisted, merge into it
+        if os.path.isfile(path): result = SchemaSummary.load(path)
+
+        result.merge(self)
+
+        # Write to a temporary file & replace
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as output_file:
+
+            json.dump(result.to_dict(), output_file, indent=4)
+
+        os.replace(f'{path}.tmp', path)
+
+class PartialReduction:
+    """
+    Combines partial results with a tree reduction as they arrive: a partial is merged with the last partial of the
+    same level, so each value is merged O(log n) times & only O(log n) partials are held. Partials are combined in
+    arrival order.
+    """
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, combine):
+        """
+        Initializes the PartialReduction with the specified combining function.
+        :param combine: Callable combining two partials, left & right, into the returned partial
+        """
+        self.combine    = combine
+        self.stack      = []
+
+    ## -------
+    ## Methods
+
+    def add(self, partial) -> None:
+        """
+        Adds the specified partial, merging it with the partials of the same level
+        :param partial: The partial result
+        """
+
+        # Initialize the level
+        level = 0
+
+        # Merge with the last partial while it has the same level
+        while len(self.stack) > 0 and self.stack[-1][0] == level:
+
+            partial = self.combine(self.stack.pop()[1], partial)
+            level  += 1
+
+        # Push the result
+        self.stack.append((level, partial))
+
+    def result(self):
+        """
+        Combines the remaining partials, returning the reduction of every partial added
+        :return: The reduced partial or None if nothing was added
+        """
+
+        # Initialize the result
+        result = None
+
+        # Combine the partials from the most recent
+        while len(self.stack) > 0:
+
+            partial = self.stack.pop()[1]
+            result  = partial if result is None else self.combine(partial, result)
+
+        # Return the result
+        return result
+
+class OutputWriter:
+    """
+    Encodes converted pages straight into (optionally compressed) output streams. Modes:
+        pretty  | Three json files per page, indented; the original layout
+        compact | Three json files per page without whitespace; documents are streamed a top-level key at a time,
+                  each encoded by the C encoder
+        ndjson  | One file per page with one line per post record extracted by PostExtractor
+    When consolidated, the pages of a batch are written as the lines of a single ndjson file instead: one line per
+    page ({filename, dictionary, index, keys}) or, in the ndjson mode, per post. zstd requires zstandard; gzip is
+    used otherwise.
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Modes       = ['pretty', 'compact', 'ndjson']
+    Extensions  = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+    Separators  = (',', ':')
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, mode: str = 'compact', compression: str = None, consolidated: bool = False):
+        """
+        Initializes the OutputWriter with the specified mode, compression & consolidation.
+        :param mode: 'pretty', 'compact' or 'ndjson'
+        :param compression: None, 'gzip' or 'zstd'
+        :param consolidated: Flag indicating if the pages of a batch are written to a single ndjson file
+        """
+
+        # If zstd is unavailable, fall back to gzip
+        if compression == 'zstd' and importlib.util.find_spec('zstandard') is None:
+
+            Log.warn('zstandard unavailable; using gzip')
+            compression = 'gzip'
+
+        # Initialize the members
+        self.mode           = mode if mode in OutputWriter.Modes else 'compact'
+        self.compression    = compression if compression in OutputWriter.Extensions else None
+        self.consolidated   = consolidated
+
+    ## -------
+    ## Methods
+
+    def posts(self) -> bool:
+        """
+        Returns a flag indicating if the pages' post records are written
+        :return: boolean flag indicating if the mode is ndjson
+        """
+        return self.mode == 'ndjson'
+
+    def name_of(self, name: str, kind: str) -> str:
+        """
+        Returns the output name of the specified document
+        :param name: The name without an extension
+        :param kind: 'json' or 'ndjson'
+        :return: The name with the document's & the compression's extension
+        """
+        return f'{name}.{kind}{OutputWriter.Extensions[self.compression]}'
+
+    def open(self, path: str):
+        """
+        Opens the specified file for writing text through the compression, if any
+        :param path: The path of the file, including its extensions
+        :return: Writable text stream
+        """
+
+        # If we're compressing with zstd
+        if self.compression == 'zstd': return importlib.import_module('zstandard').open(path, 'wt', encoding='utf-8')
+
+        # Otherwise, with gzip or not at all
+        return gzip.open(path, 'wt', encoding='utf-8') if self.compression == 'gzip' else \
+            open(path, 'w', encoding='utf-8')
+
+    def compress(self, text: str) -> bytes:
+        """
+        Returns the specified text encoded & compressed, if any
+        :param text: The text to encode
+        :return: The encoded bytes
+        """
+
+        # Encode the text
+        data = text.encode('utf-8')
+
+        # Return the result of compressing it, if any
+        if self.compression == 'zstd': return importlib.import_module('zstandard').ZstdCompressor().compress(data)
+
+        return gzip.compress(data) if self.compression == 'gzip' else data
+
+    def dump(self, value, stream) -> None:
+        """
+        Writes the specified value as a json document
+        :param value: The value to encode
+        :param stream: The writable text stream
+        """
+
+        # If we're pretty printing, stream the indented document
+        if self.mode == 'pretty': json.dump(value, stream, indent=4)
+
+        # Otherwise, if the value has entries, write them one at a time
+        elif isinstance(value, dict) and len(value) > 0:
+
+            stream.write('{')
+
+            for position, (key, child) in enumerate(value.items()):
+
+                # Encode the entry as a single-entry object, so the key is converted like json.dumps would
+                if position > 0: stream.write(',')
+                stream.write(json.dumps({key: child}, separators=OutputWriter.Separators)[1:-1])
+
+            stream.write('}')
+
+        # Otherwise, write the value
+        else: stream.write(json.dumps(value, separators=OutputWriter.Separators))
+
+    def lines(self, page: tuple):
+        """
+        Returns the ndjson lines of the specified page
+        :param page: tuple of (filename, dictionary, index, keys, records)
+        :return: generator of the values of each line
+        """
+
+        # Unpack the page
+        filename, dictionary, index, keys, records = page
+
+        # If we're writing posts, a line per post
+        if self.posts():
+
+            for record in records or []: yield {'filename': filename, **record}
+
+        # Otherwise, a line per page
+        else: yield {'filename': filename, 'dictionary': dictionary, 'index': index, 'keys': keys}
+
+    def write_lines(self, values, stream) -> None:
+        """
+        Writes each of the specified values as a compact json line
+        :param values: iterable of the values to write
+        :param stream: The writable text stream
+        """
+        for value in values: stream.write(json.dumps(value, separators=OutputWriter.Separators) + '\n')
+
+    def documents(self, page: tuple) -> list:
+        """
+        Returns the documents of the specified page
+        :param page: tuple of (filename, dictionary, index, keys, records)
+        :return: list of (name, writer) pairs; the names keep the filename's directory & each writer is a callable
+        writing the document to a text stream. The page's main document is last
+        """
+
+        # Transform the filename
+        name = re.sub(r'\.html', '', page[0])
+
+        # If we're writing posts, a single ndjson file
+        if self.posts(): return [(self.name_of(name, 'ndjson'), lambda stream: self.write_lines(self.lines(page), stream))]
+
+        # Otherwise, the index, the keys index & the result
+        return [(self.name_of(f'{name}-index', 'json'), lambda stream: self.dump(page[2], stream)),
+                (self.name_of(f'{name}-keys', 'json'), lambda stream: self.dump(page[3], stream)),
+                (self.name_of(name, 'json'), lambda stream: self.dump(page[1], stream))]
+
+    def write(self, destination: str, page: tuple) -> list:
+        """
+        Writes the specified page's documents into the destination
+        :param destination: The output directory
+        :param page: tuple of (filename, dictionary, index, keys, records)
+        :return: list of the paths written; the page's main document is last
+        """
+
+        # Initialize the result
+        paths = []
+
+        # Write each document, named after the file
+        for name, write in self.documents((os.path.basename(page[0]),) + tuple(page[1:])):
+
+            paths.append(f'{destination}/{name}')
+
+            with self.open(paths[-1]) as stream: write(stream)
+
+        # Return the result
+        return paths
+
+    def encode(self, write) -> bytes:
+        """
+        Returns the bytes written by the specified document writer
+        :param write: Callable writing a document to a text stream
+        :return: The encoded & compressed document
+        """
+
+        # Write the document into memory
+        stream = io.StringIO()
+        write(stream)
+
+        # Return the result
+        return self.compress(stream.getvalue())
+
+def describe(value):
+    """
+    Returns a json-serializable description of the specified rule or value; functions are described by name &
+    objects by their class & attributes, so equal configurations have equal descriptions across processes
+    :param value: The value to describe
+    :return: The description
+    """
+
+    # If the value is a collection, describe its members
+    if isinstance(value, (list, tuple)): return [describe(child) for child in value]
+
+    if isinstance(value, (set, frozenset)): return sorted(json.dumps(describe(child)) for child in value)
+
+    if isinstance(value, dict): return {str(key): describe(child) for key, child in value.items()}
+
+    # Otherwise, if the value is a scalar, return it
+    if value is None or isinstance(value, (str, int, float, bool)): return value
+
+    # Otherwise, if the value is a function or a class, name it
+    if hasattr(value, '__qualname__'): return f'{getattr(value, "__module__", "")}.{value.__qualname__}'
+
+    # Otherwise, describe the object's class & attributes
+    return [type(value).__qualname__, {key: describe(child) for key, child in sorted(vars(value).items())}]
+
+CONVERTER_VERSION   = 1
+VERSIONS            = {}
+
+def conversion_version(writer) -> str:
+    """
+    Returns the hash identifying the conversion's output: the rules, the post selectors if posts are extracted, the
+    writer's configuration & CONVERTER_VERSION, which is bumped when the parsing changes. The version is computed
+    once per configuration, before the rules are used.
+    :param writer: The OutputWriter encoding the outputs
+    :return: The hexadecimal version hash
+    """
+
+    # Initialize the configuration
+    configuration = json.dumps([CONVERTER_VERSION, writer.mode, writer.compression, writer.consolidated],
+                               sort_keys=True)
+
+    # If the version wasn't computed, compute it
+    if configuration not in VERSIONS:
+
+        description = json.dumps([describe(RULES), describe(POST_SELECTORS) if writer.posts() else None],
+                                 sort_keys=True)
+
+        VERSIONS[configuration] = hashlib.sha256((configuration + description).encode('utf-8')).hexdigest()[:16]
+
+    # Return the result
+    return VERSIONS[configuration]
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Returns the content hash of the specified file
+    :param path: The path of the file
+    :param chunk_size: The amount of bytes read at a time
+    :return: The hash, prefixed by its algorithm
+    """
+
+    # Initialize the digest
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as input_file:
+
+        for chunk in iter(lambda: input_file.read(chunk_size), b''): digest.update(chunk)
+
+    # Return the result
+    return f'sha256-{digest.hexdigest()}'
+
+class HashingReader:
+    """
+    Wraps a binary stream, hashing the bytes as they're read, so a streamed object's content hash is known once
+    it's parsed.
+    """
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, stream):
+        """
+        Initializes the HashingReader over the specified stream.
+        :param stream: The binary stream to read
+        """
+        self.stream = stream
+        self.digest = hashlib.sha256()
+
+    ## -------
+    ## Methods
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Reads & hashes at most the specified amount of bytes
+        :param size: The amount of bytes; all of them if negative
+        :return: The bytes read
+        """
+
+        # Read & hash the bytes
+        data = self.stream.read(size)
+        self.digest.update(data)
+
+        # Return the result
+        return data
+
+    def hash(self) -> str:
+        """
+        Returns the hash of the bytes read so far
+        :return: The hash, prefixed by its algorithm
+        """
+        return f'sha256-{self.digest.hexdigest()}'
+
+    def close(self) -> None:
+        """
+        Closes the stream
+        """
+        self.stream.close()
+
+class ConversionManifest:
+    """
+    sqlite manifest of the converted pages: maps a content hash & conversion version to the location of the
+    page's output & the file it was read from. sqlite3 is only imported when a manifest is opened.
+    """
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, path: str):
+        """
+        Initializes the ConversionManifest, creating the database at the specified path if necessary.
+        :param path: The path of the sqlite database
+        """
+
+        # Open the database
+        self.path       = path
+        self.connection = importlib.import_module('sqlite3').connect(path)
+
+        # Create the table
+        self.connection.execute('CREATE TABLE IF NOT EXISTS pages (hash TEXT NOT NULL, version TEXT NOT NULL, '
+                                'location TEXT NOT NULL, source TEXT, PRIMARY KEY (hash, version))')
+        self.connection.commit()
+
+    ## -------
+    ## Methods
+
+    def converted(self, hashed: str, version: str):
+        """
+        Returns the output location of the specified content's conversion, if any
+        :param hashed: The content hash
+        :param version: The conversion version
+        :return: The location or None
+        """
+
+        # Query the location
+        row = self.connection.execute('SELECT location FROM pages WHERE hash = ? AND version = ?',
+                                      (hashed, version)).fetchone()
+
+        # Return the result
+        return row[0] if row is not None else None
+
+    def record(self, entries: list) -> None:
+        """
+        Records the specified conversions with a single transaction
+        :param entries: list of (hash, version, location, source) tuples
+        """
+
+        self.connection.executemany('INSERT OR REPLACE INTO pages (hash, version, location, source) '
+                                    'VALUES (?, ?, ?, ?)', entries)
+        self.connection.commit()
+
+    def close(self) -> None:
+        """
+        Closes the database
+        """
+        self.connection.close()
+
+class S3Manifest:
+    """
+    Append-only manifest of the converted objects kept in a bucket: each conversion is an object named after its
+    version & content hash, holding the output location. Entries are never rewritten, so concurrent invocations
+    don't need to coordinate.
+    """
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, client, bucket: str, prefix: str = 'manifest/'):
+        """
+        Initializes the S3Manifest in the specified bucket & prefix.
+        :param client: The S3 client
+        :param bucket: The name of the bucket
+        :param prefix: The prefix of the entries
+        """
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    ## -------
+    ## Methods
+
+    def converted(self, hashed: str, version: str):
+        """
+        Returns the output location of the specified content's conversion, if any
+        :param hashed: The content hash
+        :param version: The conversion version
+        :return: The location or None
+        """
+
+        try:
+
+            # Retrieve the entry
+            body = self.client.get_object(Bucket=self.bucket, Key=f'{self.prefix}{version}/{hashed}')['Body']
+
+            try: return body.read().decode('utf-8')
+
+            finally: body.close()
+
+        except self.client.exceptions.NoSuchKey: return None
+
+    def record(self, entries: list) -> None:
+        """
+        Records the specified conversions. S3 only accepts ASCII metadata, so the source is URL-encoded.
+        :param entries: list of (hash, version, location, source) tuples
+        """
+        for hashed, version, location, source in entries:
+
+            self.client.put_object(Bucket=self.bucket, Key=f'{self.prefix}{version}/{hashed}',
+                                   Body=location.encode('utf-8'), Metadata={'source': quote(source, safe='/')})
+
+class BatchConverter:
+    """
+    Converts a directory of html pages with a process pool. Each task converts a batch of pages & returns each
+    page's transformed dictionary, index & keys together with the batch's SchemaSummaries of the indices & keys;
+    the parent writes the pages with its OutputWriter & tree-reduces the summaries, saving them into the index
+    destination every 'checkpoint' batches. Pages are written in the listing order or as they complete.
+    Pages are hashed first: duplicates are converted once & pages the manifest records as converted with the same
+    version, whose output still exists, are skipped. Converted pages are recorded after each batch is written.
+    Process pools need shared memory, which Lambda doesn't provide; use a single worker there.
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Transform = None
+    Extractor = None
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def combine(left: tuple, right: tuple) -> tuple:
+        """
+        Combines two partial (index summary, keys summary) pairs, left first
+        :param left: The earlier partial
+        :param right: The later partial
+        :return: The combined partial
+        """
+
+        # Merge the right partial into the left
+        left[0].merge(right[0])
+        left[1].merge(right[1])
+
+        # Return the result
+        return left
+
+    @staticmethod
+    def convert_page(filename: str, source=None, posts: bool = False) -> tuple:
+        """
+        Parses & transforms the specified page
+        :param filename: The html file to convert; recorded in the dictionary
+        :param source: Readable text stream to parse instead of the file
+        :param posts: Flag indicating if the page's post records are extracted as well
+        :return: tuple of (filename, dictionary, index, keys, records); the records are None if not extracted
+        """
+
+        # Initialize the process's transformation
+        if BatchConverter.Transform is None: BatchConverter.Transform = TransformationEngine(RULES)
+
+        # Report the events against the file, restoring the previous context once it's converted
+        context, Log.Context = Log.Context, os.path.basename(filename)
+
+        try:
+
+            # If the posts are extracted from a stream, read it once
+            if posts and source is not None: source = io.StringIO(source.read())
+
+            # Parse & transform the page
+            parser      = HTMLToArenaParser(filename, source=source)
+            dictionary  = BatchConverter.Transform(parser.root)
+            records     = None
+
+            # Extract the posts, if necessary
+            if posts:
+
+                if BatchConverter.Extractor is None: BatchConverter.Extractor = PostExtractor()
+
+                if source is not None: source.seek(0)
+
+                records = BatchConverter.Extractor.extract(source if source is not None else filename)
+
+        finally: Log.Context = context
+
+        # Return the result
+        return filename, dictionary, parser.index(), parser.keys(), records
+
+    @staticmethod
+    def convert(batch: tuple) -> tuple:
+        """
+        Converts the specified batch of pages
+        :param batch: tuple of the batch's number, the html files to convert & the flag indicating if the posts
+        are extracted
+        :return: tuple of the batch's number, the list of converted pages & the partial (index summary, keys summary)
+        """
 
-    # Remove any duplicated
-    dictionary = traverse(dictionary, remove_duplicated)
+        # Unpack the batch
+        number, filenames, posts = batch
 
-    # Merge the ca-item--count fields with the alt
-    dictionary = traverse(dictionary, MergeValueAsKeyCallback('alt', 'ca--item--count', snake_case))
+        # Initialize the result
+        pages, partial = [], (SchemaSummary(), SchemaSummary())
 
-    # Merge the pa-item--count fields with the alt
-    dictionary = traverse(dictionary, MergeValueAsKeyCallback('alt', 'pa--item--count', snake_case))
+        # Iterate through the pages
+        for filename in filenames:
 
-    # Merge the src fields with the alt
-    dictionary = traverse(dictionary, MergeValueAsKeyCallback('alt', 'src', snake_case))
+            # Convert the page
+            page = BatchConverter.convert_page(filename, posts=posts)
 
-    # Remove any duplicated
-    dictionary = traverse(dictionary, remove_duplicated)
+            # Summarize the index & keys
+            partial[0].add(page[2])
+            partial[1].add(page[3])
 
-    # Remove the separator key
-    dictionary = traverse(dictionary, RemoveKeyCallback('separator'))
+            pages.append(page)
 
-    # Merge the media container
-    dictionary = traverse(dictionary, MergeLeavesCallback('media-container--wrapper', condition=starts_with))
+        # Return the result
+        return number, pages, partial
 
-    # Remove any duplicated
-    dictionary = traverse(dictionary, remove_duplicated)
+    ## ------------
+    ## Constructors
 
-    # Pull single members up
-    dictionary = traverse(dictionary, pull_single_members)
+    def __init__(self, workers: int = None, batch_size: int = 16, ordered: bool = True, writer: OutputWriter = None,
+                 checkpoint: int = 256, manifest: ConversionManifest = None):
+        """
+        Initializes the BatchConverter with the specified amount of workers, batch size, ordering & writer.
+        :param workers: The amount of processes; defaults to the amount of cores. A single worker runs in-process
+        :param batch_size: The amount of pages converted by each task
+        :param ordered: Flag indicating if pages are written in the listing order rather than as they complete
+        :param writer: The OutputWriter encoding the pages & indices; defaults to compact json files
+        :param checkpoint: The amount of batches whose summaries are saved together
+        :param manifest: The ConversionManifest of the converted pages, if any
+        """
+        self.workers    = workers if workers is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.ordered    = ordered
+        self.writer     = writer if writer is not None else OutputWriter()
+        self.checkpoint = checkpoint
+        self.manifest   = manifest
 
-    # Remove any duplicated
-    dictionary = traverse(dictionary, remove_duplicated)
+    ## -------
+    ## Methods
 
-    # Merge the card--header leaves
-    dictionary = traverse(dictionary, MergeLeavesCallback('card--header', condition=starts_with))
+    @staticmethod
+    def save(reduction: PartialReduction, index_destination: str) -> None:
+        """
+        Saves the reduced summaries into the index destination, accumulating into the persisted summaries
+        :param reduction: The PartialReduction of the summaries
+        :param index_destination: The directory of schema_index.json & schema_keys.json
+        """
+
+        # Retrieve the summaries
+        summaries = reduction.result()
+
+        # If there are any, save them
+        if summaries is not None:
+
+            summaries[0].save(f'{index_destination}/schema_index.json')
+            summaries[1].save(f'{index_destination}/schema_keys.json')
+
+    def plan(self, filenames: list, version: str) -> tuple:
+        """
+        Hashes the specified pages, returning the pages to convert
+        :param filenames: The html files
+        :param version: The conversion version
+        :return: tuple of the files to convert, the dict of their hashes, the amount of duplicates & of skipped pages
+        """
+
+        # Initialize the result
+        pending, hashes, duplicates, skipped = [], {}, 0, 0
+        seen = set()
+
+        # Iterate through the pages
+        for filename in filenames:
+
+            # Hash the page
+            hashed = file_hash(filename)
+
+            # If we've seen the content, skip the duplicate
+            if hashed in seen:
+
+                duplicates += 1
+
+                continue
+
+            seen.add(hashed)
+
+            # If the content was converted & its output exists, skip it
+            location = self.manifest.converted(hashed, version) if self.manifest is not None else None
+
+            if location is not None and os.path.exists(location):
+
+                skipped += 1
+
+                continue
+
+            # Otherwise, convert it
+            pending.append(filename)
+            hashes[filename] = hashed
+
+        # Return the result
+        return pending, hashes, duplicates, skipped
+
+    def run(self, source: str, destination: str, index_destination: str = '.') -> dict:
+        """
+        Converts every page in the source directory, writing the pages into the destination & accumulating the
+        schema summaries of the indices & keys into the index destination.
+        :param source: The directory containing the html pages
+        :param destination: The directory the converted pages are written to
+        :param index_destination: The directory of schema_index.json & schema_keys.json
+        :return: dict of metrics
+        """
+
+        # Initialize the start, the version & the pages to convert
+        start       = time.perf_counter()
+        version     = conversion_version(self.writer)
+        filenames   = [f'{source}/{filename}' for filename in os.listdir(source)]
+
+        pending, hashes, duplicates, skipped = self.plan(filenames, version)
+
+        # Initialize the batches, the run's stamp & the reduction
+        batches     = [(number, pending[index:index + self.batch_size], self.writer.posts())
+                       for number, index in enumerate(range(0, len(pending), self.batch_size))]
+        stamp       = time.strftime('%Y%m%d%H%M%S', time.gmtime())
+        reduction   = PartialReduction(BatchConverter.combine)
+
+        # Create the destinations
+        os.makedirs(destination, exist_ok=True)
+        os.makedirs(index_destination, exist_ok=True)
+
+        # Initialize the pool, if any
+        pool    = importlib.import_module('multiprocessing').Pool(self.workers) if self.workers > 1 else None
+        results = map(BatchConverter.convert, batches) if pool is None else \
+            (pool.imap if self.ordered else pool.imap_unordered)(BatchConverter.convert, batches)
+
+        try:
+
+            # Iterate through the converted batches
+            for completed, (number, pages, partial) in enumerate(results, 1):
+
+                # If we're consolidating, write the batch's lines to a single file
+                if self.writer.consolidated:
+
+                    path        = f'{destination}/{self.writer.name_of(f"batch-{stamp}-{number:05d}", "ndjson")}'
+                    locations   = [path] * len(pages)
+
+                    with self.writer.open(path) as stream:
+
+                        for page in pages: self.writer.write_lines(self.writer.lines(page), stream)
+
+                # Otherwise, write each page's documents
+                else: locations = [self.writer.write(destination, page)[-1] for page in pages]
+
+                # Record the converted pages
+                if self.manifest is not None:
+
+                    self.manifest.record([(hashes[page[0]], version, location, page[0])
+                                          for page, location in zip(pages, locations)])
+
+                # Reduce the partial & save the summaries at every checkpoint
+                reduction.add(partial)
+
+                if completed % self.checkpoint == 0:
+
+                    BatchConverter.save(reduction, index_destination)
+                    reduction = PartialReduction(BatchConverter.combine)
+
+        # If the run failed, stop the workers & drop their queued batches
+        except BaseException:
+
+            if pool is not None: pool.terminate()
+
+            raise
+
+        # Otherwise, let the workers exit once they're done
+        else:
+
+            if pool is not None: pool.close()
+
+        # Wait for the workers either way
+        finally:
+
+            if pool is not None: pool.join()
+
+        # Save the remaining summaries
+        BatchConverter.save(reduction, index_destination)
+
+        # Initialize the metrics
+        elapsed = time.perf_counter() - start
+        metrics = {'pages': len(filenames), 'converted': len(pending), 'duplicates': duplicates, 'skipped': skipped,
+                   'workers': self.workers, 'seconds': elapsed, 'pages_per_second': len(filenames) / max(elapsed, 1e-9)}
+
+        # Report
+        Log.info('Converted %s', metrics)
+
+        # Return the result
+        return metrics
+
+class S3Processor:
+    """
+    Converts html objects streamed from S3. Each body is decoded as it's parsed, so nothing is written to disk;
+    the outputs are uploaded by a thread pool while the next object is parsed. An object is deleted once all of
+    its outputs are uploaded; deletions are issued in batches of up to 1000 keys per bucket. Objects that fail are
+    reported & kept. The client is any object with boto3's S3 client interface, e.g. LocalS3Client.
+    With a consolidated OutputWriter, the objects' lines are gathered into ndjson parts of about part_size
+    characters, uploaded as each fills; the objects are deleted once their part is uploaded. The SchemaSummaries
+    of the invocation's indices & keys are uploaded last, to be merged offline.
+    With a manifest, objects are identified by their ETag when the listing or notification has one, so objects
+    already converted with the same version are skipped before they're downloaded; otherwise the body is hashed
+    as it's parsed & the outputs of already converted content aren't uploaded. Skipped objects are still deleted.
+    The conversions are recorded in the manifest once their outputs are uploaded. A duplicate of content converted
+    by the same invocation is retired after the object it duplicates & is only deleted if that object's outputs
+    were uploaded; content that fails to convert or upload is never treated as seen.
+    """
+
+    ## -------------
+    ## Static Fields
+
+    DeleteBatch = 1000
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def objects_of(event: dict) -> list:
+        """
+        Returns the objects named by the specified S3 event's records
+        :param event: The S3 notification
+        :return: list of (bucket, key, etag) tuples
+        """
+        return [(record['s3']['bucket']['name'], unquote_plus(record['s3']['object']['key']),
+                 record['s3']['object'].get('eTag'))
+                for record in event.get('Records', []) if 's3' in record]
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, client, output_bucket: str, uploads: int = 8, suffix: str = '.html', delete: bool = True,
+                 writer: OutputWriter = None, part_size: int = 64 << 20, manifest: S3Manifest = None):
+        """
+        Initializes the S3Processor with the specified client & output bucket.
+        :param client: The S3 client
+        :param output_bucket: The name of the bucket the outputs are uploaded to
+        :param uploads: The amount of concurrent uploads
+        :param suffix: The suffix of the keys to convert; other keys are skipped
+        :param delete: Flag indicating if the consumed objects are deleted
+        :param writer: The OutputWriter encoding the outputs; defaults to compact json objects
+        :param part_size: The amount of characters that triggers the upload of a consolidated part
+        :param manifest: The S3Manifest (or ConversionManifest) of the converted objects, if any
+        """
+        self.client         = client
+        self.output_bucket  = output_bucket
+        self.uploads        = uploads
+        self.suffix         = suffix
+        self.delete         = delete
+        self.writer         = writer if writer is not None else OutputWriter()
+        self.part_size      = part_size
+        self.pending        = []
+        self.consumed       = {}
+        self.metrics        = {}
+        self.part           = None
+        self.part_objects   = []
+        self.summaries      = None
+        self.parts          = 0
+        self.prefix         = None
+        self.manifest       = manifest
+        self.version        = None
+        self.seen           = set()
+        self.failures       = set()
+        self.entries        = []
+
+    ## -------
+    ## Methods
+
+    def listing(self, bucket: str, prefix: str = ''):
+        """
+        Lists the specified bucket's objects under the given prefix, a page at a time
+        :param bucket: The name of the bucket
+        :param prefix: The prefix of the keys to list
+        :return: generator of (bucket, key, etag) tuples
+        """
+
+        # Iterate through the pages
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+
+            for content in page.get('Contents', []): yield bucket, content['Key'], content.get('ETag')
+
+    def record(self, limit: int) -> None:
+        """
+        Records the converted objects in the manifest once more than the limit are queued
+        :param limit: The maximum amount of queued entries
+        """
+
+        # If there's no manifest or not enough entries, leave
+        if self.manifest is None or len(self.entries) <= limit: return
+
+        try: self.manifest.record(self.entries)
+
+        # A lost entry only means the object is converted again
+        except Exception as exception: Log.warn('Failed to record %s conversions: %s', len(self.entries), exception)
+
+        self.entries = []
+
+    def known(self, hashed: str) -> bool:
+        """
+        Returns a flag indicating if the specified content was seen by this invocation or converted with the
+        current version; marks it as seen
+        :param hashed: The content hash
+        :return: boolean flag indicating if the content's conversion can be skipped
+        """
+
+        # If we've seen the content, it's a duplicate
+        if hashed in self.seen:
+
+            self.metrics['duplicates'] += 1
+
+            return True
+
+        self.seen.add(hashed)
+
+        # If the manifest has the content, it's unchanged
+        if self.manifest is not None and self.manifest.converted(hashed, self.version) is not None:
+
+            self.metrics['unchanged'] += 1
+
+            return True
+
+        # Otherwise, convert it
+        return False
+
+    def hold(self, bucket: str, key: str, hashed: str) -> None:
+        """
+        Marks the specified skipped object as pending behind the objects converted before it, so it's retired after
+        the object it may duplicate
+        :param bucket: The name of the bucket
+        :param key: The key of the object
+        :param hashed: The content hash
+        """
+
+        # If the consolidated part has objects, the skipped object is pending on its upload
+        if len(self.part_objects) > 0: self.part_objects.append((bucket, key, hashed, False))
+
+        # Otherwise, the objects converted before it are pending already
+        else: self.pending.append((bucket, key, [], [], hashed))
+
+    def remove(self, bucket: str, keys: list) -> None:
+        """
+        Deletes the specified keys from the given bucket with a single request
+        :param bucket: The name of the bucket
+        :param keys: At most 1000 keys to delete
+        """
+
+        # Delete the keys
+        response = self.client.delete_objects(Bucket=bucket, Delete={'Objects': [{'Key': key} for key in keys],
+                                                                     'Quiet': True})
+
+        # Report the errors
+        for error in response.get('Errors', []): Log.warn('Failed to delete %s: %s', error.get('Key'), error.get('Code'))
+
+        # Update the metrics
+        self.metrics['deleted'] += len(keys) - len(response.get('Errors', []))
+
+    def reap(self, limit: int) -> None:
+        """
+        Retires the objects whose uploads completed, in order, queueing them for deletion. Waits for the oldest
+        objects while more than the limit are pending.
+        :param limit: The maximum amount of pending objects
+        """
 
-    # Remove any duplicated
-    dictionary = traverse(dictionary, remove_duplicated)
+        # Retire the oldest objects while their uploads are done or too many are pending
+        while len(self.pending) > 0 and \
+                (len(self.pending) > limit or all(future.done() for future in self.pending[0][2])):
 
-    # Merge the card--footer leaves
-    dictionary = traverse(dictionary, MergeLeavesCallback('card--footer', condition=starts_with))
+            bucket, key, futures, entries, hashed = self.pending.pop(0)
 
-    # Remove any duplicated
-    dictionary = traverse(dictionary, remove_duplicated)
+            try:
 
-    # Merge the echo by leaves
-    #dictionary = traverse(dictionary, MergeLeavesCallback('echo-byline--wrapper', condition=starts_with))
+                for future in futures: future.result()
 
-    # Remove any duplicated
-    #dictionary = traverse(dictionary, remove_duplicated)
+            except Exception as exception:
 
-    # Merge the comment--card--wrapper leaves
-    #dictionary = traverse(dictionary, MergeLeavesCallback('comment--card--wrapper', condition=starts_with))
+                Log.warn('Failed to upload the outputs of %s: %s', key, exception)
+                self.metrics['failed'].append(key)
+                self.failures.add(hashed)
 
-    # Remove any duplicated
-    #dictionary = traverse(dictionary, remove_duplicated)
+                continue
 
-    # Merge the reblock leaves
-    #dictionary = traverse(dictionary, MergeLeavesCallback('reblock', condition=starts_with))
+            # If the object duplicates content whose outputs failed to upload, keep it
+            if hashed in self.failures:
 
-    # Remove any duplicated
-    #dictionary = traverse(dictionary, remove_duplicated)
+                Log.warn('Keeping %s: the outputs of its content failed to upload', key)
+                self.metrics['failed'].append(key)
 
+                continue
+
+            # Queue the conversion's entry
+            self.entries.extend(entries)
+
+            # If we're not deleting, we're done
+            if not self.delete: continue
+
+            # Queue the key & delete a full batch
+            keys = self.consumed.setdefault(bucket, [])
+            keys.append(key)
+
+            if len(keys) >= S3Processor.DeleteBatch: self.remove(bucket, self.consumed.pop(bucket))
+
+    def upload_part(self, executor) -> None:
+        """
+        Uploads the consolidated part, if it has any lines, marking its objects as pending on the upload
+        :param executor: The executor running the uploads
+        """
+
+        # If the part is empty, leave
+        if len(self.part_objects) == 0: return
+
+        # Upload the part
+        name    = self.writer.name_of(f'batch-{self.prefix}-{self.parts:05d}', 'ndjson')
+        future  = executor.submit(self.client.put_object, Bucket=self.output_bucket, Key=name,
+                                  Body=self.writer.compress(self.part.getvalue()), ContentType='application/x-ndjson')
+
+        # Mark the objects as pending; duplicates have no entry of their own
+        self.pending.extend((bucket, key, [future], [(hashed, self.version, name, f'{bucket}/{key}')] if converted
+                             else [], hashed) for bucket, key, hashed, converted in self.part_objects)
+
+        # Update the metrics
+        self.metrics['uploaded']   += 1
+        self.parts                 += 1
+
+        # Start the next part
+        self.part, self.part_objects = io.StringIO(), []
+
+    def __call__(self, objects) -> dict:
+        """
+        Converts the specified objects
+        :param objects: iterable of (bucket, key, etag) tuples; the etag may be None
+        :return: dict of metrics
+        """
+
+        # Initialize the state
+        start           = time.perf_counter()
+        self.pending    = []
+        self.consumed   = {}
+        self.metrics    = {'processed': 0, 'bytes': 0, 'uploaded': 0, 'deleted': 0, 'skipped': 0, 'unchanged': 0,
+                           'duplicates': 0, 'failed': []}
+        self.part       = io.StringIO()
+        self.parts      = 0
+        self.prefix     = time.strftime('%Y%m%d%H%M%S', time.gmtime())
+        self.summaries  = (SchemaSummary(), SchemaSummary())
+        self.version    = conversion_version(self.writer)
+        self.seen       = set()
+        self.failures   = set()
+        self.entries    = []
+
+        # Initialize the objects of the consolidated part
+        self.part_objects = []
+
+        with ThreadPoolExecutor(self.uploads) as executor:
+
+            # Iterate through the objects
+            for bucket, key, etag in objects:
+
+                # If the object is not html, skip it
+                if not key.endswith(self.suffix):
+
+                    self.metrics['skipped'] += 1
+
+                    continue
+
+                # If the object's ETag identifies content we've converted, skip the download
+                hashed = 'etag-' + etag.strip('"') if etag else None
+
+                if hashed is not None and self.known(hashed):
+
+                    self.hold(bucket, key, hashed)
+
+                    continue
+
+                try:
+
+                    # Retrieve the object & convert its streamed body, hashing it if necessary
+                    response    = self.client.get_object(Bucket=bucket, Key=key)
+                    body        = response['Body'] if hashed is not None else HashingReader(response['Body'])
+
+                    try: page = BatchConverter.convert_page(key, codecs.getreader('utf-8')(body, errors='replace'),
+                                                            self.writer.posts())
+
+                    finally: body.close()
+
+                except Exception as exception:
+
+                    Log.warn('Failed to convert %s: %s', key, exception)
+                    self.metrics['failed'].append(key)
+
+                    # The content wasn't converted, so a later duplicate is converted instead
+                    self.seen.discard(hashed)
+
+                    continue
+
+                # If the streamed content was converted before, skip it
+                if hashed is None:
+
+                    hashed = body.hash()
+
+                    if self.known(hashed):
+
+                        self.hold(bucket, key, hashed)
+
+                        continue
+
+                # Update the metrics & summarize the index & keys of the uploaded page
+                self.metrics['processed']   += 1
+                self.metrics['bytes']       += response.get('ContentLength', 0)
+
+                self.summaries[0].add(page[2])
+                self.summaries[1].add(page[3])
+
+                # If we're consolidating, append the lines to the part & upload it once it's full
+                if self.writer.consolidated:
+
+                    self.writer.write_lines(self.writer.lines(page), self.part)
+                    self.part_objects.append((bucket, key, hashed, True))
+
+                    if self.part.tell() >= self.part_size: self.upload_part(executor)
+
+                # Otherwise, upload the documents
+                else:
+
+                    documents   = self.writer.documents(page)
+                    futures     = [executor.submit(self.client.put_object, Bucket=self.output_bucket, Key=name,
+                                                   Body=self.writer.encode(write), ContentType='application/json')
+                                   for name, write in documents]
+
+                    self.metrics['uploaded'] += len(futures)
+                    self.pending.append((bucket, key, futures,
+                                         [(hashed, self.version, documents[-1][0], f'{bucket}/{key}')], hashed))
+
+                # Retire the completed objects; bound the amount of outputs held in memory
+                self.reap(2 * self.uploads)
+                self.record(S3Processor.DeleteBatch)
+
+            # Upload the last part & wait for the remaining uploads
+            if self.writer.consolidated: self.upload_part(executor)
+
+            self.reap(0)
+
+        # Record the remaining conversions
+        self.record(0)
+
+        # Upload the summaries
+        if self.metrics['processed'] > 0:
+
+            for name, summary in zip(('index', 'keys'), self.summaries):
+
+                self.client.put_object(Bucket=self.output_bucket, Key=f'schema-{self.prefix}-{name}.json',
+                                       Body=json.dumps(summary.to_dict()).encode('utf-8'),
+                                       ContentType='application/json')
+
+        # Delete the remaining keys
+        for bucket, keys in self.consumed.items():
+
+            for index in range(0, len(keys), S3Processor.DeleteBatch):
+
+                self.remove(bucket, keys[index:index + S3Processor.DeleteBatch])
+
+        # Finalize the metrics
+        self.metrics['seconds'] = time.perf_counter() - start
+
+        # Report
+        Log.info('Processed %s objects (%s bytes, %s unchanged, %s duplicates) in %.3fs', self.metrics['processed'],
+                 self.metrics['bytes'], self.metrics['unchanged'], self.metrics['duplicates'],
+                 self.metrics['seconds'])
+
+        # Return the result
+        return self.metrics
+
+class LocalS3Client:
+    """
+    Local stand-in for the subset of boto3's S3 client used by S3Processor. Each bucket is a directory under the
+    root & each key a path relative to it. The ETags are the md5 of the files, as S3's are for single-part
+    uploads.
+    """
+
+    ## -------------
+    ## Static Fields
+
+    class exceptions:
+
+        NoSuchKey = FileNotFoundError
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, root: str, page_size: int = 1000):
+        """
+        Initializes the LocalS3Client with the specified root directory.
+        :param root: The directory containing the buckets
+        :param page_size: The amount of keys per listed page
+        """
+        self.root       = root
+        self.page_size  = page_size
+
+    ## -------
+    ## Methods
+
+    def path_of(self, bucket: str, key: str) -> str:
+        """
+        Returns the path of the specified object
+        :param bucket: The name of the bucket
+        :param key: The key of the object
+        :return: The path of the object's file
+        """
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def etag_of(self, path: str) -> str:
+        """
+        Returns the ETag of the specified file
+        :param path: The path of the file
+        :return: The quoted md5 of the file's contents
+        """
+        with open(path, 'rb') as input_file:
+
+            return f'"{hashlib.md5(input_file.read()).hexdigest()}"'
+
+    def get_object(self, Bucket: str, Key: str) -> dict:
+        """
+        Returns the specified object; the body is an open binary file
+        """
+        path = self.path_of(Bucket, Key)
+
+        return {'Body': open(path, 'rb'), 'ContentLength': os.path.getsize(path), 'ETag': self.etag_of(path)}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **keywords) -> dict:
+        """
+        Writes the specified object; like S3, rejects metadata that isn't ASCII
+        """
+
+        # Check the metadata
+        for name, value in keywords.get('Metadata', {}).items():
+
+            if not value.isascii(): raise ValueError(f'Non-ASCII metadata {name}: {value}')
+
+        # Initialize the path
+        path = self.path_of(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write the body
+        with open(path, 'wb') as output_file:
+
+            output_file.write(Body)
+
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: dict) -> dict:
+        """
+        Deletes the specified objects
+        """
+
+        # Initialize the errors
+        errors = []
+
+        for entry in Delete['Objects']:
+
+            try: os.remove(self.path_of(Bucket, entry['Key']))
+
+            except FileNotFoundError: errors.append({'Key': entry['Key'], 'Code': 'NoSuchKey'})
+
+        return {'Errors': errors} if len(errors) > 0 else {}
+
+    def get_paginator(self, operation: str):
+        """
+        Returns the paginator of the specified operation; only 'list_objects_v2' is supported
+        """
+        return self
+
+    def paginate(self, Bucket: str, Prefix: str = ''):
+        """
+        Lists the specified bucket's objects under the given prefix, in key order
+        """
+
+        # Initialize the root & the keys
+        root = os.path.join(self.root, Bucket)
+        keys = sorted(os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, '/')
+                      for directory, _, filenames in os.walk(root) for filename in filenames)
+        keys = [key for key in keys if key.startswith(Prefix)]
+
+        # Yield the pages
+        for index in range(0, len(keys), self.page_size):
+
+            yield {'Contents': [{'Key': key, 'ETag': self.etag_of(os.path.join(root, *key.split('/')))}
+                                for key in keys[index:index + self.page_size]]}
+
+## -----
+## Rules
+
+RULES = [
+    # Remove the page chrome & the attributes we don't use
+    RemoveKeyCallback('footer--container'),
+    RemoveKeyCallback('login-more'),
+    RemoveKeyCallback('hide-comments--wrapper'),
+    RemoveKeyCallback('show-comments--wrapper'),
+    RemoveKeyCallback('impressions--icon--wrapper'),
+    RemoveKeyCallback('mc-video--link--icon'),
+    RemoveKeyCallback('id'),
+    RemoveKeyCallback('type'),
+    RemoveKeyCallback('onclick'),
+    # Forget the parser's multi-valued keys; the merges below nest the lists they extend, as they did once the
+    # 'duplicated' keys were removed. The removals commute with it, so it follows them
+    ForgetMultipleCallback(),
+    # Merge the echo fields
+    MergeLeavesCallback('eb--col', condition=starts_with),
+    ForgetMultipleCallback(),
+    # Merge the ca-item--count, pa-item--count & src fields with the alt
+    MergeValueAsKeyCallback('alt', 'ca--item--count', snake_case),
+    MergeValueAsKeyCallback('alt', 'pa--item--count', snake_case),
+    MergeValueAsKeyCallback('alt', 'src', snake_case),
+    ForgetMultipleCallback(),
+    # Remove the separator key
+    RemoveKeyCallback('separator'),
+    # Merge the media container
+    MergeLeavesCallback('media-container--wrapper', condition=starts_with),
+    ForgetMultipleCallback(),
+    # Pull single members up
+    PullSingleUpCallback(),
+    ForgetMultipleCallback(),
+    # Merge the card--header leaves
+    MergeLeavesCallback('card--header', condition=starts_with),
+    ForgetMultipleCallback(),
+    # Merge the card--footer leaves; no rule follows, so its multi-valued keys are kept
+    MergeLeavesCallback('card--footer', condition=starts_with),
+    # Merge the echo by, comment--card--wrapper & reblock leaves
+    #MergeLeavesCallback('echo-byline--wrapper', condition=starts_with),
+    #MergeLeavesCallback('comment--card--wrapper', condition=starts_with),
+    #MergeLeavesCallback('reblock', condition=starts_with),
+]
+
+POST_SELECTORS = [
+    ('card--post-container', 'record'),
+    ('card--header', 'section'),
+    ('card--body', 'section'),
+    ('eb--col*', 'section'),
+    ('media-container--wrapper*', 'section'),
+    ('ca--item--count', 'section'),
+    ('pa--item--count', 'section'),
+    ('card--footer*', 'section'),
+]
+
+## -----------
+## Entry Point
+
+def values_of(arguments: Arguments, key: str) -> list:
+    """
+    Returns the values of the specified argument as a list
+    :param arguments: The parsed arguments
+    :param key: The name of the argument
+    :return: list of the argument's values; empty if it has none
+    """
+
+    # Retrieve the value
+    value = arguments.dictionary.get(key)
+
+    # Return the result
+    return [] if value is None else value if isinstance(value, list) else [value]
+
+def main(argv: list) -> None:
+    """
+    Command-line entry point. Converts a directory of pages by default:
+        --source sample --destination output --index . [--workers n] [--batchsize n] [--unordered]
+        [--format pretty|compact|ndjson] [--compression gzip|zstd] [--consolidated]
+        [--manifest path | --nomanifest]
+    The manifest defaults to manifest.sqlite in the index directory. Or runs one of the checks over the specified
+    pages, printing its JSON result:
+        --validate pages...
+        --benchmark pages... [--backends names...] [--repeat n]
+    The startup & scaling benchmarks are run by ingestion_benchmark.py.
+    :param argv: The command-line arguments
+    """
 
-    # Merge the index to the mega
-    HTMLToDictionaryParser.merge(mega_index, parser.index())
-    HTMLToDictionaryParser.merge(mega_keys, parser.keys())
+    # Initialize the log & consume the arguments
+    Arguments.Log   = Log
+    arguments       = Arguments(argv, None)
+    options         = arguments.dictionary
+    repeat          = int(options['repeat']) if options.get('repeat') is not None else None
 
-    # Transform the filename
-    filename = re.sub(r'\.html', '', filename)
+    # Run the specified check
+    if 'validate' in options: result = validate_extraction(values_of(arguments, 'validate'))
 
-    # Write index
-    with open(f'output/{filename}-index.json', 'w') as output_file:
+    elif 'benchmark' in options: result = benchmark_backends(values_of(arguments, 'benchmark'),
+                                                             values_of(arguments, 'backends') or None, repeat or 3)
 
-        output_file.write(json.dumps(parser.index(), indent=4))
 
-    # Write keys index
-    with open(f'output/{filename}-keys.json', 'w') as output_file:
+    # Otherwise, convert the directory
+    else:
 
-        output_file.write(json.dumps(parser.keys(), indent=4))
+        # Open the manifest
+        manifest = ConversionManifest(options.get('manifest') or f'{options.get("index") or "."}/manifest.sqlite') \
+            if 'nomanifest' not in options else None
 
-    # Write result
-    with open(f'output/{filename}.json', 'w') as output_file:
+        try: result = BatchConverter(int(options['workers']) if options.get('workers') is not None else None,
+                                     int(options.get('batchsize') or 16),
+                                     'unordered' not in options,
+                                     OutputWriter(options.get('format') or 'compact', options.get('compression'),
+                                                  'consolidated' in options),
+                                     manifest=manifest).run(options.get('source') or 'sample',
+                                                            options.get('destination') or 'output',
+                                                            options.get('index') or '.')
 
-        output_file.write(json.dumps(dictionary, indent=4))
+        finally:
 
-# Finally, write the mega index
-with open(f'mega_index.json', 'w') as output_file:
+            if manifest is not None: manifest.close()
 
-    output_file.write(json.dumps(mega_index, indent=4))
+    # Output the result
+    print(json.dumps(result, indent=4))
 
-# Finally, write the mega keys
-with open(f'mega_keys.json', 'w') as output_file:
+## ------
+## Script
 
-    output_file.write(json.dumps(mega_keys, indent=4))
+if __name__ == "__main__":
 
+    main(sys.argv)
@@ -0,0 +1,137 @@
+"""
+Training checkpoints. Keeps the best checkpoints of a training run on disk, ranked by an evaluation metric, &
+decides when the run stops improving.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import os
+import glob
+
+## -------
+## Classes
+
+class Checkpoints:
+    """
+    Keeps the best 'keep' checkpoints of a training run by the specified metric. Each checkpoint is the serialized
+    model written to the root, so at most 'keep' models are on disk & none are held in memory; the checkpoints of
+    a previous run in the same root are removed when a run starts. The run should stop once 'patience' epochs in a
+    row didn't improve the best metric by more than 'delta'.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log = None
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, root: str, metric: str = 'f_score', keep: int = 2, patience: int = 3, delta: float = 0.0,
+                 maximize: bool = True):
+        """
+        Initializes the Checkpoints to its' default state.
+        :param root: The directory the checkpoints are written to
+        :param metric: The name of the metric ranking the checkpoints
+        :param keep: The maximum amount of checkpoints kept
+        :param patience: The amount of epochs without improvement that stops the run; None never stops it
+        :param delta: The minimum improvement of the metric considered an improvement
+        :param maximize: Flag indicating if higher values of the metric are better, e.g. False for a loss
+        """
+        self.root       = root
+        self.metric     = metric
+        self.keep       = keep
+        self.patience   = patience
+        self.delta      = delta
+        self.maximize   = maximize
+        self.kept       = []
+        self.best       = None
+        self.stale      = 0
+
+        # Create the root
+        os.makedirs(root, exist_ok=True)
+
+        # Remove the checkpoints of a previous run, including any interrupted writes
+        for path in glob.glob(os.path.join(root, 'epoch-*.bin')) + glob.glob(os.path.join(root, 'epoch-*.bin.tmp')):
+
+            os.remove(path)
+
+    ## -------
+    ## Methods
+
+    def add(self, epoch: int, metrics: dict, serialize) -> bool:
+        """
+        Considers the specified epoch's checkpoint, writing it if it ranks among the best & removing the checkpoint
+        it displaces
+        :param epoch: The epoch of the checkpoint
+        :param metrics: The epoch's evaluation metrics
+        :param serialize: Callable returning the serialized model; only invoked if the checkpoint is kept
+        :return: boolean flag indicating if the checkpoint is the best so far
+        """
+
+        # Retrieve the score; higher is better
+        score = metrics[self.metric] if self.maximize else -metrics[self.metric]
+
+        # Update the amount of epochs without improvement
+        improved    = self.best is None or score > self.best[0] + self.delta
+        self.stale  = 0 if improved else self.stale + 1
+
+        # If the checkpoint doesn't rank among the kept checkpoints, leave
+        if len(self.kept) >= self.keep and score <= self.kept[-1][0]: return False
+
+        # Write to a temporary file & replace
+        path = os.path.join(self.root, f'epoch-{epoch:03d}.bin')
+
+        with open(f'{path}.tmp', 'wb') as output_file: output_file.write(serialize())
+
+        os.replace(f'{path}.tmp', path)
+
+        # Rank the checkpoint; earlier checkpoints win ties
+        self.kept.append((score, epoch, path, metrics))
+        self.kept.sort(key=lambda checkpoint: (-checkpoint[0], checkpoint[1]))
+
+        # Remove the displaced checkpoints
+        for _, _, displaced, _ in self.kept[self.keep:]: os.remove(displaced)
+
+        self.kept = self.kept[:self.keep]
+
+        # Update the best checkpoint
+        self.best = self.kept[0]
+
+        # Report to the user
+        if Checkpoints.Log is not None:
+
+            Checkpoints.Log.Info('Kept checkpoint: epoch %s %s %.4f', epoch, self.metric, metrics[self.metric])
+
+        # Return the result
+        return self.best[1] == epoch
+
+    def stop(self) -> bool:
+        """
+        Returns a flag indicating if the run ran out of patience
+        :return: boolean flag indicating if the training should stop
+        """
+        return self.patience is not None and self.stale >= self.patience
+
+    def metrics(self) -> dict:
+        """
+        Returns the metrics of the best checkpoint
+        :return: The metrics or None if there are no checkpoints
+        """
+        return self.kept[0][3] if len(self.kept) > 0 else None
+
+    def bytes(self) -> bytes:
+        """
+        Returns the best serialized model
+        :return: The bytes of the best checkpoint or None if there are no checkpoints
+        """
+
+        # If there are no checkpoints, leave
+        if len(self.kept) == 0: return None
+
+        with open(self.kept[0][2], 'rb') as input_file:
+
+            return input_file.read()
@@ -0,0 +1,180 @@
+"""
+Pre-tokenized training corpus. Tokenizes a dataset's training & evaluation splits once & serializes them to DocBin
+files keyed by the dataset's hash, the tokenizer's configuration & the split, so every epoch & run streams the
+documents from disk instead of tokenizing the texts again.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Imports
+
+import os
+import json
+import hashlib
+
+from mltrainer import MLTrainer
+
+## -------
+## Classes
+
+class CorpusCache:
+    """
+    DocBin cache of a dataset's training & evaluation splits. Each document carries its features in its user data,
+    so the training examples & the evaluation features are read back from the files alone, while the documents'
+    cats stay empty for the pipe that scores them. The files are named after
+    the key of the data they hold, so a cache directory may be shared by datasets, tokenizers & splits & synced
+    with a bucket as is.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log     = None
+    Version = 2
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def key_of(data: list, language, split: float, seed: int) -> str:
+        """
+        Returns the key of the specified data's splits when tokenized by the given language
+        :param data: list of (text, features) pairs
+        :param language: The nlp instance whose tokenizer tokenizes the texts
+        :param split: The ratio to split the data
+        :param seed: The seed of the split
+        :return: The hexadecimal key
+        """
+
+        # Initialize the digest with the file format, the tokenizer's configuration & the split
+        digest = hashlib.sha256(json.dumps([CorpusCache.Version, CorpusCache.spacy_version, language.lang,
+                                            language.config['nlp']['tokenizer'], split, seed],
+                                           sort_keys=True, default=str).encode('utf-8'))
+
+        # Hash the rows
+        for text, features in data: digest.update(json.dumps([text, features], sort_keys=True).encode('utf-8'))
+
+        # Return the result
+        return digest.hexdigest()[:16]
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, root: str, name: str, language, data: list, split: float = 0.8, seed: int = 0):
+        """
+        Initializes the CorpusCache of the specified data, tokenizing & serializing its splits if they're not
+        cached yet.
+        :param root: The directory containing the cached files
+        :param name: The name of the dataset, e.g. the pipe it trains
+        :param language: The nlp instance whose tokenizer tokenizes the texts
+        :param data: list of (text, features) pairs
+        :param split: The ratio to split the data
+        :param seed: The seed of the split
+        """
+
+        from import_modules import import_modules
+
+        # Import the required modules
+        import_modules(CorpusCache, 0,
+                       spacy={'package_name': 'spacy',
+                              'about': {
+                                  '__version__': {'as': 'spacy_version'}
+                              },
+                              'tokens': {
+                                  'DocBin': {}
+                              },
+                              'training': {
+                                  'Example': {}
+                              }})
+
+        # Initialize the language & the paths
+        self.language   = language
+        self.key        = CorpusCache.key_of(data, language, split, seed)
+        self.training   = os.path.join(root, f'{name}-{self.key}-training.spacy')
+        self.evaluation = os.path.join(root, f'{name}-{self.key}-evaluation.spacy')
+
+        # If the splits are cached, we're done
+        if os.path.isfile(self.training) and os.path.isfile(self.evaluation):
+
+            if CorpusCache.Log is not None: CorpusCache.Log.Info('Using cached corpus: %s', self.training)
+
+            return
+
+        # Otherwise, split the data & tokenize each split
+        os.makedirs(root, exist_ok=True)
+
+        for path, split_data in zip((self.training, self.evaluation), MLTrainer.prepare(list(data), split, seed)):
+
+            # Report to the user
+            if CorpusCache.Log is not None: CorpusCache.Log.Info('Tokenizing %s rows: %s', len(split_data), path)
+
+            self.save(path, split_data)
+
+    ## -------
+    ## Methods
+
+    def save(self, path: str, data: list) -> None:
+        """
+        Tokenizes the specified data & serializes it to the given path. The file is replaced atomically.
+        :param path: The path of the DocBin file
+        :param data: list of (text, features) pairs
+        """
+
+        # Initialize the DocBin
+        documents = CorpusCache.DocBin(store_user_data=True)
+
+        # Tokenize the texts & attach their features; the cats are left for the scoring pipe
+        for document, (_, features) in zip(self.language.tokenizer.pipe(text for text, _ in data), data):
+
+            document.user_data['cats'] = features
+            documents.add(document)
+
+        # Write to a temporary file & replace
+        with open(f'{path}.tmp', 'wb') as output_file: output_file.write(documents.to_bytes())
+
+        os.replace(f'{path}.tmp', path)
+
+    def documents(self, path: str):
+        """
+        Streams the documents serialized at the specified path
+        :param path: The path of the DocBin file
+        :return: generator of the documents
+        """
+
+        with open(path, 'rb') as input_file:
+
+            yield from CorpusCache.DocBin().from_bytes(input_file.read()).get_docs(self.language.vocab)
+
+    def examples(self):
+        """
+        Streams the training examples; the documents are not tokenized again
+        :return: generator of Examples
+        """
+
+        # Initialize the name
+        Example = CorpusCache.Example
+
+        # Return the examples
+        return (Example.from_dict(document, {'cats': document.user_data['cats']})
+                for document in self.documents(self.training))
+
+    def evaluation_set(self) -> tuple:
+        """
+        Returns the evaluation documents & their features. The documents carry no cats, so a pipe that doesn't set
+        them scores nothing
+        :return: tuple of the list of documents & the list of their features
+        """
+
+        # Retrieve the documents
+        documents = list(self.documents(self.evaluation))
+
+        # Return the result
+        return documents, [dict(document.user_data['cats']) for document in documents]
+
+    def paths(self) -> list:
+        """
+        Returns the paths of the cached files
+        :return: list of the training & evaluation paths
+        """
+        return [self.training, self.evaluation]
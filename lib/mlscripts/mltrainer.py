@@ -16,16 +16,17 @@ class MLTrainer:
     ## Static Methods
 
     @staticmethod
-    def prepare(dataset: dict, split: float) -> tuple:
+    def prepare(dataset: dict, split: float, seed: int = None) -> tuple:
         """
         Prepares the training & evaluation dataset from the specified data, & split ratio.
         :param dataset: The data to prepare
         :param split: The ratio to split the data
+        :param seed: The seed of the shuffle; the same seed reproduces the same split
         :return: The training & evaluation datasets as a list of tuples
         """
 
         # Initialize the functions
-        shuffle  = MLTrainer.random.shuffle
+        shuffle  = MLTrainer.random.Random(seed).shuffle if seed is not None else MLTrainer.random.shuffle
 
         # Report to the user
         if MLTrainer.Log is not None: MLTrainer.Log.Info(f'Shuffling data')
@@ -20,7 +20,8 @@ class SpacyTextCatTrainer (MLTrainer):
     ## -------------
     ## Static Fields
 
-    Log = None
+    Log         = None
+    BatchSize   = (4., 64., 1.001)
 
     ## --------------
     ## Static Methods
@@ -67,62 +68,55 @@ class SpacyTextCatTrainer (MLTrainer):
         return pipe
 
     @staticmethod
-    def evaluate(tokenizer, trained, texts: list, feature_set: list) -> dict:
-
-        # Initialize a tuple containing enumerated, tokenized text values
-        documents = enumerate(trained.pipe((tokenizer(text) for text in texts)))
-
-        # Initialize the metrics
-        true_positive   = 0.0
-        true_negative   = 0.0
-        false_positive  = 1e-8
-        false_negative  = 1e-8
-
-        # Iterate through each of the index-document pairs
-        for index, document in documents:
-
-            # Initialize a handle to the features
-            labels = feature_set[index]
-
-            # Iterate through the label-score pairs
-            for feature, score in document.cats.items():
-
-                # Increment the true positive score
-                if score >= 0.5 and labels[feature] >= 0.5:
-                    true_positive += 1.0
+    def evaluate(tokenizer, trained, texts: list, feature_set: list, evaluator=None) -> dict:
+        """
+        Evaluates the specified pipe over the given texts
+        :param tokenizer: The tokenizer of the texts
+        :param trained: The trained pipe
+        :param texts: The texts or pre-tokenized documents to evaluate with
+        :param feature_set: The features corresponding to each text
+        :param evaluator: The TextCatEvaluator; defaults to batches of 256 documents thresholded at 0.5
+        :return: dict of the micro counts & metrics, the macro metrics & each label's metrics
+        """
 
-                # Increment the false positive score
-                elif score >= 0.5 > labels[feature]:
-                    false_positive += 1.0
+        from textcat_evaluation import TextCatEvaluator
 
-                # Increment the true negative score
-                elif score < 0.5 and labels[feature] < 0.5:
-                    true_negative += 1
+        # Return the result
+        return (evaluator if evaluator is not None else TextCatEvaluator())(tokenizer, trained, texts, feature_set)
 
-                # Increment the false negative score
-                elif score < 0.5 <= labels[feature]:
-                    false_negative += 1
+    @staticmethod
+    def schedule(batch_size):
+        """
+        Returns the batch size schedule corresponding to the specified batch size
+        :param batch_size: A fixed batch size or a (start, stop, compound) tuple compounding the size from start to stop
+        :return: The batch size or the generator of batch sizes
+        """
 
-        # Calculate the precision & recall
-        precision   = true_positive / (true_positive + false_positive)
-        recall      = true_positive / (true_positive + false_negative)
+        # If the batch size is fixed, return it
+        if isinstance(batch_size, (int, float)): return int(batch_size)
 
-        # Initialize the f score, precision, & recall
-        f_score = 0.0 if (precision + recall == 0) else 2 * (precision * recall) / (precision + recall)
-
-        # Return the result
-        return {
-            'true_positive' : true_positive,
-            'true_negative' : true_negative,
-            'false_positive': false_positive,
-            'false_negative': false_negative,
-            'f_score'       : f_score,
-            'precision'     : precision,
-            'recall'        : recall
-        }
+        # Otherwise, return the compounding schedule
+        return SpacyTextCatTrainer.compounding(*batch_size)
 
     @staticmethod
-    def train_pipe(language, pipe_name, pipe, epochs, training_dataset, evaluation_text, evaluation_features):
+    def train_pipe(language, pipe_name, pipe, epochs, training_dataset, evaluation_text, evaluation_features,
+                   batch_size=None, checkpoints=None, evaluator=None):
+        """
+        Trains the specified pipe, updating the model once per minibatch of examples
+        :param language: The nlp instance containing the pipe
+        :param pipe_name: The name of the pipe
+        :param pipe: The pipe to train
+        :param epochs: The amount of training cycles
+        :param training_dataset: list of (text, features) pairs to train with or a callable returning the epoch's
+        Examples, e.g. CorpusCache.examples
+        :param evaluation_text: The texts or pre-tokenized documents to evaluate with
+        :param evaluation_features: The features corresponding to each evaluation text
+        :param batch_size: A fixed batch size or a (start, stop, compound) tuple; defaults to BatchSize
+        :param checkpoints: The Checkpoints keeping the best epochs; once the training stops, the language is
+        restored to the best checkpoint. None keeps the last epoch
+        :param evaluator: The TextCatEvaluator evaluating each epoch
+        :return: The metrics of the best epoch
+        """
 
         from import_modules import import_modules
 
@@ -144,7 +138,6 @@ class SpacyTextCatTrainer (MLTrainer):
                              'time': {}})
 
         # Initialize the names
-        compounding = SpacyTextCatTrainer.compounding
         minibatch   = SpacyTextCatTrainer.minibatch
         time        = SpacyTextCatTrainer.time
         Adam        = SpacyTextCatTrainer.Adam
@@ -156,9 +149,6 @@ class SpacyTextCatTrainer (MLTrainer):
         # Report to the user
         if SpacyTextCatTrainer.Log is not None: SpacyTextCatTrainer.Log.Info(f'Pipes: {language.pipe_names}')
 
-        # Initialize the choices
-        choices = []
-
         # Disable all the pipes except the classifier
         with language.disable_pipes(*pipe_names):
 
@@ -174,14 +164,21 @@ class SpacyTextCatTrainer (MLTrainer):
             # Performing training
             for epoch in range(epochs):
 
-                # Initialize the losses
-                losses = {}
+                # Initialize the losses & the epoch's start time
+                losses      = {}
+                epoch_time  = time()
+
+                # Retrieve the epoch's examples; a callable streams pre-tokenized examples
+                examples = training_dataset() if callable(training_dataset) else \
+                    (Example.from_dict(language.make_doc(text), {'cats': features}) for text, features in training_dataset)
 
                 # Retrieve the batches
-                batches = minibatch(training_dataset, size=compounding(4., 64., 1.001))
+                batches = minibatch(examples, size=SpacyTextCatTrainer.schedule(
+                    batch_size if batch_size is not None else SpacyTextCatTrainer.BatchSize))
 
-                # Initialize the batch count
-                batch_count = 0
+                # Initialize the batch & example counts
+                batch_count     = 0
+                example_count   = 0
 
                 # Iterate through each batch
                 for batch in batches:
@@ -192,35 +189,67 @@ class SpacyTextCatTrainer (MLTrainer):
                     # Report
                     if SpacyTextCatTrainer.Log is not None:
 
-                        SpacyTextCatTrainer.Log.Info(f'Training: Epoch {epoch} Batch {batch_count}')
+                        SpacyTextCatTrainer.Log.Debug('Training: Epoch %s Batch %s', epoch, batch_count, sample=100)
 
-                    # Iterate through the text-annotations pairs
-                    for text, features in batch:
+                    # Update the model with the batch
+                    language.update(batch, drop=0.2, sgd=optimizer, losses=losses)
 
-                        # Initialize the example
-                        example = Example.from_dict(language.make_doc(text), {'cats': features})
-
-                        # Update the model with the example
-                        language.update([example], drop=0.2, sgd=optimizer, losses=losses)
+                    # Increment the example count
+                    example_count += len(batch)
 
                 # Initialize the metrics
-                training_time = time() - start_time
+                training_time   = time() - start_time
+                epoch_time      = time() - epoch_time
 
                 # With the optimizer averages
                 with pipe.model.use_params(optimizer.averages):
 
                     # Calculate & retrieve the metrics
                     metrics = SpacyTextCatTrainer.evaluate(language.tokenizer, pipe,
-                                                           evaluation_text, evaluation_features)
+                                                           evaluation_text, evaluation_features, evaluator)
 
-                # Insert the training time (seconds)
-                metrics['training_time'] = training_time
+                # Insert the training time (seconds), the epoch's throughput & training loss
+                metrics['training_time']        = training_time
+                metrics['epoch']                = epoch
+                metrics['batches']              = batch_count
+                metrics['examples_per_second']  = example_count / max(epoch_time, 1e-9)
+                metrics['loss']                 = float(losses.get(pipe_name, 0.0))
 
                 # Report
                 if SpacyTextCatTrainer.Log is not None: SpacyTextCatTrainer.Log.Info(f'Trained {pipe_name} - {str(metrics)}')
 
-                # Append to the choices
-                choices.append((language.to_bytes(), language.config, metrics))
+                # If we're not keeping checkpoints, continue
+                if checkpoints is None: continue
+
+                # Keep the checkpoint with the averages the metrics were evaluated with
+                def serialize():
+
+                    with pipe.model.use_params(optimizer.averages): return language.to_bytes()
+
+                checkpoints.add(epoch, metrics, serialize)
+
+                # If the pipe stopped improving, stop the training
+                if checkpoints.stop():
+
+                    # Report
+                    if SpacyTextCatTrainer.Log is not None:
+
+                        SpacyTextCatTrainer.Log.Info('Stopping %s: no improvement in %s epochs', pipe_name,
+                                                     checkpoints.patience)
+
+                    break
+
+        # If we kept checkpoints, restore the best
+        if checkpoints is not None and checkpoints.metrics() is not None:
+
+            # Report
+            if SpacyTextCatTrainer.Log is not None:
+
+                SpacyTextCatTrainer.Log.Info('Restoring %s: epoch %s', pipe_name, checkpoints.metrics()['epoch'])
+
+            language.from_bytes(checkpoints.bytes())
+
+            metrics = checkpoints.metrics()
 
         # Return the result
         return metrics
@@ -228,7 +257,9 @@ class SpacyTextCatTrainer (MLTrainer):
     ## -----------
     ## Constructor
 
-    def __init__(self, spacy_model, dataset, split=0.8, epochs=8):
+    def __init__(self, spacy_model, dataset, split=0.8, epochs=8, batch_size=None, seed=0, cache='corpus',
+                 checkpoints='checkpoints', metric='f_score', keep=2, patience=3, evaluation_batch_size=256,
+                 thresholds=None):
         """
         Initializes & trains the Spacy Textcat pipe
         :param spacy_model: The name of the spacy language model
@@ -236,6 +267,16 @@ class SpacyTextCatTrainer (MLTrainer):
         :param dataset: The dataset to train/evaluate
         :param split: The ratio representing the data split
         :param epochs: The amount of training cycles
+        :param batch_size: A fixed batch size or a (start, stop, compound) tuple; defaults to BatchSize
+        :param seed: The seed of the data split
+        :param cache: The directory of the pre-tokenized corpus cache; None tokenizes the texts every epoch
+        :param checkpoints: The directory of the checkpoints; None exports the last epoch of each pipe
+        :param metric: The metric ranking the textcat checkpoints; the spancat pipe doesn't set the cats the
+        evaluation scores, so its checkpoints are ranked by its training loss
+        :param keep: The amount of checkpoints kept per pipe
+        :param patience: The amount of epochs without improvement that stops a pipe's training
+        :param evaluation_batch_size: The amount of documents scored at a time during evaluation
+        :param thresholds: The thresholds swept by each evaluation, if any
         """
         # Retrieved the formatted training & evaluation datasets
         super().__init__(dataset, split)
@@ -310,27 +351,73 @@ class SpacyTextCatTrainer (MLTrainer):
         spancat = SpacyTextCatTrainer.prepare_pipe(nlp, 'spancat', {}, spancat_labels)
         textcat = SpacyTextCatTrainer.prepare_pipe(nlp, 'textcat_multilabel', {}, textcat_labels)
 
-        # Prep the data
-        spancat_training, spancat_evaluation = MLTrainer.prepare(spancat_data, split)
-        textcat_training, textcat_evaluation = MLTrainer.prepare(textcat_data, split)
+        # Initialize the corpora
+        self.corpora = []
+
+        # If we're caching, tokenize the data once & stream the examples & evaluation documents from the cache
+        if cache is not None:
+
+            from corpus_cache import CorpusCache
+
+            # Report to the user
+            if SpacyTextCatTrainer.Log is not None: SpacyTextCatTrainer.Log.Info(f'Preparing corpus: {cache}')
+
+            # Initialize the caches
+            CorpusCache.Log = SpacyTextCatTrainer.Log
+            self.corpora    = [CorpusCache(cache, 'spancat', nlp, spancat_data, split, seed),
+                               CorpusCache(cache, 'textcat', nlp, textcat_data, split, seed)]
+
+            # Initialize the training examples
+            spancat_training = self.corpora[0].examples
+            textcat_training = self.corpora[1].examples
+
+            # Retrieve the evaluation documents & featuresets
+            spancat_evaluation_text, spancat_evaluation_features = self.corpora[0].evaluation_set()
+            textcat_evaluation_text, textcat_evaluation_features = self.corpora[1].evaluation_set()
+
+        # Otherwise, prep the data
+        else:
+
+            spancat_training, spancat_evaluation = MLTrainer.prepare(spancat_data, split, seed)
+            textcat_training, textcat_evaluation = MLTrainer.prepare(textcat_data, split, seed)
+
+            # Split the evalutation & featuresets for spancat
+            spancat_evaluation_text     = [text for text, features in spancat_evaluation]
+            spancat_evaluation_features = [features for text, features in spancat_evaluation]
+
+            # Split the evalutation & featuresets for textcat
+            textcat_evaluation_text     = [text for text, features in textcat_evaluation]
+            textcat_evaluation_features = [features for text, features in textcat_evaluation]
+
+        # Initialize the checkpoints of each pipe
+        spancat_checkpoints = None
+        textcat_checkpoints = None
+
+        if checkpoints is not None:
+
+            from checkpoints import Checkpoints
+
+            Checkpoints.Log     = SpacyTextCatTrainer.Log
+            spancat_checkpoints = Checkpoints(f'{checkpoints}/spancat', 'loss', keep, patience, maximize=False)
+            textcat_checkpoints = Checkpoints(f'{checkpoints}/textcat_multilabel', metric, keep, patience)
 
-        # Split the evalutation & featuresets for spancat
-        spancat_evaluation_text     = [text for text, features in spancat_evaluation]
-        spancat_evaluation_features = [features for text, features in spancat_evaluation]
+        from textcat_evaluation import TextCatEvaluator
 
-        # Split the evalutation & featuresets for textcat
-        textcat_evaluation_text     = [text for text, features in textcat_evaluation]
-        textcat_evaluation_features = [features for text, features in textcat_evaluation]
+        # Initialize the evaluator
+        TextCatEvaluator.Log    = SpacyTextCatTrainer.Log
+        evaluator               = TextCatEvaluator(evaluation_batch_size, thresholds=thresholds)
 
         # Train the spancat pipe
         self.spancat_metrics = SpacyTextCatTrainer.train_pipe(nlp, 'spancat', spancat, epochs, spancat_training,
-                                       spancat_evaluation_text, spancat_evaluation_features)
+                                       spancat_evaluation_text, spancat_evaluation_features, batch_size,
+                                       spancat_checkpoints, evaluator)
 
         # Train the textcat pipe
         self.textcat_metrics = SpacyTextCatTrainer.train_pipe(nlp, 'textcat_multilabel', textcat, epochs, textcat_training,
-                                       textcat_evaluation_text, textcat_evaluation_features)
+                                       textcat_evaluation_text, textcat_evaluation_features, batch_size,
+                                       textcat_checkpoints, evaluator)
 
-        # Initialize the language, configuration & bytes
+        # Initialize the language, configuration & bytes; the language holds each pipe's best checkpoint
         self._language          = nlp
         self._configuration     = nlp.config
         self._bytes             = nlp.to_bytes()
@@ -0,0 +1,239 @@
+"""
+Text categorizer evaluation. Scores batches of documents with a trained pipe & computes the per-label, macro &
+micro precision, recall & F1 from NumPy score & gold matrices.
+@author Carlos L. Cuenca
+"""
+
+## -------
+## Classes
+
+class TextCatEvaluator:
+    """
+    Evaluates a text categorizer. The documents are tokenized & scored in batches; their scores & gold labels are
+    collected into (documents, labels) matrices, so thresholding & counting are vectorized over every document &
+    label at once. Threshold sweeps reuse the same score matrix.
+    @author Carlos L. Cuenca
+    """
+
+    ## -------------
+    ## Static Fields
+
+    Log = None
+
+    ## --------------
+    ## Static Methods
+
+    @staticmethod
+    def divide(numerator, denominator):
+        """
+        Divides the specified arrays element-wise; divisions by zero are zero
+        :param numerator: The numerator array
+        :param denominator: The denominator array
+        :return: The quotient array
+        """
+
+        # Initialize the name
+        numpy = TextCatEvaluator.numpy
+
+        # Return the result
+        return numpy.divide(numerator, denominator, out=numpy.zeros(numpy.shape(numerator), dtype=numpy.float64),
+                            where=numpy.asarray(denominator) != 0)
+
+    @staticmethod
+    def cleared(documents: list):
+        """
+        Clears the cats of the specified documents, so they only hold the scores of the pipe they're passed to
+        :param documents: The pre-tokenized documents
+        :return: generator of the documents
+        """
+
+        for document in documents:
+
+            document.cats = {}
+
+            yield document
+
+    @staticmethod
+    def counts(predicted, gold) -> tuple:
+        """
+        Counts the true & false positives & negatives of each label
+        :param predicted: Boolean array of shape (..., documents, labels)
+        :param gold: Boolean array of shape (documents, labels)
+        :return: tuple of the true positive, false positive, false negative & true negative arrays of shape
+        (..., labels)
+        """
+
+        # Count the positives
+        true_positive   = (predicted & gold).sum(axis=-2)
+        false_positive  = (predicted & ~gold).sum(axis=-2)
+        false_negative  = (~predicted & gold).sum(axis=-2)
+
+        # Return the result; the true negatives are the remaining documents
+        return true_positive, false_positive, false_negative, \
+            gold.shape[0] - true_positive - false_positive - false_negative
+
+    @staticmethod
+    def scores_of(true_positive, false_positive, false_negative) -> tuple:
+        """
+        Returns the precision, recall & F1 of the specified counts
+        :param true_positive: The true positive counts
+        :param false_positive: The false positive counts
+        :param false_negative: The false negative counts
+        :return: tuple of the precision, recall & F1 arrays
+        """
+
+        # Initialize the name
+        divide = TextCatEvaluator.divide
+
+        # Calculate the precision & recall
+        precision   = divide(true_positive, true_positive + false_positive)
+        recall      = divide(true_positive, true_positive + false_negative)
+
+        # Return the result
+        return precision, recall, divide(2 * precision * recall, precision + recall)
+
+    ## ------------
+    ## Constructors
+
+    def __init__(self, batch_size: int = 256, threshold: float = 0.5, thresholds: list = None):
+        """
+        Initializes the TextCatEvaluator to its' default state.
+        :param batch_size: The amount of documents tokenized & scored at a time
+        :param threshold: The score at or above which a label is predicted
+        :param thresholds: The thresholds to sweep, if any
+        """
+
+        from import_modules import import_modules
+
+        # Import the required modules
+        import_modules(TextCatEvaluator, 0,
+                       numpy={'package_name': 'numpy', 'as': 'numpy'})
+
+        self.batch_size = batch_size
+        self.threshold  = threshold
+        self.thresholds = thresholds
+
+    ## -------
+    ## Methods
+
+    def matrices(self, tokenizer, trained, texts: list, feature_set: list) -> tuple:
+        """
+        Scores the specified texts, collecting the score & gold matrices
+        :param tokenizer: The tokenizer of the texts
+        :param trained: The trained pipe
+        :param texts: The texts or pre-tokenized documents to score
+        :param feature_set: The features corresponding to each text
+        :return: tuple of the labels, the (documents, labels) score matrix & the boolean gold matrix
+        """
+
+        # Initialize the name
+        numpy = TextCatEvaluator.numpy
+
+        # Initialize the labels & the matrices
+        labels  = list(trained.labels)
+        scores  = numpy.zeros((len(texts), len(labels)), dtype=numpy.float32)
+        gold    = numpy.array([[features.get(label, 0.0) for label in labels] for features in feature_set],
+                              dtype=numpy.float32).reshape(len(feature_set), len(labels)) >= 0.5
+
+        # Tokenize the texts in batches; pre-tokenized documents are reused every epoch, so their cats are cleared
+        documents = tokenizer.pipe(texts, batch_size=self.batch_size) \
+            if all(isinstance(text, str) for text in texts) else TextCatEvaluator.cleared(texts)
+
+        # Score the documents in batches; labels a pipe doesn't set in the cats score zero
+        for index, document in enumerate(trained.pipe(documents, batch_size=self.batch_size)):
+
+            scores[index] = [document.cats.get(label, 0.0) for label in labels]
+
+        # Return the result
+        return labels, scores, gold
+
+    def metrics(self, labels: list, scores, gold, threshold: float) -> dict:
+        """
+        Computes the metrics of the specified matrices at the given threshold
+        :param labels: The labels of the matrices' columns
+        :param scores: The (documents, labels) score matrix
+        :param gold: The (documents, labels) boolean gold matrix
+        :param threshold: The score at or above which a label is predicted
+        :return: dict of the micro counts & metrics, the macro metrics & each label's metrics
+        """
+
+        # Count each label's outcomes
+        true_positive, false_positive, false_negative, true_negative = \
+            TextCatEvaluator.counts(scores >= threshold, gold)
+
+        # Calculate each label's & the micro metrics
+        precision, recall, f_score = TextCatEvaluator.scores_of(true_positive, false_positive, false_negative)
+        micro = TextCatEvaluator.scores_of(true_positive.sum(), false_positive.sum(), false_negative.sum())
+
+        # Return the result
+        return {
+            'true_positive'     : float(true_positive.sum()),
+            'true_negative'     : float(true_negative.sum()),
+            'false_positive'    : float(false_positive.sum()),
+            'false_negative'    : float(false_negative.sum()),
+            'f_score'           : float(micro[2]),
+            'precision'         : float(micro[0]),
+            'recall'            : float(micro[1]),
+            'macro_f_score'     : float(f_score.mean()) if len(labels) > 0 else 0.0,
+            'macro_precision'   : float(precision.mean()) if len(labels) > 0 else 0.0,
+            'macro_recall'      : float(recall.mean()) if len(labels) > 0 else 0.0,
+            'threshold'         : threshold,
+            'labels'            : {label: {'f_score': float(f_score[index]), 'precision': float(precision[index]),
+                                           'recall': float(recall[index]), 'support': int(gold[:, index].sum())}
+                                   for index, label in enumerate(labels)}
+        }
+
+    def sweep(self, scores, gold, thresholds: list) -> list:
+        """
+        Computes the micro & macro metrics at each of the specified thresholds from the same score matrix
+        :param scores: The (documents, labels) score matrix
+        :param gold: The (documents, labels) boolean gold matrix
+        :param thresholds: The thresholds to sweep
+        :return: list of dicts of each threshold's micro & macro precision, recall & F1
+        """
+
+        # Initialize the name
+        numpy = TextCatEvaluator.numpy
+
+        # Count the outcomes at every threshold at once
+        thresholds = numpy.asarray(thresholds, dtype=numpy.float64)
+        true_positive, false_positive, false_negative, _ = \
+            TextCatEvaluator.counts(scores[None, :, :] >= thresholds[:, None, None], gold)
+
+        # Calculate the macro & micro metrics of each threshold
+        precision, recall, f_score = TextCatEvaluator.scores_of(true_positive, false_positive, false_negative)
+        micro = TextCatEvaluator.scores_of(true_positive.sum(axis=1), false_positive.sum(axis=1),
+                                           false_negative.sum(axis=1))
+
+        # Return the result
+        return [{'threshold': float(threshold),
+                 'f_score': float(micro[2][index]), 'precision': float(micro[0][index]), 'recall': float(micro[1][index]),
+                 'macro_f_score': float(f_score[index].mean()) if f_score.shape[1] > 0 else 0.0,
+                 'macro_precision': float(precision[index].mean()) if precision.shape[1] > 0 else 0.0,
+                 'macro_recall': float(recall[index].mean()) if recall.shape[1] > 0 else 0.0}
+                for index, threshold in enumerate(thresholds)]
+
+    ## ---------
+    ## Overloads
+
+    def __call__(self, tokenizer, trained, texts: list, feature_set: list) -> dict:
+        """
+        Evaluates the specified pipe over the given texts
+        :param tokenizer: The tokenizer of the texts
+        :param trained: The trained pipe
+        :param texts: The texts or pre-tokenized documents to evaluate with
+        :param feature_set: The features corresponding to each text
+        :return: dict of the metrics & the threshold sweep, if any
+        """
+
+        # Score the texts
+        labels, scores, gold = self.matrices(tokenizer, trained, texts, feature_set)
+
+        # Calculate the metrics
+        result = self.metrics(labels, scores, gold, self.threshold)
+
+        # Sweep the thresholds, if any
+        if self.thresholds is not None: result['sweep'] = self.sweep(scores, gold, self.thresholds)
+
+        # Return the result
+        return result
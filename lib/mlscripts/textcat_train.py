@@ -8,6 +8,7 @@ in S3 buckets into serialized versions placed into another S3 bucket.another
 ## Imports
 
 import sys  # Command-line arguments
+import os   # Corpus cache
 import re   # Regex
 import json # Parse dataset
 
@@ -69,8 +70,32 @@ if __name__ == "__main__":
         dataset = resource('s3').Object(arguments['datasetbucket'], arguments['dataset'])
         dataset = json.loads(dataset.get()['Body'].read())
 
+        # Retrieve the optional batch size; the trainer compounds it by default
+        batch_size      = int(arguments.dictionary['batchsize']) if 'batchsize' in arguments.dictionary else None
+
+        # Initialize the corpus cache & the datasets bucket; a bare --cache parses as None
+        cache           = arguments.dictionary.get('cache') or 'corpus'
+        datasets_bucket = resource('s3').Bucket(arguments['datasetbucket'])
+        uploaded        = set()
+        os.makedirs(cache, exist_ok=True)
+
+        # Retrieve the pre-tokenized corpora cached alongside the dataset
+        for cached in datasets_bucket.objects.filter(Prefix=f'{dataset_key}/corpus/'):
+
+            path = os.path.join(cache, os.path.basename(cached.key))
+            uploaded.add(os.path.basename(cached.key))
+
+            if not os.path.isfile(path): datasets_bucket.download_file(cached.key, path)
+
         # Train the model
-        trainer = SpacyTextCatTrainer(spacy_model, dataset)
+        trainer = SpacyTextCatTrainer(spacy_model, dataset, batch_size=batch_size, cache=cache)
+
+        # Upload the corpora the bucket doesn't hold yet; their names are keyed by the data & tokenizer, so a
+        # listed object already holds the same corpus
+        for path in (path for corpus in trainer.corpora for path in corpus.paths()):
+
+            if os.path.basename(path) not in uploaded:
+                datasets_bucket.upload_file(path, f'{dataset_key}/corpus/{os.path.basename(path)}')
 
         # Report to the user
         Log.Info(f'Retrieving models bucket: {arguments["modelsbucket"]}.')
@@ -0,0 +1,54 @@
+"""
+Tests of the vectorized graph algorithms.
+"""
+
+## -------
+## Imports
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+sparse = pytest.importorskip('scipy.sparse')
+
+from graph_algorithms import GraphAlgorithms
+
+## -------
+## Helpers
+
+def chain(node_count: int):
+    """
+    Returns the adjacency of a chain 0 -> 1 -> ... -> node_count - 1
+    :param node_count: The amount of nodes
+    :return: scipy csr matrix
+    """
+    return sparse.csr_matrix((numpy.ones(node_count - 1), (numpy.arange(node_count - 1), numpy.arange(1, node_count))),
+                             shape=(node_count, node_count))
+
+## -----
+## Tests
+
+def test_seeds_as_long_as_the_node_count_are_ids_not_weights():
+
+    # Three seed ids on a three-node graph used to be read as the weights [0, 0, 2]
+    seeded, _   = GraphAlgorithms.pagerank(chain(3), seeds=[0, 0, 2])
+    weighted, _ = GraphAlgorithms.pagerank(chain(3), personalization=[1.0, 0.0, 1.0])
+
+    numpy.testing.assert_allclose(seeded, weighted)
+    assert seeded[0] > 0
+
+def test_personalization_weights_every_node():
+
+    ranks, metrics  = GraphAlgorithms.pagerank(chain(4), personalization=[0.0, 0.0, 0.0, 3.0])
+    uniform, _      = GraphAlgorithms.pagerank(chain(4))
+
+    assert metrics['converged']
+    numpy.testing.assert_allclose(ranks, [0.0, 0.0, 0.0, 1.0], atol=1e-6)
+    assert uniform.sum() == pytest.approx(1.0) and (numpy.diff(uniform) > 0).all()
+
+def test_ambiguous_teleport_arguments_are_rejected():
+
+    with pytest.raises(ValueError):
+        GraphAlgorithms.pagerank(chain(4), personalization=[1.0, 0.0])
+
+    with pytest.raises(ValueError):
+        GraphAlgorithms.pagerank(chain(4), personalization=[1.0] * 4, seeds=[0])
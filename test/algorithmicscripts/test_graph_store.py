@@ -0,0 +1,104 @@
+"""
+Tests of the memory-mapped CSR graph store & its out-of-core builder.
+"""
+
+## -------
+## Imports
+
+import os
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+pytest.importorskip('scipy')
+
+from graph_store import GraphStoreBuilder
+
+## -------
+## Helpers
+
+def chunks_of(directory, generator, node_count: int, edge_counts: list) -> list:
+    """
+    Writes random edge chunks with repeated edges into the specified directory
+    :param directory: The directory to write the chunks to
+    :param generator: The numpy random generator
+    :param node_count: The amount of nodes
+    :param edge_counts: The amount of edges of each chunk
+    :return: list of chunk paths
+    """
+
+    # Initialize the result
+    chunks = []
+
+    for index, edge_count in enumerate(edge_counts):
+
+        # Write the chunk
+        chunks.append(os.path.join(directory, f'edges-{index:05d}.npz'))
+        numpy.savez(chunks[-1],
+                    source=generator.integers(0, node_count, edge_count).astype(numpy.uint32),
+                    target=generator.integers(0, node_count, edge_count).astype(numpy.uint32),
+                    type=generator.integers(0, 3, edge_count).astype(numpy.uint8),
+                    timestamp=generator.integers(0, 1000, edge_count).astype(numpy.uint32))
+
+    # Return the result
+    return chunks
+
+def dense_of(chunks: list, node_count: int, table=None):
+    """
+    Returns the dense adjacency of the specified chunks; repeated edges are summed
+    :param chunks: The chunk paths
+    :param node_count: The amount of nodes
+    :param table: Optional array of the weight of each edge type
+    :return: numpy array of shape (node_count, node_count)
+    """
+
+    # Initialize the result
+    dense = numpy.zeros((node_count, node_count))
+
+    for chunk in chunks:
+
+        columns = GraphStoreBuilder.load_chunk(chunk)
+        numpy.add.at(dense, (columns['source'], columns['target']),
+                     table[columns['type']] if table is not None else 1.0)
+
+    # Return the result
+    return dense
+
+## -----
+## Tests
+
+@pytest.mark.parametrize('memory', [1, 7, 64, 1 << 24])
+def test_store_matches_the_dense_adjacency(tmp_path, memory):
+
+    # Write the chunks, including an empty one
+    chunks  = chunks_of(tmp_path, numpy.random.default_rng(memory), 40, [150, 0, 250])
+    store   = GraphStoreBuilder(chunks, 0, {0: 1.0, 1: 0.5, 2: 2.0}, memory).build(str(tmp_path / 'store'))
+
+    # The canonical matrices match the dense adjacency
+    assert numpy.allclose(store.matrix(weighted=False, canonical=True).toarray(), dense_of(chunks, 40))
+    assert numpy.allclose(store.matrix(canonical=True).toarray(),
+                          dense_of(chunks, 40, numpy.array([1.0, 0.5, 2.0])))
+
+    # The mapped matrix keeps every edge & reads as the same adjacency
+    matrix = store.matrix(weighted=False)
+
+    assert matrix.nnz == 400
+    assert numpy.allclose(matrix.toarray(), dense_of(chunks, 40))
+
+    # Each row is ordered by timestamp
+    for node in range(store.node_count()):
+
+        assert numpy.all(numpy.diff(store.timestamps[store.offsets[node]:store.offsets[node + 1]].astype(int)) >= 0)
+
+def test_canonical_matrices_support_in_place_methods(tmp_path):
+
+    # Build a store with repeated edges
+    chunks  = chunks_of(tmp_path, numpy.random.default_rng(0), 10, [200])
+    store   = GraphStoreBuilder(chunks, 0, None, 16).build(str(tmp_path / 'store'))
+
+    # Canonicalize a copy; the mapped matrix is read-only
+    matrix = store.matrix(canonical=True)
+
+    assert matrix.has_canonical_format
+    assert matrix.sum() == 200
+    assert matrix.nnz < 200
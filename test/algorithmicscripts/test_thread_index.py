@@ -0,0 +1,96 @@
+"""
+Tests of the thread index & its builder.
+"""
+
+## -------
+## Imports
+
+import os
+import json
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from thread_index import ThreadIndex, ThreadIndexBuilder
+
+## -------
+## Helpers
+
+def write_partition(path: str, records: list) -> str:
+    """
+    Writes the specified records as an ingested partition
+    :param path: The path of the partition
+    :param records: The records to write
+    :return: The path of the partition
+    """
+
+    with open(path, 'w') as output_file:
+
+        output_file.writelines(f'{json.dumps(record)}\n' for record in records)
+
+    # Return the result
+    return path
+
+def assert_empty(index: ThreadIndex, labels: int) -> None:
+    """
+    Asserts the specified index contains no posts & answers its queries with empty results
+    :param index: The opened index
+    :param labels: The amount of labels
+    """
+
+    assert index.meta['posts'] == 0 and index.meta['threads'] == 0 and index.meta['depth'] == 0
+    assert index.ids() == []
+
+    # Every per-post column is empty & the offset columns hold their leading zero
+    for column in ('parent', 'root', 'depth', 'size', 'position', 'order', 'children'):
+        assert getattr(index, column).shape == (0,)
+
+    assert index.scores.shape == (0, labels)
+    assert index.child_offsets.tolist() == [0]
+    assert index.score_prefix.tolist() == [[0.0] * labels]
+    assert index.subtree_scores().shape == (0, labels)
+
+## -----
+## Tests
+
+def test_empty_partition_directory_builds_an_empty_index(tmp_path):
+
+    os.makedirs(tmp_path / 'partitions')
+
+    builder = ThreadIndexBuilder()
+    builder.read(str(tmp_path / 'partitions'))
+
+    assert_empty(builder.build(str(tmp_path / 'index')), 2)
+
+def test_no_record_of_the_dataset_builds_an_empty_index(tmp_path):
+
+    partition = write_partition(str(tmp_path / 'part-00000.json'), [
+        {'id': 'a', 'dataset': 'other', 'POSITIVE': 1.0},
+        {'id': 'b', 'parent': 'a', 'dataset': 'other', 'NEGATIVE': 1.0}])
+
+    builder = ThreadIndexBuilder(['POSITIVE', 'NEGATIVE', 'NEUTRAL'], 'reviews')
+    builder.read(partition)
+
+    assert_empty(builder.build(str(tmp_path / 'index')), 3)
+
+def test_threads_are_contiguous_preorder_slices(tmp_path):
+
+    partition = write_partition(str(tmp_path / 'part-00000.json'), [
+        {'id': 'a', 'POSITIVE': 1.0},
+        {'id': 'c', 'parent': 'b', 'NEGATIVE': 1.0},
+        {'id': 'b', 'parent': 'a', 'POSITIVE': 0.5},
+        {'id': 'd', 'parent': 'a', 'NEGATIVE': 0.5},
+        {'id': 'e', 'POSITIVE': 0.25}])
+
+    builder = ThreadIndexBuilder()
+    builder.read(partition)
+    index = builder.build(str(tmp_path / 'index'))
+
+    ids = index.ids()
+
+    assert index.meta['posts'] == 5 and index.meta['threads'] == 2 and index.meta['depth'] == 3
+    assert [ids[post] for post in index.thread(index.index_of('c'))] == ['a', 'b', 'c', 'd']
+    assert [ids[post] for post in index.subtree(index.index_of('b'))] == ['b', 'c']
+    assert [ids[post] for post in index.thread(index.index_of('e'))] == ['e']
+    assert index.subtree_scores([index.index_of('a')]).tolist() == [[1.5, 1.5]]
@@ -0,0 +1,12 @@
+"""
+Makes the ingestion lambda's flat deployment directory importable by its tests.
+"""
+
+## -------
+## Imports
+
+import os
+import sys
+
+# The lambda's modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'lib', 'lambdas'))
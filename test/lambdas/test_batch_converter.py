@@ -0,0 +1,66 @@
+"""
+Tests of the batch converter's worker pool.
+"""
+
+## -------
+## Imports
+
+import os
+import multiprocessing
+
+import pytest
+
+from ingestion_benchmark import synthetic_page
+from ingestion_lambda import BatchConverter, OutputWriter
+
+## -------
+## Helpers
+
+class FailingWriter(OutputWriter):
+    """
+    OutputWriter whose page writes fail
+    """
+
+    def write(self, destination: str, page: tuple) -> list:
+
+        raise IOError(f'Failed to write {page[0]}')
+
+def pages_in(directory, count: int) -> str:
+    """
+    Writes the specified amount of pages into the given directory
+    :param directory: The directory to write the pages to
+    :param count: The amount of pages
+    :return: The path of the directory
+    """
+
+    os.makedirs(directory, exist_ok=True)
+
+    for index in range(count): (directory / f'page-{index}.html').write_text(synthetic_page(5, seed=index))
+
+    return str(directory)
+
+## -----
+## Tests
+
+def test_workers_convert_every_page_and_exit(tmp_path):
+
+    # Convert the pages with two workers
+    metrics = BatchConverter(2, batch_size=2).run(pages_in(tmp_path / 'pages', 6), str(tmp_path / 'output'),
+                                                  str(tmp_path / 'index'))
+
+    # Every page is written & the workers are gone
+    assert metrics['converted'] == 6
+    assert {f'page-{index}.json' for index in range(6)} <= set(os.listdir(tmp_path / 'output'))
+    assert multiprocessing.active_children() == []
+
+def test_workers_are_stopped_when_the_run_fails(tmp_path):
+
+    # Convert the pages with a writer that fails
+    converter = BatchConverter(2, batch_size=1, writer=FailingWriter())
+
+    with pytest.raises(IOError):
+
+        converter.run(pages_in(tmp_path / 'pages', 8), str(tmp_path / 'output'), str(tmp_path / 'index'))
+
+    # The workers & their queued batches don't outlive the run
+    assert multiprocessing.active_children() == []
@@ -0,0 +1,44 @@
+"""
+Tests of the ingestion lambda's benchmarks.
+"""
+
+## -------
+## Imports
+
+import io
+import os
+
+import pytest
+
+from ingestion_benchmark import synthetic_page, benchmark_scaling
+from ingestion_lambda import PostExtractor
+
+## -----
+## Tests
+
+def test_synthetic_page_is_balanced_and_reproducible():
+
+    # Generate the page
+    page = synthetic_page(40, seed=1)
+
+    # Every post is extracted & the same seed generates the same page
+    assert page.count('<div') == page.count('</div')
+    assert len(PostExtractor().extract(io.StringIO(page))) == 40
+    assert synthetic_page(40, seed=1) == page
+
+def test_peak_memory_scales_near_linearly():
+
+    # Convert small pages whose amount of posts doubles at each step, once each
+    result = benchmark_scaling(posts=25, steps=3, repeat=1)
+
+    # Each doubling may at most double the peak memory, within the tolerance; it's deterministic, unlike the time
+    assert all(step['peak_bytes'] <= 2 * result['tolerance'] for step in result['growth']), result['growth']
+
+@pytest.mark.skipif(not os.environ.get('BENCHMARK'), reason='wall-clock benchmark; set BENCHMARK=1 to run it')
+def test_conversion_scales_near_linearly():
+
+    # Convert pages whose amount of posts doubles at each step
+    result = benchmark_scaling(posts=200, steps=3, repeat=3)
+
+    # Each doubling may at most double the time & memory, within the tolerance
+    assert result['linear'], result['growth']
@@ -0,0 +1,145 @@
+"""
+Tests of the ingestion lambda's conversion.
+"""
+
+## -------
+## Imports
+
+import io
+import json
+import random
+
+import pytest
+
+from ingestion_benchmark import synthetic_page
+from ingestion_lambda import HTMLToDictionaryParser, HTMLToArenaParser, HTMLParserBackend, TransformationEngine, \
+    PARSER_BACKENDS, RULES
+
+## -------
+## Helpers
+
+KEYS = ['div', 'span', 'data', 'class', 'text', 'a', 'img', 'card--header', 'card--footer', 'eb--col', 'separator',
+        'pa--item--count', 'ca--item--count', 'comment--card--wrapper', 'media-container--wrapper', 'alt', 'href',
+        'src', 'type', 'filename']
+
+def random_document(generator: random.Random, depth: int = 0):
+    """
+    Generates a random nested document over the keys the rules match
+    :param generator: The random values
+    :param depth: The depth of the document
+    :return: The document
+    """
+
+    # Leaves are strings or empty values
+    if depth > 4 or generator.random() < 0.25: return generator.choice(['', 'x', 'alt', 'Up Votes', 'text', {}, []])
+
+    # Lists hold a few documents
+    if generator.random() < 0.2: return [random_document(generator, depth + 1) for _ in range(generator.randrange(1, 4))]
+
+    # Otherwise, a dict of a few keys
+    return {generator.choice(KEYS): random_document(generator, depth + 1) for _ in range(generator.randrange(1, 5))}
+
+def parse(html: str, backend=None) -> dict:
+    """
+    Parses the specified page into a dictionary
+    :param html: The html of the page
+    :param backend: The parser backend; defaults to the configured one
+    :return: The parsed dictionary
+    """
+    return HTMLToDictionaryParser('synthetic.html', backend, source=io.StringIO(html)).dictionary()
+
+def flattened(value):
+    """
+    Returns the specified value with its nested lists flattened
+    :param value: The value to flatten
+    :return: The flattened value
+    """
+
+    # Flatten the dictionaries' values
+    if isinstance(value, dict): return {key: flattened(child) for key, child in value.items()}
+
+    # Splice the nested lists
+    if isinstance(value, list):
+
+        return [item for child in value
+                for item in (flattened(child) if isinstance(child, list) else [flattened(child)])]
+
+    return value
+
+## -----
+## Tests
+
+@pytest.mark.parametrize('seed', range(6))
+def test_composed_passes_match_the_sequential_rules_on_pages(seed):
+
+    # Initialize the engine & the page
+    engine  = TransformationEngine(RULES)
+    html    = synthetic_page(30 * (seed + 1), seed=seed)
+
+    # Transform fresh dictionaries, since the rules modify their input
+    expected = json.dumps(engine.sequential(parse(html, HTMLParserBackend())))
+
+    # The composed passes match the reference over dictionaries & arena nodes
+    assert json.dumps(engine(parse(html, HTMLParserBackend()))) == expected
+    assert json.dumps(engine(HTMLToArenaParser('synthetic.html', source=io.StringIO(html)).root)) == expected
+
+def test_composed_passes_match_the_sequential_rules_on_random_documents():
+
+    # Initialize the engine & the random values
+    engine      = TransformationEngine(RULES)
+    generator   = random.Random(0)
+
+    for _ in range(300):
+
+        # Generate the document
+        document = json.dumps(random_document(generator))
+
+        # The composed passes match the reference
+        assert json.dumps(engine(json.loads(document))) == json.dumps(engine.sequential(json.loads(document)))
+
+@pytest.mark.parametrize('backend', PARSER_BACKENDS, ids=lambda backend: backend.Name)
+@pytest.mark.parametrize('seed', range(3))
+def test_backends_match_the_stdlib_parser(backend, seed):
+
+    # Skip the backends that aren't installed
+    if not backend.available(): pytest.skip(f'{backend.Name} is not installed')
+
+    # Initialize the page
+    html = synthetic_page(30 * (seed + 1), seed=seed)
+
+    # Parse the page with the stdlib parser & the backend
+    expected    = HTMLToDictionaryParser('synthetic.html', HTMLParserBackend(), source=io.StringIO(html))
+    parser      = HTMLToDictionaryParser('synthetic.html', backend(), source=io.StringIO(html))
+
+    # The dictionaries, indexes & keys are identical
+    assert json.dumps(parser.dictionary()) == json.dumps(expected.dictionary())
+    assert json.dumps(parser.index()) == json.dumps(expected.index())
+    assert json.dumps(parser.keys()) == json.dumps(expected.keys())
+
+def test_values_added_by_a_later_rule_nest_the_parsed_values():
+
+    # The parser's 'x' holds two values; the src merge adds a third
+    html = '<html><body><div alt="x" src="s"><p class="x">a</p><p class="x">b</p></div></body></html>'
+
+    # The list of values is nested, as the output was once the 'duplicated' keys were removed
+    assert TransformationEngine(RULES)(parse(html, HTMLParserBackend())) == \
+        {'filename data': 'synthetic.html', 'x': [['a', 'b'], 's']}
+
+def test_merged_leaves_no_longer_nest_on_the_duplicated_keys():
+
+    # The eb--col merge flattens a dictionary the media merge duplicated a value into
+    html = '<html><body><img class="eb--col-x" alt="Up Votes"><a class="separator"><p alt="Comments"></p>' \
+           '<div class="eb--col" alt="Up Votes"><a class="media-container--wrapper" alt="Comments"></a></div>' \
+           '</a></body></html>'
+
+    # The old merge flattened the merged dictionary's 'duplicated' key like any leaf, so it lost track of the
+    # repeated 'alt' & nested its next value; the value is now appended
+    old = {'filename alt': 'synthetic.html', 'eb--col-x alt': {'alt': [['Up Votes', 'Comments'],
+                                                                      ['Up Votes', 'Comments']]}}
+    new = {'filename alt': 'synthetic.html', 'eb--col-x alt': {'alt': ['Up Votes', 'Comments',
+                                                                      ['Up Votes', 'Comments']]}}
+
+    assert TransformationEngine(RULES)(parse(html, HTMLParserBackend())) == new
+
+    # Only the nesting differs
+    assert flattened(new) == flattened(old)
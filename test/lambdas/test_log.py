@@ -0,0 +1,66 @@
+"""
+Tests of the log's background writer.
+"""
+
+## -------
+## Imports
+
+import os
+import multiprocessing
+
+import pytest
+
+from log import Log
+
+## -------
+## Helpers
+
+def log_from_worker(path: str, flush: bool) -> int:
+    """
+    Logs an event to the specified file from a worker
+    :param path: The path of the file the events are written to
+    :param flush: Flag indicating if the worker waits for its events to be written
+    :return: The worker's pid
+    """
+
+    # Write the worker's events to the file
+    Log.Stream = open(path, 'a')
+
+    Log.Info('Logged from %s', os.getpid())
+
+    if flush: Log.flush()
+
+    return os.getpid()
+
+## -----
+## Tests
+
+@pytest.mark.skipif(not hasattr(os, 'register_at_fork'), reason='fork is not supported')
+@pytest.mark.parametrize('flush', [True, False], ids=['flushed', 'at-exit'])
+def test_forked_workers_write_their_events(tmp_path, flush):
+
+    # Start the writer in the parent
+    Log.Info('Starting the workers')
+    Log.flush()
+
+    # Log from forked workers; a hung flush fails instead of blocking
+    path = str(tmp_path / 'workers.log')
+    pool = multiprocessing.get_context('fork').Pool(2)
+
+    try: pids = pool.starmap_async(log_from_worker, [(path, flush)] * 4).get(timeout=30)
+
+    except BaseException:
+
+        pool.terminate()
+
+        raise
+
+    else: pool.close()
+
+    finally: pool.join()
+
+    # Every event is written
+    with open(path) as input_file: lines = input_file.read().splitlines()
+
+    assert len(lines) == 4
+    assert sorted(int(line.rsplit(' ', 1)[1]) for line in lines) == sorted(pids)
@@ -0,0 +1,185 @@
+"""
+Tests of the S3 processor against the local S3 stand-in.
+"""
+
+## -------
+## Imports
+
+import os
+
+import pytest
+
+import ingestion_lambda
+
+from ingestion_benchmark import synthetic_page
+from ingestion_lambda import LocalS3Client, OutputWriter, S3Processor
+
+## -------
+## Helpers
+
+class FlakyS3Client(LocalS3Client):
+    """
+    LocalS3Client whose reads & writes of the matching keys fail & that records its delete requests
+    """
+
+    def __init__(self, root: str, reads=lambda key: False, writes=lambda key: False):
+
+        super().__init__(root)
+
+        self.reads      = reads
+        self.writes     = writes
+        self.deletes    = []
+
+    def get_object(self, Bucket: str, Key: str) -> dict:
+
+        if self.reads(Key): raise IOError(f'Failed to read {Key}')
+
+        return super().get_object(Bucket, Key)
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **keywords) -> dict:
+
+        if self.writes(Key): raise IOError(f'Failed to write {Key}')
+
+        return super().put_object(Bucket, Key, Body, **keywords)
+
+    def delete_objects(self, Bucket: str, Delete: dict) -> dict:
+
+        self.deletes.append([entry['Key'] for entry in Delete['Objects']])
+
+        return super().delete_objects(Bucket, Delete)
+
+def bucket_with(root, pages: dict) -> None:
+    """
+    Writes the specified pages into the input bucket
+    :param root: The root of the buckets
+    :param pages: dict of key to html
+    """
+
+    os.makedirs(root / 'input', exist_ok=True)
+
+    for key, html in pages.items(): (root / 'input' / key).write_text(html, encoding='utf-8')
+
+def event_of(keys: list) -> dict:
+    """
+    Returns an S3 notification naming the specified keys of the input bucket
+    :param keys: The keys, URL-encoded as S3 encodes them
+    :return: The event
+    """
+    return {'output_bucket': 'output',
+            'Records': [{'s3': {'bucket': {'name': 'input'}, 'object': {'key': key}}} for key in keys]}
+
+def keys_of(root, bucket: str) -> list:
+    """
+    Returns the sorted keys of the specified bucket
+    :param root: The root of the buckets
+    :param bucket: The name of the bucket
+    :return: list of keys
+    """
+    return sorted(os.listdir(root / bucket)) if os.path.isdir(root / bucket) else []
+
+def objects_of(client, etags: bool) -> list:
+    """
+    Lists the input bucket, with or without the ETags
+    :param client: The LocalS3Client
+    :param etags: Flag indicating if the ETags are kept; otherwise the bodies are hashed as they're parsed
+    :return: list of (bucket, key, etag) tuples
+    """
+    return [(bucket, key, etag if etags else None)
+            for bucket, key, etag in S3Processor(client, 'output').listing('input')]
+
+## -----
+## Tests
+
+def test_pages_are_converted_and_deleted_in_batches(tmp_path, monkeypatch):
+
+    # Initialize five pages & batches of two deletions
+    bucket_with(tmp_path, {f'page-{index}.html': synthetic_page(5, seed=index) for index in range(5)})
+    monkeypatch.setattr(S3Processor, 'DeleteBatch', 2)
+
+    client = FlakyS3Client(str(tmp_path))
+
+    # Process the listed pages
+    metrics = S3Processor(client, 'output')(objects_of(client, True))
+
+    # Every page's documents are uploaded & the pages are deleted two at a time
+    assert metrics['processed'] == 5
+    assert metrics['uploaded'] == 15
+    assert metrics['deleted'] == 5
+    assert metrics['failed'] == []
+    assert keys_of(tmp_path, 'input') == []
+    assert [len(keys) for keys in client.deletes] == [2, 2, 1]
+    assert {f'page-{index}{suffix}' for index in range(5) for suffix in ('.json', '-index.json', '-keys.json')} \
+        <= set(keys_of(tmp_path, 'output'))
+
+def test_failed_pages_are_kept(tmp_path):
+
+    # Initialize three distinct pages; the second can't be read
+    bucket_with(tmp_path, {f'page-{index}.html': synthetic_page(5, seed=index) for index in range(3)})
+
+    client = FlakyS3Client(str(tmp_path), reads=lambda key: key == 'page-1.html')
+
+    # Process the pages
+    metrics = S3Processor(client, 'output')(objects_of(client, True))
+
+    # Only the failed page is kept
+    assert metrics['failed'] == ['page-1.html']
+    assert metrics['processed'] == 2
+    assert keys_of(tmp_path, 'input') == ['page-1.html']
+
+def test_handler_converts_the_named_keys_once(tmp_path, monkeypatch):
+
+    # Initialize a page whose key S3 encodes & name it twice, as a repeated notification would
+    bucket_with(tmp_path, {'café post.html': synthetic_page(5)})
+    monkeypatch.setitem(ingestion_lambda.CLIENTS, 's3', LocalS3Client(str(tmp_path)))
+
+    metrics = ingestion_lambda.handler(event_of(['caf%C3%A9+post.html'] * 2), None)
+
+    # The page is converted once, deleted & recorded in the manifest
+    assert metrics['processed'] == 1
+    assert metrics['duplicates'] == 1
+    assert metrics['failed'] == []
+    assert keys_of(tmp_path, 'input') == []
+    assert 'café post.json' in keys_of(tmp_path, 'output')
+    assert len([name for _, _, names in os.walk(tmp_path / 'output' / 'manifest') for name in names]) == 1
+
+    # The same content under another key is skipped by the manifest & deleted
+    bucket_with(tmp_path, {'copy.html': synthetic_page(5)})
+
+    metrics = ingestion_lambda.handler(event_of(['copy.html']), None)
+
+    assert metrics['processed'] == 0
+    assert metrics['unchanged'] == 1
+    assert keys_of(tmp_path, 'input') == []
+
+@pytest.mark.parametrize('etags', [True, False], ids=['etag', 'hashed'])
+def test_duplicates_of_content_that_failed_to_convert_are_converted(tmp_path, etags):
+
+    # Initialize two identical pages; the first can't be read
+    bucket_with(tmp_path, {'a.html': synthetic_page(5), 'b.html': synthetic_page(5)})
+
+    client = FlakyS3Client(str(tmp_path), reads=lambda key: key == 'a.html')
+
+    # Process the pages
+    metrics = S3Processor(client, 'output')(objects_of(client, etags))
+
+    # The duplicate is converted in its place & only the failed page is kept
+    assert metrics['failed'] == ['a.html']
+    assert keys_of(tmp_path, 'input') == ['a.html']
+    assert 'b.json' in keys_of(tmp_path, 'output')
+
+@pytest.mark.parametrize('etags', [True, False], ids=['etag', 'hashed'])
+@pytest.mark.parametrize('part_size', [None, 1, 64 << 20], ids=['documents', 'part-per-page', 'one-part'])
+def test_duplicates_of_content_that_failed_to_upload_are_kept(tmp_path, etags, part_size):
+
+    # Initialize two identical pages; the first page's outputs or part fail to upload
+    bucket_with(tmp_path, {'a.html': synthetic_page(5), 'b.html': synthetic_page(5)})
+
+    client = FlakyS3Client(str(tmp_path), writes=lambda key: key.startswith('a') or key.endswith('-00000.ndjson'))
+    writer = OutputWriter(consolidated=part_size is not None)
+
+    # Process the pages
+    metrics = S3Processor(client, 'output', writer=writer, part_size=part_size or 1)(objects_of(client, etags))
+
+    # Neither page is deleted
+    assert sorted(metrics['failed']) == ['a.html', 'b.html']
+    assert keys_of(tmp_path, 'input') == ['a.html', 'b.html']
@@ -0,0 +1,12 @@
+"""
+Makes the ML scripts' directory importable by their tests.
+"""
+
+## -------
+## Imports
+
+import os
+import sys
+
+# The scripts import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'lib', 'mlscripts'))
@@ -0,0 +1,50 @@
+"""
+Tests of the training checkpoints.
+"""
+
+## -------
+## Imports
+
+import os
+
+from checkpoints import Checkpoints
+
+## -----
+## Tests
+
+def test_checkpoints_keep_the_best_and_bound_the_disk(tmp_path):
+
+    # Leave the checkpoints of a previous run in the root
+    for name in ('epoch-000.bin', 'epoch-007.bin', 'epoch-008.bin.tmp', 'config.cfg'):
+
+        (tmp_path / name).write_bytes(b'old')
+
+    # Start a run; the previous checkpoints are removed
+    checkpoints = Checkpoints(str(tmp_path), 'f_score', keep=2, patience=2)
+
+    assert sorted(os.listdir(tmp_path)) == ['config.cfg']
+
+    # Add the epochs
+    for epoch, score in enumerate([0.2, 0.5, 0.4, 0.3, 0.1]):
+
+        checkpoints.add(epoch, {'f_score': score, 'epoch': epoch}, lambda: str(epoch).encode())
+
+        if checkpoints.stop(): break
+
+    # The run stops after two epochs without improvement, keeping the two best
+    assert epoch == 3
+    assert checkpoints.metrics()['epoch'] == 1
+    assert checkpoints.bytes() == b'1'
+    assert sorted(os.listdir(tmp_path)) == ['config.cfg', 'epoch-001.bin', 'epoch-002.bin']
+
+def test_checkpoints_rank_losses_lowest_first(tmp_path):
+
+    # Initialize the checkpoints over a loss
+    checkpoints = Checkpoints(str(tmp_path), 'loss', keep=1, patience=None, maximize=False)
+
+    # Add the epochs
+    for epoch, loss in enumerate([3.0, 1.0, 2.0]): checkpoints.add(epoch, {'loss': loss, 'epoch': epoch}, bytes)
+
+    # The lowest loss is kept
+    assert checkpoints.metrics()['epoch'] == 1
+    assert os.listdir(tmp_path) == ['epoch-001.bin']
@@ -0,0 +1,85 @@
+"""
+Tests of the text categorizer evaluation.
+"""
+
+## -------
+## Imports
+
+import pytest
+
+spacy = pytest.importorskip('spacy')
+
+from textcat_evaluation import TextCatEvaluator
+
+## -------
+## Helpers
+
+LABELS  = ['negative', 'positive']
+TEXTS   = ['i hate the war', 'i love the people', 'the war & the love', 'a nice day']
+GOLD    = [{'negative': 1.0, 'positive': 0.0}, {'negative': 0.0, 'positive': 1.0},
+           {'negative': 1.0, 'positive': 1.0}, {'negative': 0.0, 'positive': 0.0}]
+
+def language_with(name: str):
+    """
+    Returns a blank language with an initialized pipe of the specified name over the labels
+    :param name: The name of the pipe
+    :return: tuple of the language & the pipe
+    """
+
+    # Initialize the language & the pipe
+    language    = spacy.blank('en')
+    pipe        = language.add_pipe(name)
+
+    for label in LABELS: pipe.add_label(label)
+
+    language.initialize()
+
+    # Return the result
+    return language, pipe
+
+## -----
+## Tests
+
+def test_pipes_that_dont_set_cats_score_nothing_on_raw_texts():
+
+    # Initialize the spancat pipe
+    language, pipe = language_with('spancat')
+
+    # Evaluate the raw texts
+    result = TextCatEvaluator()(language.tokenizer, pipe, TEXTS, GOLD)
+
+    # Nothing is predicted, so every gold label is missed
+    assert result['true_positive'] == 0.0
+    assert result['false_positive'] == 0.0
+    assert result['false_negative'] == 4.0
+    assert result['f_score'] == 0.0
+
+def test_pipes_that_dont_set_cats_score_nothing_on_documents_carrying_cats():
+
+    # Initialize the spancat pipe & documents that carry their gold labels as cats
+    language, pipe  = language_with('spancat')
+    documents       = list(language.tokenizer.pipe(TEXTS))
+
+    for document, features in zip(documents, GOLD): document.cats = features
+
+    # The gold labels aren't scored as predictions
+    assert TextCatEvaluator()(language.tokenizer, pipe, documents, GOLD)['true_positive'] == 0.0
+
+def test_textcat_scores_every_document_and_label():
+
+    # Initialize the textcat pipe & the evaluator
+    language, pipe  = language_with('textcat_multilabel')
+    evaluator       = TextCatEvaluator(batch_size=3, thresholds=[0.0, 1.1])
+
+    # Score the texts
+    labels, scores, gold = evaluator.matrices(language.tokenizer, pipe, TEXTS, GOLD)
+
+    assert labels == LABELS
+    assert scores.shape == (4, 2)
+    assert gold.sum() == 4
+
+    # Thresholds of zero & above one predict every & no label
+    sweep = evaluator(language.tokenizer, pipe, TEXTS, GOLD)['sweep']
+
+    assert sweep[0]['recall'] == 1.0
+    assert sweep[1]['recall'] == 0.0